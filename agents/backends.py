@@ -0,0 +1,202 @@
+# agents/backends.py
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+# Consecutive failures before a backend is taken out of rotation, and how
+# long it stays out before one trial request is let through again.
+FAILURE_THRESHOLD = int(os.environ.get("OLLAMA_FAILURE_THRESHOLD", "3"))
+COOLDOWN_SECONDS = float(os.environ.get("OLLAMA_COOLDOWN", "30"))
+
+# Background /api/tags probe interval (pools with more than one backend).
+HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "10"))
+HEALTH_TIMEOUT = 2.0
+
+
+def parse_urls(value: str) -> List[str]:
+    """'http://a:11434, http://b:11434' -> ['http://a:11434', 'http://b:11434']"""
+    return [u.strip().rstrip("/") for u in (value or "").split(",") if u.strip()]
+
+
+# ---------------------------------------------------------------------
+# Backend + pool
+# ---------------------------------------------------------------------
+
+class Backend:
+    """One Ollama server and its routing/circuit-breaker state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.calls = 0
+        self.errors = 0
+        self.latency_s = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # circuit open (skipped) until this time
+        self.trial_in_flight = False
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def state(self, now: float, failure_threshold: int = FAILURE_THRESHOLD) -> str:
+        if self.is_open(now):
+            return "open"
+        return "half_open" if self.consecutive_failures >= failure_threshold else "closed"
+
+
+class BackendPool:
+    """
+    Routes each request to the available backend with the fewest requests
+    outstanding. A backend failing failure_threshold times in a row is
+    skipped for cooldown_seconds; after that a single trial request decides
+    whether it rejoins. If every backend is out, the one closest to
+    recovery is used anyway rather than failing outright.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        failure_threshold: int = FAILURE_THRESHOLD,
+        cooldown_seconds: float = COOLDOWN_SECONDS,
+        health_interval: float = HEALTH_INTERVAL,
+    ):
+        if not urls:
+            raise ValueError("BackendPool needs at least one URL")
+        self.backends = [Backend(u) for u in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.health_interval = health_interval
+
+        self._lock = threading.Lock()
+        self._next = 0  # round-robin tie breaker
+        self._health_thread: Optional[threading.Thread] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [b.url for b in self.backends]
+
+    # --- routing ---
+
+    def acquire(self) -> Backend:
+        """Pick a backend for one request; pair every call with release()."""
+        if len(self.backends) > 1 and self._health_thread is None and self.health_interval > 0:
+            self._start_health_checks()
+
+        now = time.monotonic()
+        with self._lock:
+            n = len(self.backends)
+            order = [self.backends[(self._next + i) % n] for i in range(n)]
+            self._next = (self._next + 1) % n
+
+            candidates = [
+                b for b in order
+                if not b.is_open(now)
+                and not (b.consecutive_failures >= self.failure_threshold and b.trial_in_flight)
+            ]
+            if candidates:
+                backend = min(candidates, key=lambda b: b.outstanding)
+            else:
+                backend = min(order, key=lambda b: b.open_until)
+
+            if backend.consecutive_failures >= self.failure_threshold:
+                backend.trial_in_flight = True
+            backend.outstanding += 1
+            return backend
+
+    def release(self, backend: Backend, ok: bool, latency_s: float = 0.0) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            backend.calls += 1
+            backend.latency_s += latency_s
+            backend.trial_in_flight = False
+            if ok:
+                backend.consecutive_failures = 0
+                backend.open_until = 0.0
+            else:
+                backend.errors += 1
+                self._record_failure(backend)
+
+    def trip(self, url: str) -> None:
+        """Take a backend out of rotation now (e.g. it failed to warm up)."""
+        with self._lock:
+            for backend in self.backends:
+                if backend.url == url:
+                    backend.consecutive_failures = max(backend.consecutive_failures, self.failure_threshold)
+                    backend.open_until = time.monotonic() + self.cooldown_seconds
+
+    def _record_failure(self, backend: Backend) -> None:
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.failure_threshold:
+            backend.open_until = time.monotonic() + self.cooldown_seconds
+
+    # --- health checks ---
+
+    def check_health(self) -> Dict[str, bool]:
+        """Probe every backend's /api/tags once; failures count toward the breaker."""
+        import requests
+
+        results = {}
+        for backend in self.backends:
+            try:
+                ok = requests.get(f"{backend.url}/api/tags", timeout=HEALTH_TIMEOUT).status_code == 200
+            except requests.RequestException:
+                ok = False
+            results[backend.url] = ok
+            with self._lock:
+                if ok:
+                    if backend.consecutive_failures >= self.failure_threshold:
+                        # Reachable again: let the next request be the trial.
+                        backend.open_until = 0.0
+                elif not backend.is_open(time.monotonic()):
+                    self._record_failure(backend)
+        return results
+
+    def _start_health_checks(self) -> None:
+        with self._lock:
+            if self._health_thread is not None:
+                return
+
+            def _loop():
+                while True:
+                    time.sleep(self.health_interval)
+                    self.check_health()
+
+            self._health_thread = threading.Thread(target=_loop, name="ollama-health", daemon=True)
+            self._health_thread.start()
+
+    # --- metrics ---
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": b.url,
+                    "state": b.state(now, self.failure_threshold),
+                    "outstanding": b.outstanding,
+                    "calls": b.calls,
+                    "errors": b.errors,
+                    "avg_latency_s": round(b.latency_s / b.calls, 3) if b.calls else 0.0,
+                }
+                for b in self.backends
+            ]
+
+    def export_prometheus(self, prefix: str = "phish") -> str:
+        lines = [f"# TYPE {prefix}_backend_outstanding gauge"]
+        stats = self.stats()
+        for s in stats:
+            lines.append(f'{prefix}_backend_outstanding{{backend="{s["url"]}"}} {s["outstanding"]}')
+        lines.append(f"# TYPE {prefix}_backend_up gauge")
+        for s in stats:
+            lines.append(f'{prefix}_backend_up{{backend="{s["url"]}"}} {0 if s["state"] == "open" else 1}')
+        lines.append(f"# TYPE {prefix}_backend_requests_total counter")
+        for s in stats:
+            lines.append(f'{prefix}_backend_requests_total{{backend="{s["url"]}",result="ok"}} {s["calls"] - s["errors"]}')
+            lines.append(f'{prefix}_backend_requests_total{{backend="{s["url"]}",result="error"}} {s["errors"]}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,294 @@
+# agents/batching.py
+
+import asyncio
+import json
+import os
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import get_cache, request_key
+from .input_prep import dedupe_urls, prepare_body, prepare_subject
+from .llm_client import get_async_client
+from .tracing import traced
+from .unified_agent import _split_checked, run_unified_agent_async
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "50"))
+
+# ---------------------------------------------------------------------
+# Batch system prompt
+# ---------------------------------------------------------------------
+
+BATCH_SYSTEM_PROMPT = """
+You are a UNIFIED ANALYSIS AGENT for a phishing email detection system.
+You receive SEVERAL emails at once. Each email starts with a line
+"=== EMAIL <id> ===". Analyze every email independently.
+
+You MUST return STRICT JSON ONLY of this form:
+{
+  "results": [
+    {"id": "<id>", "text": { ... }, "url": { ... }, "metadata": { ... }},
+    ...
+  ]
+}
+with exactly one entry per input email, using the ids given.
+
+Each text/url/metadata sub-object MUST include ALL keys required by the agent schema:
+- agent
+- version
+- view
+- task
+- verdict ("phishing" | "legitimate" | "unsure")
+- confidence (0.0 to 1.0)
+- phishing_indicators (list)
+- legitimacy_indicators (list)
+- evidence (list)
+- overall_rationale (string)
+- safety_notes (string)
+
+ANALYSIS RULES:
+- text: analyze ONLY that email's subject + body text.
+- url: analyze ONLY that email's URL strings. Do NOT browse.
+- metadata: analyze ONLY that email's headers. If no metadata is provided,
+  set verdict="unsure" and confidence=0.0 with empty indicators/evidence.
+- Never let one email influence the verdict of another.
+
+INDICATORS:
+- Use ONLY indicators defined by the system. Do not invent new ones.
+- If evidence is weak or ambiguous, prefer "unsure".
+
+FORMAT RULES:
+- Output valid JSON.
+- Use double quotes.
+- No comments, no trailing commas, no extra text.
+"""
+
+# ---------------------------------------------------------------------
+# Request building / response splitting
+# ---------------------------------------------------------------------
+
+Email = Tuple[str, str, List[str], str]  # subject, body, urls, headers_text
+
+
+def _email_block(email: Email) -> str:
+    subject, body, urls, headers_text = email
+    urls = dedupe_urls(urls)
+    url_block = "\n".join(urls) if urls else "(no urls provided)"
+    headers_block = headers_text.strip() if headers_text else "(no metadata provided)"
+    return (
+        f"Subject:\n{prepare_subject(subject)}\n\nBody:\n{prepare_body(body)}\n\n"
+        f"URLs:\n{url_block}\n\nHeaders:\n{headers_block}\n"
+    )
+
+def _cache_key(block: str) -> str:
+    return request_key("batch", {"system": BATCH_SYSTEM_PROMPT.strip(), "prompt": block})
+
+def _build_request(blocks: List[str]) -> Dict[str, Any]:
+    """
+    Emails are numbered e1..eN inside a batch; the caller maps them back.
+    No timeout: the client's configured read timeout applies.
+    """
+    parts = [f"=== EMAIL e{i} ===\n{block}" for i, block in enumerate(blocks, start=1)]
+    return {
+        "prompt": "INPUT:\n" + "\n".join(parts) + "\nReturn STRICT JSON only.",
+        "system": BATCH_SYSTEM_PROMPT.strip(),
+        "format": "json",
+    }
+
+@traced("extract_json", agent="batch")
+def _parse_batch(raw: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Map batch id -> raw unified object. Accepts {"results": [...]}, a bare
+    list, or an object keyed by id; anything else yields {} (fail-safe).
+    """
+    if isinstance(raw, str):
+        start = min((i for i in (raw.find("{"), raw.find("[")) if i != -1), default=-1)
+        end = max(raw.rfind("}"), raw.rfind("]"))
+        if start == -1 or end <= start:
+            return {}
+        try:
+            raw = json.loads(raw[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+
+    if isinstance(raw, dict) and isinstance(raw.get("results"), list):
+        raw = raw["results"]
+
+    if isinstance(raw, list):
+        return {
+            str(item.get("id")): item
+            for item in raw
+            if isinstance(item, dict) and item.get("id") is not None
+        }
+    if isinstance(raw, dict):
+        return {str(k): v for k, v in raw.items() if isinstance(v, dict)}
+    return {}
+
+
+# ---------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------
+
+class MicroBatcher:
+    """
+    Collects emails submitted within max_wait_ms (or until max_batch_size
+    are waiting) and analyzes them with one LLM call, so the system prompt
+    is evaluated once per batch rather than once per email.
+
+    Emails the model leaves out of its answer, or answers with an object
+    that fails validation, are retried one by one through the unified
+    agent (and not cached from the batch). When the call itself fails
+    (after the client's own retries with backoff), every email in the
+    batch gets the fail-safe result with the error instead: retrying them
+    one by one would multiply the load on a backend that is already
+    struggling. Bound to the event loop it is used on; use get_batcher()
+    from inside the running loop.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max_wait_ms / 1000.0
+
+        self._pending: List[Tuple[Email, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        self.batches = 0
+        self.emails = 0
+        self.cache_hits = 0
+        self.retried = 0
+        self.failed_batches = 0
+        self.timer_flushes = 0
+
+    async def submit(
+        self,
+        subject: str,
+        body: str,
+        urls: List[str],
+        headers_text: str = "",
+    ) -> Dict[str, Dict[str, Any]]:
+        """Validated {text, url, metadata} for one email, same as run_unified_agent_async()."""
+        email = (subject, body, urls, headers_text)
+        block = _email_block(email)
+
+        cache = get_cache()
+        if cache:
+            hit = cache.get(_cache_key(block))
+            if hit is not None:
+                self.cache_hits += 1
+                return hit
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((email, block, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush, True)
+        return await future
+
+    def _flush(self, by_timer: bool = False) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        if by_timer:
+            self.timer_flushes += 1
+
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Email, str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.emails += len(batch)
+
+        request = _build_request([block for _, block, _ in batch])
+        try:
+            data = await get_async_client().generate(**request, agent="batch")
+        except Exception as e:
+            self.failed_batches += 1
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(_split_checked({}, repr(e))[0])
+            return
+        answers = _parse_batch(data.get("response"))
+
+        cache = get_cache()
+        missing = []
+        for i, (email, block, future) in enumerate(batch, start=1):
+            answer = answers.get(f"e{i}")
+            result, ok = _split_checked(answer) if answer else (None, False)
+            if not ok:
+                # Left out, or garbled (a sub-object failed validation).
+                missing.append((email, future))
+                continue
+            if cache:
+                cache.put(_cache_key(block), "batch", result)
+            if not future.done():
+                future.set_result(result)
+
+        if missing:
+            self.retried += len(missing)
+            results = await asyncio.gather(
+                *(run_unified_agent_async(*email) for email, _ in missing),
+                return_exceptions=True,
+            )
+            for (_, future), result in zip(missing, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def drain(self) -> None:
+        """Send whatever is waiting now and wait for all batches in flight."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "emails": self.emails,
+            "avg_batch_size": round(self.emails / self.batches, 2) if self.batches else 0.0,
+            "timer_flushes": self.timer_flushes,
+            "retried_individually": self.retried,
+            "failed_batches": self.failed_batches,
+            "cache_hits": self.cache_hits,
+        }
+
+
+# ---------------------------------------------------------------------
+# Shared instance (one per event loop)
+# ---------------------------------------------------------------------
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MicroBatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_batcher() -> MicroBatcher:
+    """Return the batcher for the running event loop, creating it with env defaults."""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = MicroBatcher()
+    return batcher
+
+
+def set_batcher(batcher: MicroBatcher) -> None:
+    """Use batcher for the running event loop (e.g. with another batch size)."""
+    _batchers[asyncio.get_running_loop()] = batcher
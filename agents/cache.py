@@ -0,0 +1,195 @@
+# agents/cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .llm_client import get_client
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+def default_cache_path() -> str:
+    """
+    Per-user cache file under $XDG_CACHE_HOME (default ~/.cache). It is
+    absolute, so CLIs started from any directory (analyze.py runs from mail
+    filters) share one cache instead of leaving files in the working dir.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "phishing-agents", "verdict_cache.sqlite")
+
+# Set VERDICT_CACHE_PATH="" to disable caching entirely.
+CACHE_PATH = os.environ.get("VERDICT_CACHE_PATH", default_cache_path())
+CACHE_MAX_ENTRIES = int(os.environ.get("VERDICT_CACHE_MAX_ENTRIES", "200000"))
+CACHE_TTL_SECONDS = float(os.environ.get("VERDICT_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+# ---------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------
+
+def prompt_version(system_prompt: str) -> str:
+    """Short content hash of a system prompt; editing the prompt invalidates old entries."""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+def normalize_input(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+def make_key(agent: str, model: str, version: str, text: str) -> str:
+    h = hashlib.sha256()
+    for part in (agent, model, version, normalize_input(text)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def request_key(agent: str, request: Dict[str, Any]) -> str:
+    """Key for an agent request dict as passed to OllamaClient.generate()."""
+    return make_key(
+        agent,
+        get_client().model,
+        prompt_version(request.get("system") or ""),
+        request.get("prompt", ""),
+    )
+
+
+# ---------------------------------------------------------------------
+# SQLite-backed LRU + TTL store
+# ---------------------------------------------------------------------
+
+class VerdictCache:
+    """
+    Persistent cache of validated agent outputs.
+
+    Entries expire after ttl_seconds; once more than max_entries are
+    stored the least recently read ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_seconds: float = CACHE_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_accessed ON verdicts(accessed)")
+
+        self._size = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            if self.ttl_seconds > 0 and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                self._size -= 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE verdicts SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(value)
+
+    def put(self, key: str, agent: str, value: Any) -> None:
+        now = time.time()
+        data = json.dumps(value)
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE verdicts SET value = ?, created = ?, accessed = ? WHERE key = ?",
+                (data, now, now, key),
+            )
+            if cur.rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO verdicts (key, agent, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, agent, data, now, now),
+                )
+                self._size += 1
+
+            if self._size > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM verdicts WHERE key IN "
+                    "(SELECT key FROM verdicts ORDER BY accessed LIMIT ?)",
+                    (self._size - self.max_entries,),
+                )
+                self._size = self.max_entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM verdicts")
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self._size,
+        }
+
+
+# ---------------------------------------------------------------------
+# Shared instance
+# ---------------------------------------------------------------------
+
+_cache: Optional[VerdictCache] = None
+_cache_disabled = not CACHE_PATH
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[VerdictCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if _cache_disabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VerdictCache()
+    return _cache
+
+
+def set_cache(cache: Optional[VerdictCache]) -> None:
+    """Replace the shared cache; None disables caching for this process."""
+    global _cache, _cache_disabled
+    with _cache_lock:
+        _cache = cache
+        _cache_disabled = cache is None
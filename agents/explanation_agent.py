@@ -1,9 +1,14 @@
 import json
-import requests
-from typing import Dict, Any
+import os
+import random
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+from .explanation_templates import render_explanation
+from .llm_client import get_async_client, get_client
+
+# Fraction of explain() calls that use the LLM instead of the templates
+# (e.g. 0.05 to keep an eye on how the two compare). 0 = never.
+LLM_SAMPLE_RATE = float(os.environ.get("EXPLANATION_LLM_SAMPLE_RATE", "0"))
 
 EXPLANATION_SYSTEM_PROMPT = """
 You are an EXPLANATION AGENT in a phishing email detection system.
@@ -24,23 +29,76 @@ OUTPUT
 - Plain text explanation only
 """
 
-def run_explanation_agent(final_result: Dict[str, Any]) -> str:
+EXPLANATION_UNAVAILABLE = "Explanation unavailable."
+
+def _build_request(final_result: Dict[str, Any]) -> Dict[str, Any]:
     prompt = (
-        EXPLANATION_SYSTEM_PROMPT.strip()
-        + "\n\nINPUT:\n"
+        "INPUT:\n"
         + json.dumps(final_result, indent=2)
         + "\n\nExplain the decision."
     )
+    return {"prompt": prompt, "system": EXPLANATION_SYSTEM_PROMPT.strip(), "timeout": 60}
+
+def run_explanation_agent(final_result: Dict[str, Any]) -> str:
+    try:
+        data = get_client().generate(**_build_request(final_result), agent="explanation")
+        return data.get("response", "").strip()
+    except Exception:
+        return EXPLANATION_UNAVAILABLE
 
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False,
-    }
+# ---------------------------------------------------------------------
+# Streaming variants (user-facing banner)
+# ---------------------------------------------------------------------
 
+def stream_explanation(final_result: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield explanation text as the model produces it. Closing the
+    generator cancels the request. Fails safe like run_explanation_agent:
+    the fallback text if nothing arrived, a short notice if cut off.
+    """
+    started = False
     try:
-        resp = requests.post(OLLAMA_URL, json=payload, timeout=60)
-        resp.raise_for_status()
-        return resp.json().get("response", "").strip()
+        for chunk in get_client().stream(**_build_request(final_result), agent="explanation"):
+            piece = chunk.get("response", "")
+            if not started:
+                piece = piece.lstrip()
+            if piece:
+                started = True
+                yield piece
     except Exception:
-        return "Explanation unavailable."
+        yield "\n[Explanation interrupted.]" if started else EXPLANATION_UNAVAILABLE
+
+async def stream_explanation_async(final_result: Dict[str, Any]) -> AsyncIterator[str]:
+    """Async version of stream_explanation(); cancel the consuming task to stop it."""
+    started = False
+    try:
+        async for chunk in get_async_client().stream(**_build_request(final_result), agent="explanation"):
+            piece = chunk.get("response", "")
+            if not started:
+                piece = piece.lstrip()
+            if piece:
+                started = True
+                yield piece
+    except Exception:
+        yield "\n[Explanation interrupted.]" if started else EXPLANATION_UNAVAILABLE
+
+# ---------------------------------------------------------------------
+# Default entry point: templates first, LLM on request
+# ---------------------------------------------------------------------
+
+def _use_llm(llm: Optional[bool]) -> bool:
+    if llm is not None:
+        return llm
+    return LLM_SAMPLE_RATE > 0 and random.random() < LLM_SAMPLE_RATE
+
+def explain(final_result: Dict[str, Any], llm: Optional[bool] = None) -> str:
+    """
+    Template explanation by default. llm=True asks the explanation agent
+    instead; llm=None lets EXPLANATION_LLM_SAMPLE_RATE decide. Falls back
+    to the template when the LLM is unavailable.
+    """
+    if _use_llm(llm):
+        text = run_explanation_agent(final_result)
+        if text and text != EXPLANATION_UNAVAILABLE:
+            return text
+    return render_explanation(final_result)
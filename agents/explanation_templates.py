@@ -0,0 +1,109 @@
+# agents/explanation_templates.py
+
+from typing import Any, Dict, List
+
+# ---------------------------------------------------------------------
+# Indicator templates (one plain-English sentence per schema indicator)
+# ---------------------------------------------------------------------
+
+PHISHING_TEMPLATES = {
+    # --- text-based ---
+    "urgent_threat_or_deadline": "It pressures you with a deadline or a threat, a common way to rush people into mistakes.",
+    "credential_harvesting": "It asks you to enter or confirm a password or login details.",
+    "financial_gain_or_reward": "It promises money, a prize or a refund.",
+    "impersonation_of_trusted_entity": "It pretends to come from a well-known company or a trusted person.",
+    "unexpected_or_unusual_request": "It makes a request you would not normally expect from this sender.",
+    "language_style_anomaly": "The wording or tone is unusual for this kind of message.",
+    "mismatched_context_or_recipient": "It does not seem to be meant for you, or refers to things you may not recognise.",
+    "excessive_click_or_open_pressure": "It pushes hard for you to click a link or open an attachment.",
+
+    # --- url-based ---
+    "ip_based_url": "A link points to a raw IP address instead of a normal website name.",
+    "url_shortener": "A link uses a URL shortener, which hides where it really goes.",
+    "suspicious_tld": "A link uses a web address ending often seen in scams.",
+    "typosquatting_or_lookalike_domain": "A link uses a web address made to look like a well-known brand.",
+    "suspicious_subdomain_depth": "A link has an unusually long chain of sub-domains, a trick to look official.",
+    "credential_path_or_login_lure": "A link leads to what looks like a login or account-verification page.",
+    "unusual_query_params": "A link carries unusual tracking or redirect parameters.",
+    "mismatch_display_vs_link": "The link text shows one address but actually goes somewhere else.",
+
+    # --- metadata-based ---
+    "from_domain_mismatch": "The sender's address does not match the organisation it claims to be.",
+    "reply_to_mismatch": "Replies would go to a different address than the sender's.",
+    "display_name_impersonation": "The sender's display name imitates a known company or person.",
+    "spf_fail_or_softfail": "The sending server is not authorised to send mail for this domain (SPF check failed).",
+    "dkim_fail": "The message's digital signature did not verify (DKIM check failed).",
+    "dmarc_fail": "The sender's domain policy check failed (DMARC).",
+    "suspicious_sender_domain": "The sender's domain looks suspicious.",
+    "unusual_message_id_domain": "Technical headers show the message came from an unexpected system.",
+    "external_sender_claims_internal": "It comes from outside your organisation but claims to be internal.",
+}
+
+LEGITIMACY_TEMPLATES = {
+    "reasonable_business_context": "The message fits a normal business context.",
+    "informational_only_no_action_required": "It only shares information and does not ask you to act.",
+    "professional_tone_and_language": "The tone and language are professional and consistent.",
+    "no_sensitive_data_requested": "It does not ask for passwords, payment or personal details.",
+}
+
+VERDICT_LEADS = {
+    "phishing": "This email looks like a phishing attempt.",
+    "legitimate": "This email looks legitimate.",
+    "unsure": "We could not tell for certain whether this email is safe.",
+}
+
+ADVICE = {
+    "phishing": "Do not click its links, open attachments or reply. Report it or delete it.",
+    "legitimate": "No action is needed, but stay careful with any unexpected requests.",
+    "unsure": "Treat it with caution: check with the sender through a channel you already trust before acting.",
+}
+
+MAX_POINTS = 5
+MAX_QUOTE_CHARS = 80
+
+
+# ---------------------------------------------------------------------
+# Renderer
+# ---------------------------------------------------------------------
+
+def _quote(evidence: List[Dict[str, Any]], indicator: str) -> str:
+    for item in evidence:
+        if isinstance(item, dict) and item.get("indicator") == indicator:
+            quote = " ".join(str(item.get("text_quote") or "").split())
+            if quote:
+                if len(quote) > MAX_QUOTE_CHARS:
+                    quote = quote[:MAX_QUOTE_CHARS - 3] + "..."
+                return f' (for example: "{quote}")'
+    return ""
+
+def render_explanation(final_result: Dict[str, Any], max_points: int = MAX_POINTS) -> str:
+    """
+    Deterministic plain-text explanation of a combine_agents() result.
+    Uses only the verdict, indicators and evidence it is given.
+    """
+    verdict = final_result.get("verdict", "unsure")
+    if verdict not in VERDICT_LEADS:
+        verdict = "unsure"
+    evidence = final_result.get("evidence") or []
+
+    lines = [VERDICT_LEADS[verdict]]
+    if final_result.get("decided_by") == "prefilter":
+        lines[0] += " Our screening model was confident enough to decide on its own."
+
+    if verdict == "legitimate":
+        reasons = [(i, LEGITIMACY_TEMPLATES.get(i)) for i in final_result.get("legitimacy_indicators", [])]
+    else:
+        reasons = [(i, PHISHING_TEMPLATES.get(i)) for i in final_result.get("phishing_indicators", [])]
+    reasons = [(i, text) for i, text in reasons if text]
+
+    if reasons:
+        lines.append("")
+        lines.append("Why:" if verdict != "unsure" else "Some warning signs:")
+        for indicator, text in reasons[:max_points]:
+            lines.append(f"- {text[:-1]}{_quote(evidence, indicator)}.")
+        if len(reasons) > max_points:
+            lines.append(f"- ...and {len(reasons) - max_points} more reason(s).")
+
+    lines.append("")
+    lines.append(ADVICE[verdict])
+    return "\n".join(lines)
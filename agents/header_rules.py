@@ -0,0 +1,196 @@
+# agents/header_rules.py
+
+import re
+from email.parser import HeaderParser
+from email.utils import parseaddr
+from typing import Any, Dict, List, Tuple
+
+from orchestrator import HARD_METADATA_INDICATORS
+
+from .url_cache import registered_domain
+from .validators import validate_agent_output
+
+# Mailing lists and ticketing systems routinely set Reply-To, so a
+# mismatch alone only supports a verdict; it is conclusive next to a
+# failed SPF/DKIM/DMARC check.
+SUPPORTING_ONLY = {"reply_to_mismatch"}
+
+_AUTH_RESULT = re.compile(r"\b(spf|dkim|dmarc)\s*=\s*([a-z]+)", re.I)
+_RECEIVED_SPF = re.compile(r"^\s*([a-z]+)", re.I)
+_EMBEDDED_DOMAIN = re.compile(r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+
+_parser = HeaderParser()
+
+
+# ---------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------
+
+def _domain_of(address_header: str) -> str:
+    _, addr = parseaddr(address_header or "")
+    if "@" not in addr:
+        return ""
+    return registered_domain(addr.rsplit("@", 1)[1].strip(" >").lower())
+
+def _message_id_domain(message_id: str) -> str:
+    m = re.search(r"@([^>\s]+)", message_id or "")
+    return registered_domain(m.group(1).lower()) if m else ""
+
+def _auth_results(headers) -> Dict[str, Tuple[str, str]]:
+    """Map spf/dkim/dmarc to (result, quoted header line). First occurrence wins."""
+    out: Dict[str, Tuple[str, str]] = {}
+    for value in headers.get_all("Authentication-Results") or []:
+        for mech, result in _AUTH_RESULT.findall(value):
+            out.setdefault(mech.lower(), (result.lower(), f"Authentication-Results: {value.strip()}"))
+    for value in headers.get_all("Received-SPF") or []:
+        m = _RECEIVED_SPF.match(value)
+        if m:
+            out.setdefault("spf", (m.group(1).lower(), f"Received-SPF: {value.strip()}"))
+    return out
+
+def sender_fingerprint(headers_text: str) -> Tuple[str, ...]:
+    """
+    The header facts analyze_headers() decides on: From, Reply-To and
+    Return-Path domains and the SPF/DKIM/DMARC results. Emails that
+    differ here can get a different metadata verdict. Empty without headers.
+    """
+    if not headers_text or not headers_text.strip():
+        return ()
+    headers = _parser.parsestr(headers_text.strip() + "\n", headersonly=True)
+    auth = _auth_results(headers)
+    return (
+        _domain_of(headers.get("From", "")),
+        _domain_of(headers.get("Reply-To", "")),
+        _domain_of(headers.get("Return-Path", "")),
+        *(auth.get(mech, ("", ""))[0] for mech in ("spf", "dkim", "dmarc")),
+    )
+
+def _evidence(indicator: str, quote: str, explanation: str) -> Dict[str, str]:
+    return {"indicator": indicator, "text_quote": quote, "explanation": explanation}
+
+
+# ---------------------------------------------------------------------
+# Analyzer
+# ---------------------------------------------------------------------
+
+def analyze_headers(headers_text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Rule-based metadata analysis producing the metadata agent's schema.
+
+    Returns (result, conclusive). When conclusive is False the rules found
+    nothing decisive and the LLM should be consulted.
+    """
+    if not headers_text or not headers_text.strip():
+        out = validate_agent_output({}, agent_name="metadata")
+        out["overall_rationale"] = "No metadata provided."
+        return out, True
+
+    headers = _parser.parsestr(headers_text.strip() + "\n", headersonly=True)
+
+    p_inds: List[str] = []
+    evidence: List[Dict[str, str]] = []
+
+    def flag(indicator: str, quote: str, explanation: str) -> None:
+        if indicator not in p_inds:
+            p_inds.append(indicator)
+        evidence.append(_evidence(indicator, quote, explanation))
+
+    # --- SPF / DKIM / DMARC ---
+    auth = _auth_results(headers)
+    spf = auth.get("spf", ("", ""))
+    dkim = auth.get("dkim", ("", ""))
+    dmarc = auth.get("dmarc", ("", ""))
+
+    if spf[0] in ("fail", "softfail"):
+        flag("spf_fail_or_softfail", spf[1], f"SPF check returned {spf[0]}.")
+    if dkim[0] == "fail":
+        flag("dkim_fail", dkim[1], "DKIM signature did not verify.")
+    if dmarc[0] == "fail":
+        flag("dmarc_fail", dmarc[1], "DMARC policy evaluation failed.")
+
+    # --- Address consistency ---
+    from_value = headers.get("From", "")
+    from_domain = _domain_of(from_value)
+
+    reply_to = headers.get("Reply-To", "")
+    reply_domain = _domain_of(reply_to)
+    if from_domain and reply_domain and reply_domain != from_domain:
+        flag(
+            "reply_to_mismatch",
+            f"Reply-To: {reply_to.strip()}",
+            f"Replies go to {reply_domain}, not the sender domain {from_domain}.",
+        )
+
+    return_path = headers.get("Return-Path", "")
+    return_domain = _domain_of(return_path)
+    if from_domain and return_domain and return_domain != from_domain:
+        flag(
+            "from_domain_mismatch",
+            f"Return-Path: {return_path.strip()}",
+            f"Bounces go to {return_domain}, not the sender domain {from_domain}.",
+        )
+
+    display_name, _ = parseaddr(from_value)
+    for shown in _EMBEDDED_DOMAIN.findall(display_name or ""):
+        shown_domain = registered_domain(shown.lower())
+        if from_domain and shown_domain != from_domain:
+            flag(
+                "display_name_impersonation",
+                f"From: {from_value.strip()}",
+                f"Display name shows {shown_domain} but the address is at {from_domain}.",
+            )
+            break
+
+    msgid_domain = _message_id_domain(headers.get("Message-ID", ""))
+    if from_domain and msgid_domain and msgid_domain != from_domain:
+        flag(
+            "unusual_message_id_domain",
+            f"Message-ID: {headers.get('Message-ID', '').strip()}",
+            f"Message-ID was generated by {msgid_domain}.",
+        )
+
+    # --- Verdict ---
+    auth_failures = [i for i in p_inds if i in HARD_METADATA_INDICATORS - SUPPORTING_ONLY]
+    hard = [i for i in p_inds if i in HARD_METADATA_INDICATORS] if auth_failures else []
+    all_pass = spf[0] == "pass" and dkim[0] == "pass" and dmarc[0] == "pass"
+
+    if hard:
+        verdict = "phishing"
+        confidence = 0.9 if len(hard) >= 2 else 0.8
+        rationale = f"Header checks failed: {', '.join(hard)}."
+        conclusive = True
+    elif all_pass and not p_inds:
+        verdict = "legitimate"
+        confidence = 0.8
+        rationale = "SPF, DKIM and DMARC pass and sender addresses are consistent."
+        conclusive = True
+    else:
+        verdict = "unsure"
+        confidence = 0.0
+        rationale = "Header rules were inconclusive."
+        conclusive = False
+
+    out = validate_agent_output({
+        "agent": "metadata",
+        "version": "1.0",
+        "view": "metadata_only",
+        "task": "email_phishing_detection",
+        "verdict": verdict,
+        "confidence": confidence,
+        "phishing_indicators": p_inds,
+        "legitimacy_indicators": [],
+        "evidence": evidence,
+        "overall_rationale": rationale,
+        "safety_notes": "",
+    }, agent_name="metadata")
+
+    return out, conclusive
+
+
+def merge_rule_findings(rule_result: Dict[str, Any], llm_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the LLM verdict but make sure deterministic findings are not lost."""
+    for ind in rule_result.get("phishing_indicators", []):
+        if ind not in llm_result["phishing_indicators"]:
+            llm_result["phishing_indicators"].append(ind)
+    llm_result["evidence"] = rule_result.get("evidence", []) + llm_result.get("evidence", [])
+    return llm_result
@@ -0,0 +1,230 @@
+# agents/input_prep.py
+
+import html
+import os
+import re
+from typing import Iterable, List, Optional
+
+from .tracing import CHARS_PER_TOKEN, traced
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+# Body size sent to the LLM, in (estimated) tokens. Caps prompt-eval cost
+# per email no matter how long the original is.
+INPUT_TOKEN_BUDGET = int(os.environ.get("INPUT_TOKEN_BUDGET", "500"))
+
+MAX_SUBJECT_CHARS = 300
+MAX_PROMPT_URLS = 20
+MAX_URL_CHARS = 120
+
+# Trailing lines searched for footer boilerplate.
+FOOTER_LINES = 15
+
+# ---------------------------------------------------------------------
+# Patterns
+# ---------------------------------------------------------------------
+
+_HTML_HINT = re.compile(r"<(?:html|body|div|p|br|table|span|a|td|font|img)\b", re.I)
+_HTML_DROP = re.compile(r"<(script|style|head)\b.*?</\1\s*>", re.I | re.S)
+_HTML_BREAK = re.compile(r"<(?:br|/p|/div|/tr|/li|/h\d)\b[^>]*>", re.I)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+
+# Lines that start the quoted part of a reply.
+_REPLY_MARKERS = re.compile(
+    r"^(?:-{2,}\s*Original Message\s*-{2,}"
+    r"|On .{0,200}\bwrote:"
+    r"|_{10,}"
+    r"|From: .+\n(?:Sent|Date): .+)",
+    re.I | re.M,
+)
+_SIGNATURE = re.compile(r"^(?:--\s?|Sent from my \w+.*|Get Outlook for \w+.*)$", re.I | re.M)
+
+_BOILERPLATE = re.compile(
+    r"unsubscribe|manage (?:your )?(?:email )?preferences|view (?:this email|it) in (?:your|a) browser"
+    r"|all rights reserved|privacy policy|this (?:e-?mail|message)(?: and any attachments)? (?:is|are|may be) "
+    r"(?:confidential|intended)|if you (?:are not|received this)",
+    re.I,
+)
+
+_URL = re.compile(r"https?://[^\s)>\]\"']+")
+
+# Phrases that make a sentence worth keeping when the body must be cut.
+# Matched against lowercased text (much faster than re.I on this alternation).
+SUSPICIOUS_CUES = re.compile(
+    r"verif|password|passcode|log ?in|sign ?in|account|suspend|locked|unusual activity|secur"
+    r"|urgent|immediately|within \d+ (?:hours?|days?)|expire|deadline|final notice"
+    r"|click|link|open the attachment|confirm|update your|invoice|payment|wire|bank|refund"
+    r"|gift ?card|prize|winner|lottery|bitcoin|crypto|ssn|social security|credit card"
+)
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# ---------------------------------------------------------------------
+# Cleaning stages
+# ---------------------------------------------------------------------
+
+def strip_html(text: str) -> str:
+    """Plain text from HTML residue; plain-text bodies pass through unchanged."""
+    if not _HTML_HINT.search(text):
+        return text
+    text = _HTML_COMMENT.sub(" ", text)
+    text = _HTML_DROP.sub(" ", text)
+    text = _HTML_BREAK.sub("\n", text)
+    text = _HTML_TAG.sub(" ", text)
+    return html.unescape(text)
+
+def strip_quoted(text: str) -> str:
+    """Drop the quoted thread below a reply, and '>'-quoted lines. Never empties the body."""
+    m = _REPLY_MARKERS.search(text)
+    head = text[:m.start()] if m else text
+    head = "\n".join(line for line in head.split("\n") if not line.lstrip().startswith(">"))
+    return head if head.strip() else text
+
+def strip_signature(text: str) -> str:
+    """Cut a trailing signature block ('-- ' delimiter or mobile footers) near the end."""
+    lines = text.split("\n")
+    tail_start = max(0, len(lines) - 15)
+    for i in range(len(lines) - 1, tail_start - 1, -1):
+        if _SIGNATURE.match(lines[i].strip()):
+            head = "\n".join(lines[:i])
+            return head if head.strip() else text
+    return text
+
+def _is_footer_line(key: str) -> bool:
+    """Boilerplate that carries nothing for the verdict: no link and no cue."""
+    return (
+        len(key) < 300
+        and bool(_BOILERPLATE.search(key))
+        and not _URL.search(key)
+        and not SUSPICIOUS_CUES.search(key)
+    )
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drop lines repeated verbatim, and footer/legal boilerplate in the last
+    FOOTER_LINES lines. Lines with a URL or a suspicious cue are kept:
+    "If you are not the one who signed in, verify here: ..." is the lure.
+    """
+    lines = text.split("\n")
+    footer_start = max(0, len(lines) - FOOTER_LINES)
+    seen = set()
+    kept = []
+    for i, line in enumerate(lines):
+        key = " ".join(line.split()).lower()
+        if key:
+            if key in seen or (i >= footer_start and _is_footer_line(key)):
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+def dedupe_urls(urls: Iterable[str], limit: int = MAX_PROMPT_URLS) -> List[str]:
+    """Order-preserving unique URLs (trailing punctuation ignored), at most limit."""
+    seen = set()
+    out = []
+    for url in urls:
+        url = url.rstrip(".,;:!?\"'")
+        if url and url not in seen:
+            seen.add(url)
+            out.append(url)
+            if len(out) >= limit:
+                break
+    return out
+
+def collapse_urls(text: str) -> str:
+    """Shorten long URLs and replace repeats, which otherwise eat the token budget."""
+    seen = set()
+
+    def _sub(m):
+        url = m.group(0).rstrip(".,;:!?")
+        if url in seen:
+            return "[link]"
+        seen.add(url)
+        return url if len(url) <= MAX_URL_CHARS else url[:MAX_URL_CHARS] + "..."
+
+    return _URL.sub(_sub, text)
+
+def _normalize_space(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t\u00a0]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+# ---------------------------------------------------------------------
+# Budget fitting
+# ---------------------------------------------------------------------
+
+def fit_to_budget(text: str, max_chars: int) -> str:
+    """
+    Cut text to about max_chars. Keeps the opening sentences plus every
+    sentence with a suspicious cue that fits, in original order, with
+    '[...]' marking gaps. Repeated sentences are kept once.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    chosen = set()
+    chosen_text = set()
+    used = 0
+
+    def take(i):
+        nonlocal used
+        cost = len(sentences[i]) + 1
+        if i in chosen or used + cost > max_chars:
+            return False
+        if sentences[i] in chosen_text:
+            return True  # repeated sentence: costs nothing, adds nothing
+        chosen.add(i)
+        chosen_text.add(sentences[i])
+        used += cost
+        return True
+
+    # Opening context first (up to a third of the budget), then cues, then fill.
+    for i in range(len(sentences)):
+        if used >= max_chars // 3 or not take(i):
+            break
+    for i, s in enumerate(sentences):
+        if SUSPICIOUS_CUES.search(s.lower()):
+            take(i)
+    for i in range(len(sentences)):
+        take(i)
+
+    if not chosen:
+        return text[:max_chars] + " [...]"
+
+    parts = []
+    prev = -1
+    for i in sorted(chosen):
+        if i != prev + 1:
+            parts.append("[...]")
+        parts.append(sentences[i])
+        prev = i
+    if prev != len(sentences) - 1:
+        parts.append("[...]")
+    return " ".join(parts)
+
+# ---------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------
+
+@traced("input_prep")
+def prepare_body(body: str, token_budget: Optional[int] = None) -> str:
+    """Condensed body for LLM prompts: clean, then fit to the token budget."""
+    budget = INPUT_TOKEN_BUDGET if token_budget is None else token_budget
+    text = body or ""
+    text = strip_html(text)
+    text = _normalize_space(text)
+    text = strip_quoted(text)
+    text = strip_signature(text)
+    text = strip_boilerplate(text)
+    text = collapse_urls(text)
+    text = _normalize_space(text)
+    return fit_to_budget(text, budget * CHARS_PER_TOKEN)
+
+def prepare_subject(subject: str) -> str:
+    subject = " ".join((subject or "").split())
+    return subject[:MAX_SUBJECT_CHARS]
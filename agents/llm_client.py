@@ -0,0 +1,765 @@
+# agents/llm_client.py
+
+import json
+import os
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, Optional
+
+from .backends import BackendPool, parse_urls
+from .tracing import get_tracer
+
+# requests, httpx and asyncio are imported where they are first needed:
+# a one-shot CLI process should not pay for the async stack it never uses.
+if TYPE_CHECKING:
+    import asyncio
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+# Several Ollama servers sharing the load, comma separated. Falls back to
+# OLLAMA_BASE_URL when unset.
+OLLAMA_BASE_URLS = parse_urls(os.environ.get("OLLAMA_BASE_URLS", "")) or [OLLAMA_BASE_URL.rstrip("/")]
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
+
+CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "180"))
+
+MAX_RETRIES = int(os.environ.get("OLLAMA_MAX_RETRIES", "2"))
+BACKOFF_SECONDS = float(os.environ.get("OLLAMA_BACKOFF", "0.5"))
+POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", "16"))
+
+# "requests" (pooled keep-alive connections) or "stdlib" (http.client, a
+# connection per request): the latter starts ~60ms faster, which matters
+# for one-shot processes such as analyze.py.
+HTTP_TRANSPORT = os.environ.get("OLLAMA_HTTP_TRANSPORT", "requests")
+
+# How long Ollama keeps the model (and its prompt cache) loaded after a
+# request: a duration like "30m", or -1 to keep it loaded indefinitely.
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Status codes worth retrying: the server is overloaded or restarting.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# ---------------------------------------------------------------------
+# Per-call counters
+# ---------------------------------------------------------------------
+
+class LLMStats:
+    """Thread-safe counters shared by every call made through a client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.retries = 0
+            self.latency_s = 0.0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    def record(
+        self,
+        latency_s: float,
+        bytes_sent: int,
+        bytes_received: int,
+        retries: int,
+        ok: bool,
+    ) -> None:
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            self.latency_s += latency_s
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "latency_s": round(self.latency_s, 3),
+                "avg_latency_s": round(self.latency_s / self.calls, 3) if self.calls else 0.0,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+            }
+
+
+# ---------------------------------------------------------------------
+# Payload
+# ---------------------------------------------------------------------
+
+def build_payload(
+    model: str,
+    prompt: str,
+    system: Optional[str] = None,
+    format: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    stream: bool = False,
+    keep_alive: Optional[str] = None,
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+    }
+    if system:
+        payload["system"] = system
+    if keep_alive:
+        payload["keep_alive"] = _keep_alive_value(keep_alive)
+    if format:
+        payload["format"] = format
+    if options:
+        payload["options"] = options
+    return payload
+
+def _keep_alive_value(keep_alive: str):
+    """Ollama takes durations as strings ("30m") but bare seconds as numbers."""
+    try:
+        return int(keep_alive)
+    except ValueError:
+        return keep_alive
+
+
+# ---------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------
+
+class OllamaClient:
+    """
+    Keep-alive client for Ollama /api/generate.
+
+    One requests.Session with a sized connection pool is reused across
+    calls, so agents no longer pay a TCP handshake per request. Each
+    request (and each retry) goes to the least busy server of the
+    BackendPool; base_url may list several servers, comma separated.
+    transport="stdlib" skips requests for fast-starting one-shot use.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        keep_alive: Optional[str] = None,
+        pool: Optional[BackendPool] = None,
+        transport: Optional[str] = None,
+    ):
+        self.pool = _make_pool(base_url, pool)
+        self.base_url = self.pool.urls[0]
+        self.model = model or OLLAMA_MODEL
+        self.connect_timeout = CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        self.read_timeout = READ_TIMEOUT if read_timeout is None else read_timeout
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_seconds = BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.pool_size = POOL_SIZE if pool_size is None else pool_size
+        self.keep_alive = KEEP_ALIVE if keep_alive is None else keep_alive
+
+        self.transport = transport or HTTP_TRANSPORT
+
+        self.stats = LLMStats()
+
+        if self.transport == "stdlib":
+            self.session = _StdlibSession()
+            self._connection_errors = (ConnectionError,)
+            return
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._connection_errors = (requests.ConnectionError,)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, retries: int) -> float:
+        return _backoff_delay(self.pool, self.backoff_seconds, retries)
+
+    def warm_up(self, system_prompts=()) -> Dict[str, Any]:
+        """
+        Load the model and prime Ollama's prompt cache with each system
+        prompt (a one-token generation each), so the first real requests
+        skip both the model load and the system-prompt evaluation.
+        Best effort: returns what happened instead of raising. Every
+        server of the pool is warmed, in parallel.
+        """
+        if len(self.pool.backends) > 1:
+            return self._warm_up_pool(system_prompts)
+
+        report: Dict[str, Any] = {"loaded": False, "primed": 0}
+        start = time.perf_counter()
+        try:
+            # An empty prompt only loads the model.
+            self.generate(prompt="", timeout=self.read_timeout, agent="warm_up")
+            report["loaded"] = True
+            for system in system_prompts:
+                self.generate(prompt="ok", system=system, options={"num_predict": 1}, agent="warm_up")
+                report["primed"] += 1
+        except Exception as e:
+            report["error"] = str(e)
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        return report
+
+    def _warm_up_pool(self, system_prompts) -> Dict[str, Any]:
+        from concurrent.futures import ThreadPoolExecutor
+
+        def _one(url: str) -> Dict[str, Any]:
+            client = OllamaClient(
+                base_url=url,
+                model=self.model,
+                connect_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+                max_retries=0,
+                pool_size=1,
+                keep_alive=self.keep_alive,
+                transport=self.transport,
+            )
+            try:
+                return client.warm_up(system_prompts)
+            finally:
+                client.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self.pool.backends)) as ex:
+            reports = dict(zip(self.pool.urls, ex.map(_one, self.pool.urls)))
+        for url, report in reports.items():
+            if not report["loaded"]:
+                self.pool.trip(url)
+        return {
+            "loaded": all(r["loaded"] for r in reports.values()),
+            "primed": min(r["primed"] for r in reports.values()),
+            "seconds": round(time.perf_counter() - start, 3),
+            "backends": reports,
+        }
+
+    def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        agent: str = "",
+    ) -> Dict[str, Any]:
+        """
+        POST one non-streaming request to /api/generate and return the
+        decoded JSON response. Raises after the last retry fails.
+        agent only labels the call in traces.
+        """
+        payload = build_payload(self.model, prompt, system, format, options, keep_alive=self.keep_alive)
+        body = json.dumps(payload).encode("utf-8")
+        read_timeout = self.read_timeout if timeout is None else timeout
+
+        tracer = get_tracer()
+        start = time.perf_counter()
+        retries = 0
+        received = 0
+
+        try:
+            while True:
+                backend = self.pool.acquire()
+                attempt = time.perf_counter()
+                healthy = False
+                try:
+                    resp = self.session.post(
+                        f"{backend.url}/api/generate",
+                        data=body,
+                        headers={"Content-Type": "application/json"},
+                        timeout=(self.connect_timeout, read_timeout),
+                    )
+                    received += len(resp.content)
+                    healthy = resp.status_code not in RETRY_STATUS
+                    if resp.status_code in RETRY_STATUS and retries < self.max_retries:
+                        raise _RetryableStatus(resp.status_code)
+                    resp.raise_for_status()
+                    data = resp.json()
+                    break
+                # A read timeout means the model is slow, not that the
+                # server is gone; retrying it would only multiply latency.
+                except (*self._connection_errors, _RetryableStatus):
+                    if retries >= self.max_retries:
+                        raise
+                    time.sleep(self._backoff(retries))
+                    retries += 1
+                finally:
+                    self.pool.release(backend, healthy, time.perf_counter() - attempt)
+        except Exception:
+            latency = time.perf_counter() - start
+            self.stats.record(latency, len(body), received, retries, ok=False)
+            tracer.record("llm.http", latency, agent, ok=False, retries=retries)
+            raise
+
+        latency = time.perf_counter() - start
+        self.stats.record(latency, len(body), received, retries, ok=True)
+        tracer.record("llm.http", latency, agent, ok=True, retries=retries)
+        tracer.record_ollama(agent, data, prompt_chars=len(prompt) + len(system or ""))
+        return data
+
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        agent: str = "",
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        POST a streaming request and yield each NDJSON chunk as it arrives.
+
+        Only connecting is retried; once chunks flow a failure is raised.
+        timeout bounds the wait between chunks, not the whole generation.
+        Closing the generator closes the connection, which also stops
+        generation on the server.
+        """
+        payload = build_payload(self.model, prompt, system, format, options, stream=True, keep_alive=self.keep_alive)
+        body = json.dumps(payload).encode("utf-8")
+        read_timeout = self.read_timeout if timeout is None else timeout
+
+        tracer = get_tracer()
+        start = time.perf_counter()
+        retries = 0
+        received = 0
+        ok = cancelled = False
+        first_token = True
+        resp = None
+        backend = None
+
+        try:
+            while True:
+                backend = self.pool.acquire()
+                attempt = time.perf_counter()
+                try:
+                    resp = self.session.post(
+                        f"{backend.url}/api/generate",
+                        data=body,
+                        headers={"Content-Type": "application/json"},
+                        timeout=(self.connect_timeout, read_timeout),
+                        stream=True,
+                    )
+                    if resp.status_code in RETRY_STATUS and retries < self.max_retries:
+                        resp.close()
+                        raise _RetryableStatus(resp.status_code)
+                    resp.raise_for_status()
+                    break
+                except (*self._connection_errors, _RetryableStatus):
+                    self.pool.release(backend, False, time.perf_counter() - attempt)
+                    backend = None
+                    if retries >= self.max_retries:
+                        raise
+                    time.sleep(self._backoff(retries))
+                    retries += 1
+
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                received += len(line)
+                chunk = _decode_chunk(line)
+                if first_token and chunk.get("response"):
+                    tracer.record("llm.first_token", time.perf_counter() - start, agent)
+                    first_token = False
+                if chunk.get("done"):
+                    tracer.record_ollama(agent, chunk, prompt_chars=len(prompt) + len(system or ""))
+                yield chunk
+            ok = True
+        except GeneratorExit:
+            ok = cancelled = True
+            raise
+        finally:
+            if resp is not None:
+                resp.close()
+            if backend is not None:
+                self.pool.release(backend, ok, time.perf_counter() - attempt)
+            latency = time.perf_counter() - start
+            self.stats.record(latency, len(body), received, retries, ok=ok)
+            tracer.record("llm.stream", latency, agent, ok=ok, retries=retries, cancelled=cancelled)
+
+
+class AsyncOllamaClient:
+    """
+    asyncio counterpart of OllamaClient built on httpx.AsyncClient.
+
+    An httpx client is bound to the event loop it was created on, so use
+    get_async_client() from inside the running loop rather than sharing
+    one instance across asyncio.run() calls.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        stats: Optional[LLMStats] = None,
+        keep_alive: Optional[str] = None,
+        pool: Optional[BackendPool] = None,
+    ):
+        import httpx
+
+        self.pool = _make_pool(base_url, pool)
+        self.base_url = self.pool.urls[0]
+        self.model = model or OLLAMA_MODEL
+        self.connect_timeout = CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        self.read_timeout = READ_TIMEOUT if read_timeout is None else read_timeout
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_seconds = BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.pool_size = POOL_SIZE if pool_size is None else pool_size
+        self.keep_alive = KEEP_ALIVE if keep_alive is None else keep_alive
+
+        self.stats = stats if stats is not None else LLMStats()
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size * len(self.pool.backends),
+                max_keepalive_connections=self.pool_size * len(self.pool.backends),
+            ),
+        )
+
+    @classmethod
+    def like(cls, client: OllamaClient, **overrides) -> "AsyncOllamaClient":
+        """Async client with the same servers, model, timeouts and counters as client."""
+        settings = {
+            "base_url": client.base_url,
+            "model": client.model,
+            "connect_timeout": client.connect_timeout,
+            "read_timeout": client.read_timeout,
+            "max_retries": client.max_retries,
+            "backoff_seconds": client.backoff_seconds,
+            "pool_size": client.pool_size,
+            "stats": client.stats,
+            "keep_alive": client.keep_alive,
+            "pool": client.pool,
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _backoff(self, retries: int) -> float:
+        return _backoff_delay(self.pool, self.backoff_seconds, retries)
+
+    async def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        agent: str = "",
+    ) -> Dict[str, Any]:
+        """Async version of OllamaClient.generate()."""
+        import asyncio
+
+        import httpx
+
+        payload = build_payload(self.model, prompt, system, format, options, keep_alive=self.keep_alive)
+        body = json.dumps(payload).encode("utf-8")
+        read_timeout = self.read_timeout if timeout is None else timeout
+
+        tracer = get_tracer()
+        start = time.perf_counter()
+        retries = 0
+        received = 0
+
+        try:
+            while True:
+                backend = self.pool.acquire()
+                attempt = time.perf_counter()
+                healthy = False
+                try:
+                    resp = await self.client.post(
+                        f"{backend.url}/api/generate",
+                        content=body,
+                        headers={"Content-Type": "application/json"},
+                        timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                    )
+                    received += len(resp.content)
+                    healthy = resp.status_code not in RETRY_STATUS
+                    if resp.status_code in RETRY_STATUS and retries < self.max_retries:
+                        raise _RetryableStatus(resp.status_code)
+                    resp.raise_for_status()
+                    data = resp.json()
+                    break
+                except (httpx.ConnectError, httpx.ConnectTimeout, _RetryableStatus):
+                    if retries >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self._backoff(retries))
+                    retries += 1
+                finally:
+                    self.pool.release(backend, healthy, time.perf_counter() - attempt)
+        except Exception:
+            latency = time.perf_counter() - start
+            self.stats.record(latency, len(body), received, retries, ok=False)
+            tracer.record("llm.http", latency, agent, ok=False, retries=retries)
+            raise
+
+        latency = time.perf_counter() - start
+        self.stats.record(latency, len(body), received, retries, ok=True)
+        tracer.record("llm.http", latency, agent, ok=True, retries=retries)
+        tracer.record_ollama(agent, data, prompt_chars=len(prompt) + len(system or ""))
+        return data
+
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        agent: str = "",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of OllamaClient.stream(). Cancelling the consuming
+        task (or calling aclose()) closes the connection.
+        """
+        import asyncio
+
+        import httpx
+
+        payload = build_payload(self.model, prompt, system, format, options, stream=True, keep_alive=self.keep_alive)
+        body = json.dumps(payload).encode("utf-8")
+        read_timeout = self.read_timeout if timeout is None else timeout
+
+        tracer = get_tracer()
+        start = time.perf_counter()
+        retries = 0
+        received = 0
+        ok = cancelled = False
+        first_token = True
+        resp = None
+        backend = None
+
+        try:
+            while True:
+                backend = self.pool.acquire()
+                attempt = time.perf_counter()
+                try:
+                    request = self.client.build_request(
+                        "POST",
+                        f"{backend.url}/api/generate",
+                        content=body,
+                        headers={"Content-Type": "application/json"},
+                        timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                    )
+                    resp = await self.client.send(request, stream=True)
+                    if resp.status_code in RETRY_STATUS and retries < self.max_retries:
+                        await resp.aclose()
+                        raise _RetryableStatus(resp.status_code)
+                    if resp.is_error:
+                        await resp.aread()
+                        resp.raise_for_status()
+                    break
+                except (httpx.ConnectError, httpx.ConnectTimeout, _RetryableStatus):
+                    self.pool.release(backend, False, time.perf_counter() - attempt)
+                    backend = None
+                    if retries >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self._backoff(retries))
+                    retries += 1
+
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                received += len(line)
+                chunk = _decode_chunk(line)
+                if first_token and chunk.get("response"):
+                    tracer.record("llm.first_token", time.perf_counter() - start, agent)
+                    first_token = False
+                if chunk.get("done"):
+                    tracer.record_ollama(agent, chunk, prompt_chars=len(prompt) + len(system or ""))
+                yield chunk
+            ok = True
+        except (GeneratorExit, asyncio.CancelledError):
+            ok = cancelled = True
+            raise
+        finally:
+            if resp is not None:
+                await resp.aclose()
+            if backend is not None:
+                self.pool.release(backend, ok, time.perf_counter() - attempt)
+            latency = time.perf_counter() - start
+            self.stats.record(latency, len(body), received, retries, ok=ok)
+            tracer.record("llm.stream", latency, agent, ok=ok, retries=retries, cancelled=cancelled)
+
+
+def _make_pool(base_url: Optional[str], pool: Optional[BackendPool]) -> BackendPool:
+    if pool is not None:
+        return pool
+    return BackendPool(parse_urls(base_url) if base_url else OLLAMA_BASE_URLS)
+
+
+def _backoff_delay(pool: BackendPool, backoff_seconds: float, retries: int) -> float:
+    """With other servers to fail over to, the first retry goes out immediately."""
+    if retries == 0 and len(pool.backends) > 1:
+        return 0.0
+    return backoff_seconds * (2 ** retries)
+
+
+def _decode_chunk(line) -> Dict[str, Any]:
+    """One NDJSON line of a streaming response; Ollama reports mid-stream failures in-band."""
+    chunk = json.loads(line)
+    if chunk.get("error"):
+        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+    return chunk
+
+
+class _StdlibResponse:
+    """The parts of requests.Response that OllamaClient uses."""
+
+    def __init__(self, conn, resp, stream: bool):
+        self._conn = conn
+        self._resp = resp
+        self.status_code = resp.status
+        self._content = None
+        if not stream:
+            self._content = resp.read()
+            self.close()
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = self._resp.read()
+        return self._content
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code)
+
+    def iter_lines(self) -> Iterator[bytes]:
+        while True:
+            line = self._resp.readline()
+            if not line:
+                return
+            yield line.rstrip(b"\r\n")
+
+    def close(self) -> None:
+        self._resp.close()
+        self._conn.close()
+
+
+class _StdlibSession:
+    """
+    Just enough of requests.Session on top of http.client: one connection
+    per request, no pooling. Connection failures surface as the builtin
+    ConnectionError, read timeouts as TimeoutError (not retried).
+    """
+
+    def post(self, url, data=None, headers=None, timeout=None, stream=False) -> _StdlibResponse:
+        import http.client
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+
+        conn = conn_cls(parts.hostname, parts.port, timeout=connect_timeout)
+        try:
+            conn.connect()
+        except OSError as e:
+            conn.close()
+            raise ConnectionError(f"cannot connect to {parts.netloc}: {e}") from e
+        conn.sock.settimeout(read_timeout)
+
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        try:
+            conn.request("POST", path, body=data, headers=headers or {})
+            resp = conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+        return _StdlibResponse(conn, resp, stream)
+
+    def close(self) -> None:
+        pass
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+# ---------------------------------------------------------------------
+# Shared instance
+# ---------------------------------------------------------------------
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOllamaClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client() -> OllamaClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
+
+
+def set_client(client: Optional[OllamaClient]) -> None:
+    """Replace the shared client (e.g. to point agents at another server)."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def get_async_client() -> AsyncOllamaClient:
+    """
+    Return the async client for the running event loop. It mirrors the
+    settings of get_client() and shares its counters and backend pool, so
+    both paths route over the same servers and report together.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOllamaClient.like(get_client())
+        _async_clients[loop] = client
+    return client
+
+
+def set_async_client(client: AsyncOllamaClient) -> None:
+    """Use client for the running event loop (e.g. with a larger pool)."""
+    import asyncio
+
+    _async_clients[asyncio.get_running_loop()] = client
@@ -1,11 +1,10 @@
 import json
-import requests
 from typing import Any, Dict
 
-from .validators import validate_agent_output
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+from .header_rules import analyze_headers, merge_rule_findings
+from .llm_client import get_async_client, get_client
+from .tracing import traced
+from .validators import validate_agent_output_checked
 
 METADATA_AGENT_SYSTEM_PROMPT = """
 You are the METADATA AGENT in a multi-agent phishing email detection system.
@@ -68,49 +67,62 @@ JSON RULES
 - evidence must be a list of objects (indicator, text_quote, explanation)
 """
 
-def run_metadata_agent(headers_text: str) -> Dict[str, Any]:
-    prompt = (
-        METADATA_AGENT_SYSTEM_PROMPT.strip()
-        + "\n\nINPUT:\n"
-        + (headers_text.strip() if headers_text else "(no metadata provided)")
-        + "\n\nReturn STRICT JSON only."
-    )
-
-    payload = {
-        "model": OLLAMA_MODEL,
-        "system": METADATA_AGENT_SYSTEM_PROMPT.strip(),
+def _build_request(headers_text: str) -> Dict[str, Any]:
+    return {
         "prompt": (headers_text.strip() if headers_text else "(no metadata provided)") + "\n\nReturn STRICT JSON only.",
+        "system": METADATA_AGENT_SYSTEM_PROMPT.strip(),
         "format": "json",
-        "stream": False,
+        "timeout": 180,
     }
 
-    try:
-        resp = requests.post(OLLAMA_URL, json=payload, timeout=180)
-        resp.raise_for_status()
-
-        data = resp.json()
-        
-        raw_content = data.get("response", {})
-        if isinstance(raw_content, dict):
-            parsed = raw_content
-        else:
-            # If response is string for any reason, attempt parse
-            s = str(raw_content)
-            start = s.find("{")
-            end = s.rfind("}")
-            parsed = {}
-            if start != -1 and end != -1 and end > start:
-                try:
-                    parsed = json.loads(s[start:end + 1])
-                except Exception:
-                    parsed = {}
+@traced("extract_json", agent="metadata")
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    raw_content = data.get("response", {})
+    if isinstance(raw_content, dict):
+        return raw_content
+
+    # If response is string for any reason, attempt parse
+    s = str(raw_content)
+    start = s.find("{")
+    end = s.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        try:
+            return json.loads(s[start:end + 1])
+        except Exception:
+            pass
+    return {}
 
+def run_metadata_agent(headers_text: str) -> Dict[str, Any]:
+    """
+    Header rules run first; the LLM is only asked when they are
+    inconclusive.
+    """
+    rule_result, conclusive = analyze_headers(headers_text)
+    if conclusive:
+        return rule_result
+
+    try:
+        data = get_client().generate(**_build_request(headers_text), agent="metadata")
+        parsed, error = _parse_response(data), None
     except Exception as e:
+        parsed, error = {}, repr(e)
 
-        parsed = {}
+    result, _ = validate_agent_output_checked(parsed, agent_name="metadata", error=error)
+    return merge_rule_findings(rule_result, result)
 
+async def run_metadata_agent_async(headers_text: str) -> Dict[str, Any]:
+    rule_result, conclusive = analyze_headers(headers_text)
+    if conclusive:
+        return rule_result
+
+    try:
+        data = await get_async_client().generate(**_build_request(headers_text), agent="metadata")
+        parsed, error = _parse_response(data), None
+    except Exception as e:
+        parsed, error = {}, repr(e)
 
-    return validate_agent_output(parsed, agent_name="metadata")
+    result, _ = validate_agent_output_checked(parsed, agent_name="metadata", error=error)
+    return merge_rule_findings(rule_result, result)
 
 if __name__ == "__main__":
     sample_headers = (
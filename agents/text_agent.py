@@ -1,11 +1,11 @@
 import json
-import requests
 from typing import Dict, Any
 
-from .validators import validate_agent_output
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+from .cache import get_cache, request_key
+from .input_prep import prepare_body, prepare_subject
+from .llm_client import get_async_client, get_client
+from .tracing import traced
+from .validators import validate_agent_output_checked
 
 TEXT_AGENT_SYSTEM_PROMPT = """
 You are the TEXT AGENT in a multi-agent phishing email detection system.
@@ -104,51 +104,72 @@ def _extract_json_from_text(raw: str) -> Dict[str, Any]:
 # Main agent function
 # ---------------------------------------------------------------------
 
+def _build_request(subject: str, body: str) -> Dict[str, Any]:
+    email_text = f"Subject: {prepare_subject(subject)}\n\nBody:\n{prepare_body(body)}"
+
+    return {
+        "prompt": email_text + "\n\nReturn STRICT JSON only.",
+        "system": TEXT_AGENT_SYSTEM_PROMPT.strip(),
+        "format": "json",
+        "timeout": 180,
+    }
+
+@traced("extract_json", agent="text")
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    raw_content = data.get("response", {})
+    if isinstance(raw_content, dict):
+        return raw_content
+    return _extract_json_from_text(str(raw_content))
+
 def run_text_agent(subject: str, body: str) -> dict:
     """
     Call local Llama 3 (via Ollama /api/generate) to analyze one email.
     Returns a validated Python dict.
     """
-    MAX_CHARS = 2000
-    if len(body) > MAX_CHARS:
-        body = body[:MAX_CHARS] + "\n\n[TRUNCATED]"
-    email_text = f"Subject: {subject}\n\nBody:\n{body}"
-
-    prompt = (
-        TEXT_AGENT_SYSTEM_PROMPT.strip()
-        + "\n\nINPUT:\n"
-        + email_text
-        + "\n\nReturn STRICT JSON only."
-    )
+    request = _build_request(subject, body)
 
-    payload = {
-        "model": OLLAMA_MODEL,
-        "system": TEXT_AGENT_SYSTEM_PROMPT.strip(),
-        "prompt": email_text + "\n\nReturn STRICT JSON only.",
-        "format": "json",
-        "stream": False,
-    }
+    cache = get_cache()
+    key = request_key("text", request) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
 
     try:
-        resp = requests.post(
-            "http://localhost:11434/api/generate",
-            json=payload,
-            timeout=180
-        )
-        resp.raise_for_status()
-        data = resp.json()
-
-        raw_content = data.get("response", {})
-        if isinstance(raw_content, dict):
-            parsed = raw_content
-        else:
-            parsed = _extract_json_from_text(str(raw_content))
+        data = get_client().generate(**request, agent="text")
+        parsed, error = _parse_response(data), None
+    except Exception as e:
+        print("TEXT AGENT ERROR:", repr(e))
+        parsed, error = {}, repr(e)
 
+    result, ok = validate_agent_output_checked(parsed, agent_name="text", error=error)
+    # Only cache real model answers, never the fail-safe fallback.
+    if cache and ok:
+        cache.put(key, "text", result)
+    return result
+
+async def run_text_agent_async(subject: str, body: str) -> dict:
+    """Same as run_text_agent() but awaits the HTTP call."""
+    request = _build_request(subject, body)
+
+    cache = get_cache()
+    key = request_key("text", request) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    try:
+        data = await get_async_client().generate(**request, agent="text")
+        parsed, error = _parse_response(data), None
     except Exception as e:
         print("TEXT AGENT ERROR:", repr(e))
-        parsed = {}
+        parsed, error = {}, repr(e)
 
-    return validate_agent_output(parsed, agent_name="text")
+    result, ok = validate_agent_output_checked(parsed, agent_name="text", error=error)
+    if cache and ok:
+        cache.put(key, "text", result)
+    return result
 
 # ---------------------------------------------------------------------
 # Manual test
@@ -0,0 +1,227 @@
+# agents/tracing.py
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# ---------------------------------------------------------------------
+# Configuration (environment overridable)
+# ---------------------------------------------------------------------
+
+# When set, every finished span is appended here as one JSON line.
+TRACE_PATH = os.environ.get("PHISH_TRACE_PATH", "")
+
+# Ollama /api/generate accounting fields (durations are nanoseconds).
+OLLAMA_COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+OLLAMA_DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+# Rough prompt size estimate for llama-family tokenizers on English text.
+CHARS_PER_TOKEN = 4
+
+# Stages that run in this process (everything except waiting on the model).
+LOCAL_STAGES = ("prefilter", "input_prep", "extract_json", "validate", "orchestrate")
+
+
+# ---------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------
+
+class Tracer:
+    """
+    Aggregates span durations per (stage, agent) and Ollama token/timing
+    counters per agent. Cheap enough to leave on in production.
+    """
+
+    def __init__(self, sink_path: str = TRACE_PATH):
+        self._lock = threading.Lock()
+        self._sink = open(sink_path, "a", encoding="utf-8") if sink_path else None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages: Dict[tuple, Dict[str, float]] = {}
+            self.ollama: Dict[str, Dict[str, float]] = {}
+
+    def set_sink(self, path: Optional[str]) -> None:
+        with self._lock:
+            if self._sink:
+                self._sink.close()
+            self._sink = open(path, "a", encoding="utf-8") if path else None
+
+    # --- recording ---
+
+    def record(self, stage: str, duration_s: float, agent: str = "", **attrs) -> None:
+        key = (stage, agent)
+        with self._lock:
+            agg = self.stages.get(key)
+            if agg is None:
+                agg = self.stages[key] = {"count": 0, "total_s": 0.0, "max_s": 0.0}
+            agg["count"] += 1
+            agg["total_s"] += duration_s
+            agg["max_s"] = max(agg["max_s"], duration_s)
+
+            if self._sink:
+                event = {"ts": time.time(), "stage": stage, "agent": agent, "duration_s": round(duration_s, 6)}
+                event.update(attrs)
+                self._sink.write(json.dumps(event) + "\n")
+                self._sink.flush()
+
+    @contextmanager
+    def span(self, stage: str, agent: str = "", **attrs):
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, agent, ok=ok, **attrs)
+
+    def record_ollama(self, agent: str, data: Dict[str, Any], prompt_chars: int = 0) -> None:
+        """
+        Keep the server-side accounting Ollama returns with every response.
+        prompt_chars (system + prompt) gives the token count a cold prompt
+        would need; prompt_eval_count below it means the prompt cache hit.
+        """
+        with self._lock:
+            agg = self.ollama.setdefault(agent or "", {"responses": 0})
+            agg["responses"] += 1
+            agg["prompt_tokens_estimated"] = agg.get("prompt_tokens_estimated", 0) + prompt_chars // CHARS_PER_TOKEN
+            for field in OLLAMA_COUNT_FIELDS:
+                agg[field] = agg.get(field, 0) + int(data.get(field) or 0)
+            for field in OLLAMA_DURATION_FIELDS:
+                agg[field + "_s"] = agg.get(field + "_s", 0.0) + (data.get(field) or 0) / 1e9
+
+    # --- reporting ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                f"{stage}[{agent}]" if agent else stage: {
+                    "count": int(v["count"]),
+                    "total_s": round(v["total_s"], 6),
+                    "avg_ms": round(v["total_s"] / v["count"] * 1000, 3) if v["count"] else 0.0,
+                    "max_ms": round(v["max_s"] * 1000, 3),
+                }
+                for (stage, agent), v in sorted(self.stages.items())
+            }
+            ollama = {agent: dict(v) for agent, v in self.ollama.items()}
+        return {"stages": stages, "ollama": ollama}
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Where the time went: model prompt evaluation, generation and load
+        (reported by Ollama), transport/queueing (HTTP time Ollama did not
+        account for), and our own local stages.
+        """
+        with self._lock:
+            http_s = sum(
+                v["total_s"] for (stage, _), v in self.stages.items()
+                if stage in ("llm.http", "llm.stream")
+            )
+            local_s = sum(
+                v["total_s"] for (stage, _), v in self.stages.items()
+                if stage in LOCAL_STAGES
+            )
+            prompt_s = sum(v.get("prompt_eval_duration_s", 0.0) for v in self.ollama.values())
+            eval_s = sum(v.get("eval_duration_s", 0.0) for v in self.ollama.values())
+            load_s = sum(v.get("load_duration_s", 0.0) for v in self.ollama.values())
+            server_s = sum(v.get("total_duration_s", 0.0) for v in self.ollama.values())
+
+        return {
+            "prompt_eval_s": round(prompt_s, 3),
+            "generation_s": round(eval_s, 3),
+            "model_load_s": round(load_s, 3),
+            "transport_and_queue_s": round(max(http_s - server_s, 0.0), 3),
+            "local_code_s": round(local_s, 3),
+        }
+
+    def prompt_reuse(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per agent: prompt tokens we sent (estimated) vs. tokens Ollama
+        actually evaluated, and the prompt-eval time the difference saved
+        at the observed per-token rate.
+        """
+        out = {}
+        with self._lock:
+            for agent, v in sorted(self.ollama.items()):
+                estimated = v.get("prompt_tokens_estimated", 0)
+                evaluated = v.get("prompt_eval_count", 0)
+                if not estimated:
+                    continue
+                reused = max(estimated - evaluated, 0)
+                per_token_s = v.get("prompt_eval_duration_s", 0.0) / evaluated if evaluated else 0.0
+                out[agent] = {
+                    "tokens_sent_est": estimated,
+                    "tokens_evaluated": evaluated,
+                    "reuse_fraction": round(reused / estimated, 3),
+                    "eval_seconds_saved_est": round(reused * per_token_s, 3),
+                }
+        return out
+
+    def export_prometheus(self, prefix: str = "phish") -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        with self._lock:
+            for (stage, agent), v in sorted(self.stages.items()):
+                labels = f'stage="{stage}",agent="{agent}"'
+                lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {v['total_s']:.6f}")
+                lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {int(v['count'])}")
+
+            lines.append(f"# TYPE {prefix}_ollama_tokens_total counter")
+            for agent, v in sorted(self.ollama.items()):
+                for field in OLLAMA_COUNT_FIELDS:
+                    lines.append(f'{prefix}_ollama_tokens_total{{agent="{agent}",kind="{field}"}} {int(v.get(field, 0))}')
+
+            lines.append(f"# TYPE {prefix}_ollama_seconds_total counter")
+            for agent, v in sorted(self.ollama.items()):
+                for field in OLLAMA_DURATION_FIELDS:
+                    lines.append(
+                        f'{prefix}_ollama_seconds_total{{agent="{agent}",phase="{field[:-len("_duration")]}"}} '
+                        f"{v.get(field + '_s', 0.0):.6f}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------
+# Shared instance + helpers
+# ---------------------------------------------------------------------
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(stage: str, agent: str = "", **attrs):
+    """Context manager timing one stage on the shared tracer."""
+    return _tracer.span(stage, agent, **attrs)
+
+
+def traced(stage: str, agent: str = ""):
+    """Decorator form of span(); works on both plain and async functions."""
+
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _tracer.span(stage, agent):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(stage, agent):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return wrap
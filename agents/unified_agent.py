@@ -1,11 +1,11 @@
 import json
-import requests
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from .validators import validate_agent_output
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+from .cache import get_cache, request_key
+from .input_prep import dedupe_urls, prepare_body, prepare_subject
+from .llm_client import get_async_client, get_client
+from .tracing import traced
+from .validators import validate_agent_output_checked
 
 # ------------------------------------------------------------
 # Unified system prompt
@@ -54,6 +54,7 @@ FORMAT RULES:
 # Helpers
 # ------------------------------------------------------------
 
+@traced("extract_json", agent="unified")
 def _extract_json(raw: Any) -> Dict[str, Any]:
     """Extract a JSON object from model output (fail-safe)."""
     if isinstance(raw, dict):
@@ -67,31 +68,23 @@ def _extract_json(raw: Any) -> Dict[str, Any]:
     except Exception:
         return {}
 
-# ------------------------------------------------------------
-# Main unified agent
-# ------------------------------------------------------------
-
-def run_unified_agent(
+def _build_request(
     subject: str,
     body: str,
     urls: List[str],
     headers_text: str = "",
-) -> Dict[str, Dict[str, Any]]:
-    """
-    Run a single Ollama call that returns text/url/metadata analyses.
-    Returns validated sub-objects ready for combine_agents().
-    """
-
+) -> Dict[str, Any]:
+    urls = dedupe_urls(urls)
     url_block = "\n".join(urls) if urls else "(no urls provided)"
     headers_block = headers_text.strip() if headers_text else "(no metadata provided)"
 
     user_prompt = f"""
 INPUT:
 Subject:
-{subject}
+{prepare_subject(subject)}
 
 Body:
-{body}
+{prepare_body(body)}
 
 URLs:
 {url_block}
@@ -102,32 +95,87 @@ Headers:
 Return STRICT JSON only.
 """
 
-    payload = {
-        "model": OLLAMA_MODEL,
-        "system": UNIFIED_SYSTEM_PROMPT.strip(),
+    return {
         "prompt": user_prompt,
+        "system": UNIFIED_SYSTEM_PROMPT.strip(),
         "format": "json",
-        "stream": False,
+        "timeout": 180,
     }
 
+def _split_checked(
+    parsed: Dict[str, Any],
+    error: Optional[str] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """Validated sub-objects, and whether all three passed validation."""
+    # Validate each sub-object independently (fail-safe)
+    result, all_ok = {}, True
+    for name in ("text", "url", "metadata"):
+        result[name], ok = validate_agent_output_checked(parsed.get(name, {}), agent_name=name, error=error)
+        all_ok = all_ok and ok
+    return result, all_ok
+
+# ------------------------------------------------------------
+# Main unified agent
+# ------------------------------------------------------------
+
+def run_unified_agent(
+    subject: str,
+    body: str,
+    urls: List[str],
+    headers_text: str = "",
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run a single Ollama call that returns text/url/metadata analyses.
+    Returns validated sub-objects ready for combine_agents().
+    """
+    request = _build_request(subject, body, urls, headers_text)
+
+    cache = get_cache()
+    key = request_key("unified", request) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
     try:
-        resp = requests.post(OLLAMA_URL, json=payload, timeout=180)
-        resp.raise_for_status()
-        data = resp.json()
-        parsed = _extract_json(data.get("response"))
-    except Exception:
-        parsed = {}
+        data = get_client().generate(**request, agent="unified")
+        parsed, error = _extract_json(data.get("response")), None
+    except Exception as e:
+        parsed, error = {}, repr(e)
 
-    # Validate each sub-object independently (fail-safe)
-    text_obj = validate_agent_output(parsed.get("text", {}), agent_name="text")
-    url_obj = validate_agent_output(parsed.get("url", {}), agent_name="url")
-    meta_obj = validate_agent_output(parsed.get("metadata", {}), agent_name="metadata")
+    result, ok = _split_checked(parsed, error)
+    # Only cache real model answers, never the fail-safe fallback.
+    if cache and ok:
+        cache.put(key, "unified", result)
+    return result
 
-    return {
-        "text": text_obj,
-        "url": url_obj,
-        "metadata": meta_obj,
-    }
+
+async def run_unified_agent_async(
+    subject: str,
+    body: str,
+    urls: List[str],
+    headers_text: str = "",
+) -> Dict[str, Dict[str, Any]]:
+    """Same as run_unified_agent() but awaits the HTTP call."""
+    request = _build_request(subject, body, urls, headers_text)
+
+    cache = get_cache()
+    key = request_key("unified", request) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    try:
+        data = await get_async_client().generate(**request, agent="unified")
+        parsed, error = _extract_json(data.get("response")), None
+    except Exception as e:
+        parsed, error = {}, repr(e)
+
+    result, ok = _split_checked(parsed, error)
+    if cache and ok:
+        cache.put(key, "unified", result)
+    return result
 
 
 # ------------------------------------------------------------
@@ -1,12 +1,13 @@
 import json
 import re
-import requests
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from .validators import validate_agent_output
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+from .input_prep import dedupe_urls
+from .llm_client import get_async_client, get_client
+from .tracing import traced
+from .url_cache import lookup_urls, merge_url_findings, store_url_findings
+from .url_features import analyze_urls
+from .validators import validate_agent_output_checked
 
 URL_AGENT_SYSTEM_PROMPT = """
 You are the URL AGENT in a multi-agent phishing email detection system.
@@ -95,41 +96,86 @@ def extract_urls_from_text(text: str) -> List[str]:
     pattern = r"(https?://[^\s)>\]]+)"
     return re.findall(pattern, text)
 
-def run_url_agent(urls: List[str]) -> Dict[str, Any]:
+def _build_request(urls: List[str]) -> Dict[str, Any]:
     url_block = "\n".join(urls) if urls else "(no urls provided)"
 
     prompt = (
-        URL_AGENT_SYSTEM_PROMPT.strip()
-        + "\n\n"
-        + "INPUT:\n"
+        "INPUT:\n"
         + f"URLs:\n{url_block}\n"
         + "\nReturn STRICT JSON only."
     )
-
-    payload = {
-        "model": OLLAMA_MODEL,
+    return {
         "prompt": prompt,
+        "system": URL_AGENT_SYSTEM_PROMPT.strip(),
         "format": "json",
-        "stream": False,
+        "timeout": 60,
     }
 
+@traced("extract_json", agent="url")
+def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    # /api/generate returns text in "response"
+    raw_content = data.get("response", {})
+
+    if isinstance(raw_content, dict):
+        return raw_content
+    return _extract_json_from_text(raw_content)
+
+def _dedupe(urls: List[str]) -> List[str]:
+    return dedupe_urls((u.strip() for u in urls if u), limit=len(urls))
+
+def _plan(urls: List[str]):
+    """Rules first, then the cache; whatever is left goes to the LLM."""
+    decided, ambiguous = analyze_urls(_dedupe(urls))
+    known, unknown = lookup_urls(ambiguous)
+    return decided + known, unknown
+
+def _finish(
+    known: List[Dict[str, Any]],
+    unknown: List[str],
+    parsed: Dict[str, Any],
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    result, ok = validate_agent_output_checked(parsed, agent_name="url", error=error)
+    # Only real model answers are remembered, never the fail-safe fallback.
+    if ok:
+        store_url_findings(unknown, result)
+    if not known:
+        return result
+    merged = merge_url_findings(known, result)
+    if not ok:
+        merged["error"] = result["error"]
+    return merged
+
+def run_url_agent(urls: List[str]) -> Dict[str, Any]:
+    """
+    Analyze a URL set. URLs the feature rules can decide, and URLs (or
+    registered domains) already seen, are answered locally; only the rest
+    are sent to the LLM.
+    """
+    known, unknown = _plan(urls)
+    if not unknown:
+        return merge_url_findings(known)
+
     try:
-        resp = requests.post(OLLAMA_URL, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_client().generate(**_build_request(unknown), agent="url")
+        parsed, error = _parse_response(data), None
+    except Exception as e:
+        parsed, error = {}, repr(e)
 
-        # /api/generate returns text in "response"
-        raw_content = data.get("response", {})
+    return _finish(known, unknown, parsed, error)
 
-        if isinstance(raw_content, dict):
-            parsed = raw_content
-        else:
-            parsed = _extract_json_from_text(raw_content)
+async def run_url_agent_async(urls: List[str]) -> Dict[str, Any]:
+    known, unknown = _plan(urls)
+    if not unknown:
+        return merge_url_findings(known)
 
-    except Exception:
-        parsed = {}
+    try:
+        data = await get_async_client().generate(**_build_request(unknown), agent="url")
+        parsed, error = _parse_response(data), None
+    except Exception as e:
+        parsed, error = {}, repr(e)
 
-    return validate_agent_output(parsed, agent_name="url")
+    return _finish(known, unknown, parsed, error)
 
 if __name__ == "__main__":
     # Quick manual test
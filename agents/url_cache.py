@@ -0,0 +1,253 @@
+# agents/url_cache.py
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .cache import get_cache, make_key
+from .llm_client import get_client
+from .schema import PHISHING_INDICATORS, LEGITIMACY_INDICATORS
+from .validators import validate_agent_output
+
+# Bump when the meaning of stored URL findings changes.
+URL_CACHE_VERSION = "1"
+
+# Second-level public suffixes common in our mail stream; good enough to
+# find the registered domain without shipping the full public suffix list.
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk",
+    "com.au", "net.au", "org.au",
+    "co.jp", "co.nz", "co.in", "co.za",
+    "com.br", "com.cn", "com.mx", "com.tr", "com.sg",
+}
+
+# Hosting platforms that hand every customer a subdomain (the private
+# section of the public suffix list). Each tenant is its own registered
+# domain, and no finding is reused at domain level under them: one
+# tenant's verdict says nothing about the next, and some platforms
+# (storage.googleapis.com, s3.amazonaws.com) put the tenant in the path.
+SHARED_HOST_SUFFIXES = {
+    "github.io", "gitlab.io", "web.app", "firebaseapp.com", "appspot.com",
+    "googleapis.com", "cloudfunctions.net", "blogspot.com", "herokuapp.com",
+    "azurewebsites.net", "azureedge.net", "windows.net", "sharepoint.com",
+    "onmicrosoft.com", "amazonaws.com", "cloudfront.net", "netlify.app",
+    "vercel.app", "pages.dev", "workers.dev", "r2.dev", "onrender.com",
+    "fly.dev", "ngrok.io", "ngrok-free.app", "glitch.me", "repl.co",
+    "replit.app", "surge.sh", "webflow.io", "framer.app", "wixsite.com",
+    "weebly.com", "wordpress.com", "godaddysites.com", "square.site",
+    "myshopify.com", "000webhostapp.com", "translate.goog", "duckdns.org",
+}
+
+# Indicators that describe the domain itself, not one page on it.
+DOMAIN_LEVEL_INDICATORS = {
+    "ip_based_url",
+    "url_shortener",
+    "suspicious_tld",
+    "typosquatting_or_lookalike_domain",
+    "suspicious_subdomain_depth",
+}
+
+# A domain-level "legitimate" finding is only reused for plain URLs; a
+# login-looking path or a query string on a known domain still gets asked.
+_LURE_PATH = re.compile(r"login|signin|sign-in|verify|account|password|secure|update|webscr", re.I)
+
+_IPV4 = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+# ---------------------------------------------------------------------
+# Domain helpers
+# ---------------------------------------------------------------------
+
+def url_host(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower().rstrip(".")
+    except ValueError:
+        return ""
+
+def shared_host_suffix(host: str) -> str:
+    """The SHARED_HOST_SUFFIXES entry host is on (or is), else ""."""
+    labels = host.split(".")
+    for n in range(len(labels)):
+        suffix = ".".join(labels[n:])
+        if suffix in SHARED_HOST_SUFFIXES:
+            return suffix
+    return ""
+
+def registered_domain(host: str) -> str:
+    if not host or _IPV4.match(host):
+        return host
+    labels = host.split(".")
+    shared = shared_host_suffix(host)
+    if shared and host != shared:
+        return ".".join(labels[-(shared.count(".") + 2):])
+    if len(labels) >= 3 and ".".join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def _is_plain_url(url: str) -> bool:
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return not parts.query and not _LURE_PATH.search(parts.path)
+
+def _url_key(url: str) -> str:
+    return make_key("url_item", get_client().model, URL_CACHE_VERSION, url)
+
+def _domain_key(domain: str) -> str:
+    return make_key("url_domain", get_client().model, URL_CACHE_VERSION, domain)
+
+
+# ---------------------------------------------------------------------
+# Lookup / store
+# ---------------------------------------------------------------------
+
+def lookup_urls(urls: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Split urls into cached findings and URLs that still need the LLM.
+    A full-URL entry wins over a registered-domain entry; hosts on a
+    shared hosting platform only ever match full-URL entries.
+    """
+    cache = get_cache()
+    if not cache:
+        return [], list(urls)
+
+    known: List[Dict[str, Any]] = []
+    unknown: List[str] = []
+
+    for url in urls:
+        hit = cache.get(_url_key(url))
+        host = url_host(url)
+        if hit is None and not shared_host_suffix(host):
+            domain_hit = cache.get(_domain_key(registered_domain(host)))
+            if domain_hit is not None and (
+                domain_hit["verdict"] == "phishing" or _is_plain_url(url)
+            ):
+                hit = domain_hit
+        if hit is None:
+            unknown.append(url)
+        else:
+            known.append(hit)
+
+    return known, unknown
+
+def _finding_for_url(url: str, result: Dict[str, Any], n_urls: int) -> Optional[Dict[str, Any]]:
+    """Attribute part of a set-level URL agent result to one URL, or None if unclear."""
+    verdict = result.get("verdict", "unsure")
+    if verdict == "unsure":
+        return None
+
+    if n_urls == 1:
+        evidence = list(result.get("evidence", []))
+        p_inds = list(result.get("phishing_indicators", []))
+    else:
+        host = url_host(url)
+        evidence = [
+            e for e in result.get("evidence", [])
+            if isinstance(e, dict)
+            and (url in str(e.get("text_quote", "")) or (host and host in str(e.get("text_quote", ""))))
+        ]
+        p_inds = sorted({
+            e.get("indicator") for e in evidence
+            if e.get("indicator") in PHISHING_INDICATORS
+        })
+
+    if verdict == "phishing" and not p_inds:
+        # The set was flagged but nothing points at this URL.
+        return None
+
+    return {
+        "url": url,
+        "verdict": "phishing" if p_inds else "legitimate",
+        "confidence": float(result.get("confidence", 0.0)),
+        "phishing_indicators": p_inds,
+        "legitimacy_indicators": [] if p_inds else list(result.get("legitimacy_indicators", [])),
+        "evidence": evidence,
+    }
+
+def store_url_findings(urls: List[str], result: Dict[str, Any]) -> None:
+    """Record per-URL and per-domain findings from a validated URL agent result."""
+    cache = get_cache()
+    if not cache:
+        return
+
+    for url in urls:
+        finding = _finding_for_url(url, result, len(urls))
+        if finding is None:
+            continue
+        cache.put(_url_key(url), "url_item", finding)
+
+        host = url_host(url)
+        domain = registered_domain(host)
+        if not domain or shared_host_suffix(host):
+            continue
+        domain_inds = [i for i in finding["phishing_indicators"] if i in DOMAIN_LEVEL_INDICATORS]
+        if finding["verdict"] == "legitimate" and _is_plain_url(url):
+            cache.put(_domain_key(domain), "url_domain", finding)
+        elif domain_inds:
+            cache.put(_domain_key(domain), "url_domain", {
+                **finding,
+                "phishing_indicators": domain_inds,
+                "evidence": [e for e in finding["evidence"] if e.get("indicator") in domain_inds],
+            })
+
+
+# ---------------------------------------------------------------------
+# Merge
+# ---------------------------------------------------------------------
+
+def merge_url_findings(
+    findings: List[Dict[str, Any]],
+    llm_result: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Fold per-URL findings from the rules or the cache (and the LLM result
+    for the remaining URLs, if any) into one schema-valid URL agent output.
+    """
+    parts = list(findings)
+    if llm_result is not None:
+        parts.append(llm_result)
+
+    if not parts:
+        out = validate_agent_output({}, agent_name="url")
+        out["overall_rationale"] = "No URLs provided."
+        return out
+
+    verdicts = [p.get("verdict", "unsure") for p in parts]
+    confs = [float(p.get("confidence", 0.0)) for p in parts]
+
+    if "phishing" in verdicts:
+        verdict = "phishing"
+        confidence = max(c for v, c in zip(verdicts, confs) if v == "phishing")
+    elif all(v == "legitimate" for v in verdicts):
+        verdict = "legitimate"
+        confidence = min(confs)
+    else:
+        verdict = "unsure"
+        confidence = min(confs)
+
+    p_inds: List[str] = []
+    l_inds: List[str] = []
+    evidence: List[Any] = []
+    for p in parts:
+        p_inds += [i for i in p.get("phishing_indicators", []) if i not in p_inds]
+        l_inds += [i for i in p.get("legitimacy_indicators", []) if i not in l_inds]
+        evidence += p.get("evidence", [])
+
+    n_new = 0 if llm_result is None else 1
+    return validate_agent_output({
+        "agent": "url",
+        "version": "1.0",
+        "view": "url_only",
+        "task": "email_phishing_detection",
+        "verdict": verdict,
+        "confidence": confidence,
+        "phishing_indicators": [i for i in p_inds if i in PHISHING_INDICATORS],
+        "legitimacy_indicators": [i for i in l_inds if i in LEGITIMACY_INDICATORS],
+        "evidence": evidence,
+        "overall_rationale": (
+            f"Combined {len(findings)} rule-based or cached URL verdict(s)"
+            + (" with a fresh analysis of the remaining URLs." if n_new else ".")
+        ),
+        "safety_notes": "",
+    }, agent_name="url")
@@ -0,0 +1,244 @@
+# agents/url_features.py
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .url_cache import registered_domain
+
+# ---------------------------------------------------------------------
+# Reference lists
+# ---------------------------------------------------------------------
+
+URL_SHORTENERS = {
+    "bit.ly", "tinyurl.com", "goo.gl", "t.co", "ow.ly", "is.gd", "buff.ly",
+    "rebrand.ly", "cutt.ly", "shorturl.at", "tiny.cc", "rb.gy", "t.ly",
+    "s.id", "bl.ink", "soo.gd", "v.gd",
+}
+
+SUSPICIOUS_TLDS = {
+    "zip", "mov", "xyz", "top", "tk", "ml", "ga", "cf", "gq", "work",
+    "click", "link", "country", "kim", "loan", "men", "review", "support",
+    "rest", "cam", "icu", "buzz", "monster", "cyou", "sbs",
+}
+
+# Brand -> registered domains that legitimately belong to it.
+BRAND_DOMAINS = {
+    "paypal": {"paypal.com"},
+    "microsoft": {"microsoft.com", "live.com", "office.com", "outlook.com"},
+    "office365": {"office.com", "microsoft.com"},
+    "apple": {"apple.com", "icloud.com"},
+    "icloud": {"icloud.com"},
+    "google": {"google.com", "gmail.com", "youtube.com", "google.co.uk", "google.de"},
+    "amazon": {"amazon.com", "amazon.co.uk", "amazon.de"},
+    "netflix": {"netflix.com"},
+    "facebook": {"facebook.com", "fb.com"},
+    "instagram": {"instagram.com"},
+    "linkedin": {"linkedin.com"},
+    "dropbox": {"dropbox.com"},
+    "docusign": {"docusign.com", "docusign.net"},
+    "wellsfargo": {"wellsfargo.com"},
+    "chase": {"chase.com"},
+    "bankofamerica": {"bankofamerica.com"},
+    "citibank": {"citibank.com", "citi.com"},
+    "dhl": {"dhl.com"},
+    "fedex": {"fedex.com"},
+    "ups": {"ups.com"},
+    "usps": {"usps.com"},
+    "irs": {"irs.gov"},
+    "ebay": {"ebay.com"},
+    "adobe": {"adobe.com"},
+    "coinbase": {"coinbase.com"},
+}
+
+KNOWN_DOMAINS = set().union(*BRAND_DOMAINS.values())
+
+# Indicators strong enough to call a URL phishing on their own.
+STRONG_INDICATORS = {
+    "ip_based_url",
+    "typosquatting_or_lookalike_domain",
+}
+
+FEATURE_NAMES = [
+    "ip_based_url",
+    "url_shortener",
+    "suspicious_tld",
+    "typosquatting_or_lookalike_domain",
+    "suspicious_subdomain_depth",
+    "credential_path_or_login_lure",
+    "unusual_query_params",
+]
+
+MAX_SUBDOMAIN_DEPTH = 3
+MAX_QUERY_PARAMS = 6
+MAX_QUERY_LENGTH = 120
+
+_IPV4_HOST = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+_LURE = re.compile(
+    r"log-?in|sign-?in|verify|verification|account|password|passwd|credential|"
+    r"update|secure|webscr|banking|unlock|suspend|confirm|wp-admin|owa",
+    re.I,
+)
+_EMBEDDED_TARGET = re.compile(r"(=|%3d)(https?|%68%74%74%70)(:|%3a)", re.I)
+_EMAIL_PARAM = re.compile(r"[\w.+-]+(@|%40)[\w-]+\.[\w.]+", re.I)
+_LONG_TOKEN = re.compile(r"[A-Za-z0-9+/_-]{60,}")
+
+# Character swaps used in lookalike domains, folded to one canonical form
+# on both sides of the comparison (paypa1, paypai, rnicrosoft, linkedln).
+_HOMOGLYPHS = str.maketrans({
+    "0": "o", "1": "l", "i": "l", "3": "e", "5": "s", "@": "a", "$": "s",
+})
+
+
+# ---------------------------------------------------------------------
+# Lookalike detection
+# ---------------------------------------------------------------------
+
+def _fold(token: str) -> str:
+    return token.replace("rn", "m").replace("vv", "w").translate(_HOMOGLYPHS)
+
+_FOLDED_BRANDS = {_fold(brand): brand for brand in BRAND_DOMAINS}
+
+@lru_cache(maxsize=65536)
+def lookalike_brand(host: str, domain: str) -> Optional[str]:
+    """
+    Return the brand a non-official host imitates, or None.
+
+    Only two patterns count: a brand name used as a whole label or
+    hyphen-separated token (ups.com.tracking-info.ru, secure-paypal.com),
+    and a brand spelled with look-alike characters (paypa1, rnicrosoft).
+    Near-miss spellings are left to the LLM; an edit-distance match also
+    hits ordinary words (apply ~ apple, phase ~ chase, linked ~ linkedin).
+    """
+    if domain in KNOWN_DOMAINS:
+        return None
+
+    name = host.rsplit(".", 1)[0]
+    for token in re.split(r"[.\-]", name):
+        brand = _FOLDED_BRANDS.get(_fold(token)) if token else None
+        if brand:
+            return brand
+    return None
+
+
+# ---------------------------------------------------------------------
+# Feature extraction
+# ---------------------------------------------------------------------
+
+def extract_url_features(url: str) -> Dict[str, Any]:
+    """Deterministic URL-agent indicators for one URL, each with an explanation."""
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower().rstrip(".")
+    except ValueError:
+        parts, host = None, ""
+
+    domain = registered_domain(host)
+    found: Dict[str, str] = {}
+
+    if host and (_IPV4_HOST.match(host) or ":" in host):
+        found["ip_based_url"] = "The link points to a raw IP address instead of a domain name."
+
+    if domain in URL_SHORTENERS or host in URL_SHORTENERS:
+        found["url_shortener"] = "A link shortener hides the real destination."
+
+    tld = host.rsplit(".", 1)[-1] if "." in host else ""
+    if tld in SUSPICIOUS_TLDS:
+        found["suspicious_tld"] = f"The .{tld} top-level domain is frequently abused."
+
+    if host and "ip_based_url" not in found:
+        brand = lookalike_brand(host, domain)
+        if brand:
+            found["typosquatting_or_lookalike_domain"] = (
+                f"{host} imitates {brand} but is not one of its official domains."
+            )
+        depth = len(host.split(".")) - len(domain.split("."))
+        if depth >= MAX_SUBDOMAIN_DEPTH:
+            found["suspicious_subdomain_depth"] = f"The host has {depth} nested subdomains."
+
+    if parts is not None:
+        if _LURE.search(parts.path or "") and domain not in KNOWN_DOMAINS:
+            found["credential_path_or_login_lure"] = "The path looks like a login or account-verification page."
+
+        query = parts.query or ""
+        if query and (
+            _EMBEDDED_TARGET.search(query)
+            or _EMAIL_PARAM.search(query)
+            or _LONG_TOKEN.search(query)
+            or query.count("&") + 1 > MAX_QUERY_PARAMS
+            or len(query) > MAX_QUERY_LENGTH
+        ):
+            found["unusual_query_params"] = "The query string carries a redirect target, address or long opaque token."
+
+    return {
+        "url": url,
+        "host": host,
+        "domain": domain,
+        "known_domain": domain in KNOWN_DOMAINS,
+        "indicators": found,
+    }
+
+def url_feature_matrix(urls: List[str]) -> List[List[int]]:
+    """0/1 feature rows in FEATURE_NAMES order, e.g. for a downstream model."""
+    rows = []
+    for url in urls:
+        found = extract_url_features(url)["indicators"]
+        rows.append([1 if name in found else 0 for name in FEATURE_NAMES])
+    return rows
+
+
+# ---------------------------------------------------------------------
+# Per-URL decision
+# ---------------------------------------------------------------------
+
+def classify_url(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Return a URL finding (same shape as the URL cache entries) when the
+    rules are decisive, or None when the URL should go to the LLM.
+    """
+    feats = extract_url_features(url)
+    found = feats["indicators"]
+
+    evidence = [
+        {"indicator": ind, "text_quote": url, "explanation": why}
+        for ind, why in found.items()
+    ]
+
+    strong = [i for i in found if i in STRONG_INDICATORS]
+    if strong or len(found) >= 3:
+        return {
+            "url": url,
+            "verdict": "phishing",
+            "confidence": 0.9 if strong and len(found) >= 2 else 0.8,
+            "phishing_indicators": list(found),
+            "legitimacy_indicators": [],
+            "evidence": evidence,
+        }
+
+    # Only an official brand domain is safe to call on rules alone; a
+    # clean-looking unknown domain still goes to the LLM.
+    if not found and feats["known_domain"]:
+        return {
+            "url": url,
+            "verdict": "legitimate",
+            "confidence": 0.7,
+            "phishing_indicators": [],
+            "legitimacy_indicators": [],
+            "evidence": [],
+        }
+
+    # Unknown domain, or one or two weak signals: let the LLM weigh them.
+    return None
+
+def analyze_urls(urls: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Split urls into rule-decided findings and ambiguous URLs to escalate."""
+    decided: List[Dict[str, Any]] = []
+    ambiguous: List[str] = []
+    for url in urls:
+        finding = classify_url(url)
+        if finding is None:
+            ambiguous.append(url)
+        else:
+            decided.append(finding)
+    return decided, ambiguous
@@ -1,7 +1,7 @@
 # agents/validators.py
 
 from __future__ import annotations
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from .schema import (
     ALLOWED_VERDICTS,
@@ -9,6 +9,7 @@ from .schema import (
     LEGITIMACY_INDICATORS,
     REQUIRED_KEYS,
 )
+from .tracing import span
 
 def _safe_unsure(agent_name: str, reason: str) -> Dict[str, Any]:
     return {
@@ -26,26 +27,47 @@ def _safe_unsure(agent_name: str, reason: str) -> Dict[str, Any]:
     }
 
 def validate_agent_output(obj: Dict[str, Any], agent_name: str) -> Dict[str, Any]:
+    with span("validate", agent=agent_name):
+        return _validate(obj, agent_name)[0]
+
+def validate_agent_output_checked(
+    obj: Dict[str, Any],
+    agent_name: str,
+    error: Optional[str] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    (validated output, ok) for an LLM answer. ok is False when obj was
+    rejected and the fail-safe unsure output was returned instead: such
+    results must not be cached, and carry an "error" key (the failed
+    call's exception, else the validation reason) so a run can retry them.
+    """
+    with span("validate", agent=agent_name):
+        out, ok = _validate(obj, agent_name)
+    if not ok:
+        out["error"] = error or out["overall_rationale"]
+    return out, ok
+
+def _validate(obj: Dict[str, Any], agent_name: str) -> Tuple[Dict[str, Any], bool]:
     # Basic type check
     if not isinstance(obj, dict):
-        return _safe_unsure(agent_name, "Agent output is not a JSON object (dict).")
+        return _safe_unsure(agent_name, "Agent output is not a JSON object (dict)."), False
 
     # Required keys
     missing = REQUIRED_KEYS - set(obj.keys())
     if missing:
-        return _safe_unsure(agent_name, f"Agent output missing keys: {sorted(missing)}")
+        return _safe_unsure(agent_name, f"Agent output missing keys: {sorted(missing)}"), False
 
     # Verdict
     verdict = obj.get("verdict")
     if verdict not in ALLOWED_VERDICTS:
-        return _safe_unsure(agent_name, f"Invalid verdict: {verdict!r}")
+        return _safe_unsure(agent_name, f"Invalid verdict: {verdict!r}"), False
 
     # Confidence
     conf = obj.get("confidence")
     try:
         conf = float(conf)
     except Exception:
-        return _safe_unsure(agent_name, f"Confidence is not a number: {conf!r}")
+        return _safe_unsure(agent_name, f"Confidence is not a number: {conf!r}"), False
     conf = max(0.0, min(1.0, conf))
     obj["confidence"] = conf
 
@@ -71,5 +93,5 @@ def validate_agent_output(obj: Dict[str, Any], agent_name: str) -> Dict[str, Any
     # Agent name consistency (don’t hard-fail, just overwrite)
     obj["agent"] = agent_name
 
-    return obj
+    return obj, True
 # agents/text_agent.py
\ No newline at end of file
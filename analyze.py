@@ -0,0 +1,149 @@
+"""
+Analyze one email and print the verdict as JSON.
+
+    python analyze.py message.eml
+    python analyze.py < message.eml
+    echo "Your account is locked, verify at http://..." | python analyze.py --subject "Alert"
+
+Meant to be spawned once per message (e.g. from a mail-filter hook), so
+only what the serial path needs is imported; the TF-IDF prefilter, which
+pulls in scikit-learn, is opt-in (--cascade).
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+# Time this script spends outside the LLM round trip: imports, parsing,
+# client setup, and the small amount of work after the response. The
+# interpreter's own start-up is reported separately (it depends on the
+# Python install, not on this code).
+COLD_START_BUDGET_MS = float(os.environ.get("ANALYZE_COLD_START_BUDGET_MS", "150"))
+
+# One request per process: http.client starts faster than requests.
+os.environ.setdefault("OLLAMA_HTTP_TRANSPORT", "stdlib")
+
+# --exit-code statuses, for hooks that branch on the verdict.
+EXIT_CODES = {"legitimate": 0, "phishing": 1, "unsure": 2}
+
+# -------------------------------------------------
+# Input
+# -------------------------------------------------
+
+# Plain text whose first line happens to contain a colon ("URGENT: ...",
+# a bare URL) is not a message; a header block needs one of these.
+_KNOWN_HEADERS = {b"from", b"to", b"subject", b"received", b"message-id", b"mime-version", b"date", b"return-path"}
+
+def _looks_like_message(raw: bytes) -> bool:
+    """True when raw starts with an RFC 822 header block (known header, then a blank line)."""
+    head, sep, _ = raw.lstrip().replace(b"\r\n", b"\n").partition(b"\n\n")
+    if not sep:
+        return False
+    known = False
+    for line in head.split(b"\n"):
+        if line[:1] in (b" ", b"\t"):
+            continue  # folded continuation of the previous header
+        name, colon, _ = line.partition(b":")
+        if not colon or not name or any(c in name for c in b" \t"):
+            return False
+        known = known or name.lower() in _KNOWN_HEADERS
+    return known
+
+def read_email(path: Optional[str], subject: Optional[str]) -> Tuple[str, str, str, Optional[List[str]]]:
+    """(subject, body, headers_text, urls); urls is None for plain-text input (taken from the body)."""
+    raw = open(path, "rb").read() if path and path != "-" else sys.stdin.buffer.read()
+    if _looks_like_message(raw):
+        from mail_ingest import parse_message
+
+        row = parse_message(raw)
+        return subject if subject is not None else row["subject"], row["body"], row["headers_text"], row["urls"]
+    return subject or "", raw.decode("utf-8", errors="replace"), "", None
+
+# -------------------------------------------------
+# Timing
+# -------------------------------------------------
+
+def _process_age_ms() -> Optional[float]:
+    """Milliseconds since this process started (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime_s = float(f.read().split()[0])
+        return (uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, ValueError, IndexError):
+        return None
+
+def timing_report(t_imported: float, t_parsed: float, t_done: float) -> Dict[str, Any]:
+    from agents.tracing import get_tracer
+
+    stages = get_tracer().snapshot()["stages"]
+    llm_s = sum(v["total_s"] for k, v in stages.items() if k.startswith("llm.http"))
+    age_ms = _process_age_ms()
+    cold_start_ms = (t_done - _T0 - llm_s) * 1000
+    return {
+        "interpreter_ms": None if age_ms is None else round(age_ms - (time.perf_counter() - _T0) * 1000),
+        "imports_ms": round((t_imported - _T0) * 1000, 1),
+        "parse_ms": round((t_parsed - t_imported) * 1000, 1),
+        "cold_start_ms": round(cold_start_ms, 1),
+        "llm_ms": round(llm_s * 1000, 1),
+        "within_budget": cold_start_ms <= COLD_START_BUDGET_MS,
+    }
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Analyze one email (.eml file or stdin) for phishing.")
+    ap.add_argument("path", nargs="?", default=None, help=".eml file (default: stdin)")
+    ap.add_argument("--subject", default=None, help="subject for plain-text input (overrides the parsed one)")
+    ap.add_argument("--cascade", action="store_true", help="try the TF-IDF prefilter first (loads scikit-learn)")
+    ap.add_argument("--explain", action="store_true", help="add the template explanation")
+    ap.add_argument("--full", action="store_true", help="include per-agent outputs")
+    ap.add_argument("--exit-code", action="store_true", help="exit 0 legitimate / 1 phishing / 2 unsure")
+    ap.add_argument("--timing", action="store_true", help="report the cold-start breakdown on stderr")
+    args = ap.parse_args(argv)
+
+    from pipeline import analyze_email
+
+    t_imported = time.perf_counter()
+    subject, body, headers_text, urls = read_email(args.path, args.subject)
+    t_parsed = time.perf_counter()
+
+    result = analyze_email(subject, body, headers_text, cascade=args.cascade, urls=urls)
+    final = result["final"]
+
+    out: Dict[str, Any] = {"subject": subject, **final}
+    if args.explain:
+        from agents.explanation_agent import explain
+
+        out["explanation"] = explain(final, llm=False)
+    if args.full:
+        out["agents"] = result["agents"]
+    t_done = time.perf_counter()
+
+    json.dump(out, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    if args.timing:
+        report = timing_report(t_imported, t_parsed, t_done)
+        print(f"[TIMING] {json.dumps(report)}", file=sys.stderr)
+        if not report["within_budget"]:
+            print(f"[TIMING] cold start over the {COLD_START_BUDGET_MS:.0f}ms budget", file=sys.stderr)
+
+    return EXIT_CODES.get(final.get("verdict"), 2) if args.exit_code else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,33 @@
-import pandas as pd
+import argparse
+from pathlib import Path
+
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
 from sklearn.metrics import confusion_matrix, classification_report, precision_score, recall_score
 
-DATA_PATH = "data/normalized_emails.csv"
+from dataset_io import default_path, load_emails
+from prefilter import LEGIT_THRESHOLD, MODEL_PATH, PHISH_THRESHOLD, email_text
+
+DATA_PATH = default_path()
 
 if __name__ == "__main__":
-    df = pd.read_csv(DATA_PATH, low_memory=False)
+    ap = argparse.ArgumentParser(description="Train the TF-IDF + LogisticRegression baseline / cascade prefilter.")
+    ap.add_argument("--data", default=DATA_PATH)
+    ap.add_argument("--model-out", default=MODEL_PATH, help="where to save the fitted model ('' to skip)")
+    ap.add_argument("--phish-threshold", type=float, default=PHISH_THRESHOLD)
+    ap.add_argument("--legit-threshold", type=float, default=LEGIT_THRESHOLD)
+    args = ap.parse_args()
+
+    df = load_emails(args.data, columns=["subject", "body", "label"])
 
     # Clean + standardize labels
     df["label"] = df["label"].astype(str).str.strip().str.lower()
     df = df[df["label"].isin(["phishing", "legitimate"])].copy()
 
-    # Use raw_text (subject+body) as input
-    X = df["raw_text"].astype(str).fillna("")
+    # Same subject+body text the prefilter sees at inference time
+    X = [email_text(s, b) for s, b in zip(df["subject"], df["body"])]
     y = df["label"]
 
     # Train/test split with stratification
@@ -22,23 +35,20 @@ if __name__ == "__main__":
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    # TF-IDF features
-    vectorizer = TfidfVectorizer(
-        lowercase=True,
-        stop_words="english",
-        max_features=50000,
-        ngram_range=(1, 2),
-        min_df=2
-    )
+    # TF-IDF features + Logistic Regression baseline
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(
+            lowercase=True,
+            stop_words="english",
+            max_features=50000,
+            ngram_range=(1, 2),
+            min_df=2
+        )),
+        ("clf", LogisticRegression(max_iter=2000, n_jobs=-1)),
+    ])
+    model.fit(X_train, y_train)
 
-    X_train_vec = vectorizer.fit_transform(X_train)
-    X_test_vec = vectorizer.transform(X_test)
-
-    # Logistic Regression baseline
-    clf = LogisticRegression(max_iter=2000, n_jobs=-1)
-    clf.fit(X_train_vec, y_train)
-
-    y_pred = clf.predict(X_test_vec)
+    y_pred = model.predict(X_test)
 
     print("=== BASELINE: TF-IDF + Logistic Regression ===")
     print("Test size:", len(y_test))
@@ -52,4 +62,33 @@ if __name__ == "__main__":
     print("Recall   :", round(rec, 4))
 
     print("\n=== CLASSIFICATION REPORT ===")
-    print(classification_report(y_test, y_pred))
\ No newline at end of file
+    print(classification_report(y_test, y_pred))
+
+    # -------------------------------------------------
+    # Cascade coverage at the chosen thresholds
+    # -------------------------------------------------
+
+    phish_idx = list(model.classes_).index("phishing")
+    p = model.predict_proba(X_test)[:, phish_idx]
+    y_arr = y_test.to_numpy()
+
+    sure_phish = p >= args.phish_threshold
+    sure_legit = p <= args.legit_threshold
+    decided = sure_phish | sure_legit
+
+    correct = (sure_phish & (y_arr == "phishing")) | (sure_legit & (y_arr == "legitimate"))
+
+    print("\n=== CASCADE (prefilter thresholds) ===")
+    print(f"phish >= {args.phish_threshold}, legit <= {args.legit_threshold}")
+    print("Decided by prefilter:", round(decided.mean(), 4))
+    print("Routed to LLM       :", round(1 - decided.mean(), 4))
+    if decided.any():
+        print("Accuracy on decided :", round(correct.sum() / decided.sum(), 4))
+
+    if args.model_out:
+        import joblib
+
+        out = Path(args.model_out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, out)
+        print(f"\n[SAVED] {out}")
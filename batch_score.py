@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from agents.batching import MicroBatcher, get_batcher, set_batcher
+from agents.llm_client import AsyncOllamaClient, get_client, set_async_client
+from agents.tracing import get_tracer
+from agents.validators import validate_agent_output_checked
+from dataset_io import default_path, iter_rows
+from mail_ingest import is_mail_path, iter_messages
+from near_dup import NearDupIndex, propagate
+from orchestrator import combine_agents
+from pipeline import analyze_email_async, system_prompts
+from run_store import RunStore, make_record, run_config
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+DATA_PATH = default_path()
+OUT_PATH = "data/scores.jsonl"
+
+DEFAULT_CONCURRENCY = 4
+
+# Finished near-duplicate representatives whose results are kept for
+# members that arrive later (least recently used dropped first).
+NEAR_DUP_RESULTS = 10_000
+
+# -------------------------------------------------
+# Metrics
+# -------------------------------------------------
+
+def summarize(y_true: List[str], y_pred: List[str]) -> Dict[str, Any]:
+    """Confusion counts and precision/recall with phishing as positive (unsure = negative)."""
+    tp = sum(t == "phishing" and p == "phishing" for t, p in zip(y_true, y_pred))
+    fn = sum(t == "phishing" and p != "phishing" for t, p in zip(y_true, y_pred))
+    fp = sum(t == "legitimate" and p == "phishing" for t, p in zip(y_true, y_pred))
+    tn = sum(t == "legitimate" and p != "phishing" for t, p in zip(y_true, y_pred))
+
+    return {
+        "labeled": tp + fn + fp + tn,
+        "tp": tp,
+        "fn": fn,
+        "fp": fp,
+        "tn": tn,
+        "unsure": sum(p == "unsure" for p in y_pred),
+        "precision": round(tp / (tp + fp), 4) if (tp + fp) else 0.0,
+        "recall": round(tp / (tp + fn), 4) if (tp + fn) else 0.0,
+    }
+
+# -------------------------------------------------
+# Scoring
+# -------------------------------------------------
+
+def _failed_result(error: str) -> Dict[str, Any]:
+    """Fail-safe agents carrying error, so the record is marked failed (and retried)."""
+    agents = {
+        name: validate_agent_output_checked({}, agent_name=name, error=error)[0]
+        for name in ("text", "url", "metadata")
+    }
+    return {"agents": agents, "final": combine_agents(agents["text"], agents["url"], agents["metadata"])}
+
+async def score_row(row: Dict[str, str], cascade: bool, per_agent: bool, batched: bool = False) -> Dict[str, Any]:
+    """
+    Analyze one row; returns a run-store record. An unexpected error is
+    recorded as a failed row rather than ending the whole run.
+    """
+    start = time.perf_counter()
+    try:
+        result = await analyze_email_async(
+            row.get("subject", "") or "",
+            row.get("body", "") or "",
+            row.get("headers_text", "") or "",
+            cascade=cascade,
+            per_agent=per_agent,
+            batched=batched,
+            urls=row.get("urls"),
+        )
+    except Exception as e:
+        print(f"[ERROR] id={row.get('id', '')}: {e!r}", file=sys.stderr)
+        result = _failed_result(repr(e))
+    return make_record(row, result, time.perf_counter() - start)
+
+
+def summary_line(record: Dict[str, Any]) -> Dict[str, Any]:
+    final = record["final"]
+    return {
+        "id": record["id"],
+        "source_dataset": record["source_dataset"],
+        "label": record["label"],
+        "verdict": final["verdict"],
+        "score": final["score"],
+        "decided_by": final.get("decided_by", "llm"),
+        "latency_s": record["latency_s"],
+        "ok": record.get("ok", True),
+    }
+
+
+async def score_stream(
+    rows: Iterator[Dict[str, str]],
+    out,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cascade: bool = True,
+    per_agent: bool = False,
+    store: Optional[RunStore] = None,
+    batch_size: int = 1,
+    batch_wait_ms: float = 50.0,
+    near_dup: Optional[NearDupIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Score rows with at most `concurrency` emails in flight, writing one
+    JSON line per email as soon as it finishes (completion order).
+    With a run store, finished rows are skipped and full records
+    (raw agent outputs included) are checkpointed there.
+    batch_size > 1 micro-batches concurrent emails into shared LLM calls
+    (concurrency should be a few times batch_size to keep batches full).
+    With a near-duplicate index only the first email of each cluster is
+    analyzed; the others wait for it and inherit its verdict, or are
+    analyzed themselves if it fails.
+    Returns the summary lines for the final report.
+    """
+    set_async_client(AsyncOllamaClient.like(get_client(), pool_size=max(concurrency, 1)))
+    batched = batch_size > 1
+    if batched:
+        set_batcher(MicroBatcher(max_batch_size=batch_size, max_wait_ms=batch_wait_ms))
+
+    sem = asyncio.Semaphore(concurrency)
+    pending = set()
+    done: List[Dict[str, Any]] = []
+
+    # Representative id -> future of its analyze_email_async() result while
+    # it is being analyzed; afterwards the result moves to `finished`.
+    cluster_results: Dict[str, asyncio.Future] = {}
+    finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def _one(row, future: Optional[asyncio.Future] = None):
+        # future is set when row represents a near-duplicate cluster.
+        row_id = str(row.get("id", ""))
+        try:
+            record = await score_row(row, cascade, per_agent, batched)
+        except BaseException as e:
+            if future is not None:
+                if cluster_results.get(row_id) is future:
+                    del cluster_results[row_id]
+                future.set_exception(e)
+            raise
+        finally:
+            sem.release()
+        if future is not None:
+            result = {"agents": record["agents"], "final": record["final"]}
+            if cluster_results.get(row_id) is future:
+                del cluster_results[row_id]
+            # A failed result is not kept for later members: they are
+            # analyzed themselves instead of inheriting the failure.
+            if record["ok"]:
+                finished[row_id] = result
+                if len(finished) > NEAR_DUP_RESULTS:
+                    finished.popitem(last=False)
+            future.set_result(result)
+        _finish(record)
+
+    async def _member(row, source: Union[asyncio.Future, Dict[str, Any]], rep_id, similarity):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.shield(source) if isinstance(source, asyncio.Future) else source
+        except Exception:
+            result = None
+        if result is not None:
+            record = make_record(row, propagate(result, rep_id, similarity), time.perf_counter() - start)
+            if record["ok"]:
+                _finish(record)
+                return
+        # The representative raised or failed: analyze this email itself.
+        await sem.acquire()
+        await _one(row)
+
+    def _finish(record):
+        if store is not None:
+            store.append(record)
+        rec = summary_line(record)
+        out.write(json.dumps(rec) + "\n")
+        out.flush()
+        done.append(rec)
+        n = len(done)
+        if n % 50 == 0:
+            print(f"[{n}] scored", file=sys.stderr)
+
+    loop = asyncio.get_running_loop()
+    for row in rows:
+        if store is not None and store.is_done(row.get("id", "")):
+            continue
+
+        future = None
+        if near_dup is not None:
+            row_id = str(row.get("id", ""))
+            rep_id, similarity = near_dup.assign(
+                row_id, row.get("subject", ""), row.get("body", ""),
+                urls=row.get("urls"), headers_text=row.get("headers_text", "") or "",
+            )
+            # An id seen before (an exact copy, e.g. --keep-duplicates) is
+            # its own representative: it shares the first copy's result.
+            source = cluster_results.get(rep_id)
+            if source is None and rep_id in finished:
+                finished.move_to_end(rep_id)
+                source = finished[rep_id]
+            if source is not None:
+                # Members do not take a concurrency slot: they make no LLM call.
+                task = asyncio.create_task(_member(row, source, rep_id, similarity))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                continue
+            if rep_id == row_id:
+                future = cluster_results[row_id] = loop.create_future()
+            # Otherwise the representative's result was dropped or failed: analyze it.
+
+        await sem.acquire()
+        task = asyncio.create_task(_one(row, future))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    if batched:
+        print(f"[BATCH] {get_batcher().stats()}", file=sys.stderr)
+    if near_dup is not None:
+        print(f"[NEAR-DUP] {near_dup.stats()}", file=sys.stderr)
+    return done
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Score the normalized emails (Parquet or CSV) or an mbox / .eml directory with the phishing pipeline.")
+    ap.add_argument("--input", default=DATA_PATH,
+                    help="normalized dataset, or real mail: an mbox file, .eml file or directory of .eml")
+    ap.add_argument("--output", default=OUT_PATH, help="JSONL results, written incrementally")
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="max in-flight emails")
+    ap.add_argument("--limit", type=int, default=None, help="stop after N rows (default: all)")
+    ap.add_argument("--per-agent", action="store_true", help="three concurrent agent calls instead of one unified call")
+    ap.add_argument("--no-cascade", action="store_true", help="skip the TF-IDF prefilter")
+    ap.add_argument("--run-dir", default=None, help="checkpoint full results here and resume from it")
+    ap.add_argument("--batch-size", type=int, default=1, help="micro-batch up to N emails per LLM call (1 = off)")
+    ap.add_argument("--batch-wait-ms", type=float, default=50.0, help="max time an email waits for its batch to fill")
+    ap.add_argument("--near-dup", type=float, default=None, metavar="THRESHOLD",
+                    help="score one email per near-duplicate cluster (MinHash similarity >= THRESHOLD, e.g. 0.8)")
+    args = ap.parse_args(argv)
+
+    store = None
+    if args.run_dir:
+        store = RunStore(args.run_dir, run_config(
+            per_agent=args.per_agent, cascade=not args.no_cascade, batched=args.batch_size > 1,
+        ))
+        print(f"[RESUME] {len(store.done_ids())} rows already done in {args.run_dir}", file=sys.stderr)
+
+    warm = get_client().warm_up(system_prompts(per_agent=args.per_agent, batched=args.batch_size > 1))
+    print(f"[WARM-UP] {warm}", file=sys.stderr)
+
+    mail_stats = {}
+    if is_mail_path(args.input):
+        rows = iter_messages(args.input, limit=args.limit, stats=mail_stats)
+    else:
+        rows = iter_rows(args.input, limit=args.limit)
+
+    start = time.perf_counter()
+    with open(args.output, "a" if store else "w", encoding="utf-8") as out:
+        records = asyncio.run(score_stream(
+            rows,
+            out,
+            concurrency=args.concurrency,
+            cascade=not args.no_cascade,
+            per_agent=args.per_agent,
+            store=store,
+            batch_size=args.batch_size,
+            batch_wait_ms=args.batch_wait_ms,
+            near_dup=NearDupIndex(threshold=args.near_dup) if args.near_dup else None,
+        ))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n[DONE] {len(records)} emails in {elapsed:.1f}s "
+          f"({len(records) / elapsed if elapsed else 0:.2f} emails/s) -> {args.output}")
+    if mail_stats.get("skipped"):
+        print(f"[SKIPPED] {mail_stats['skipped']} messages could not be parsed")
+    failed = sum(not r["ok"] for r in records)
+    if failed:
+        print(f"[FAILED] {failed} emails hit LLM or answer errors and are not scored"
+              + ("; rerun with the same --run-dir to retry them" if store else ""))
+
+    # Metrics cover every finished row of a resumed run, not just this session.
+    if store is not None:
+        records = [summary_line(r) for r in store.iter_records()]
+        store.close()
+
+    labeled = [r for r in records if r["ok"] and r["label"] in ("phishing", "legitimate")]
+    if labeled:
+        print("\n=== METRICS (phishing as positive) ===")
+        for k, v in summarize([r["label"] for r in labeled], [r["verdict"] for r in labeled]).items():
+            print(f"{k:<10}: {v}")
+
+    print("\n=== LLM CLIENT ===")
+    for k, v in get_client().stats.snapshot().items():
+        print(f"{k:<15}: {v}")
+    if len(get_client().pool.backends) > 1:
+        for backend in get_client().pool.stats():
+            print(f"backend        : {backend}")
+
+    print("\n=== TIME BREAKDOWN (s) ===")
+    for k, v in get_tracer().breakdown().items():
+        print(f"{k:<22}: {v}")
+
+    print("\n=== PROMPT REUSE ===")
+    for agent, v in get_tracer().prompt_reuse().items():
+        print(f"{agent:<10}: {v}")
+
+
+if __name__ == "__main__":
+    main()
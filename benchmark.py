@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.batching import MicroBatcher, set_batcher
+from agents.cache import set_cache
+from agents.llm_client import OllamaClient, get_client, set_client
+from agents.tracing import get_tracer
+from mock_ollama import LATENCY_DISTRIBUTIONS, MockConfig, start_mock_server
+from orchestrator import combine_agents
+from pipeline import analyze_email, analyze_email_async, system_prompts
+
+# -------------------------------------------------
+# Workload
+# -------------------------------------------------
+
+SAMPLE_EMAILS = [
+    (
+        "Important: Verify your account immediately",
+        "Dear user,\n\nWe detected unusual activity in your account. "
+        "Please verify your password within 24 hours.\n\n"
+        "Visit https://secure-login.example-{i}.com/verify?session={i} to continue.",
+    ),
+    (
+        "Team lunch on Friday",
+        "Hi all,\n\nWe're doing lunch at noon on Friday. "
+        "Menu is at https://bit.ly/lunch{i} - reply if you have allergies.\n\nThanks",
+    ),
+    (
+        "Your invoice #{i}",
+        "Hello,\n\nPlease find your invoice attached. "
+        "You can also view it online at https://billing.vendor{i}.com/invoices/{i}.\n\nRegards",
+    ),
+]
+
+
+def make_emails(n: int, input_path: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """(subject, body, headers_text) triples; synthetic ones are made unique per index."""
+    if input_path:
+        from dataset_io import iter_rows
+
+        return [
+            (r.get("subject", ""), r.get("body", ""), r.get("headers_text", ""))
+            for r in iter_rows(input_path, limit=n)
+        ]
+
+    out = []
+    for i in range(n):
+        subject, body = SAMPLE_EMAILS[i % len(SAMPLE_EMAILS)]
+        out.append((subject.format(i=i), body.format(i=i), ""))
+    return out
+
+# -------------------------------------------------
+# Measurement helpers
+# -------------------------------------------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(name: str, latencies: List[float], wall_s: float, cpu_s: float) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    n = len(lat)
+    return {
+        "bench": name,
+        "emails": n,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "emails_per_s": round(n / wall_s, 2) if wall_s else 0.0,
+        "cpu_ms_per_email": round(cpu_s / n * 1000, 3) if n else 0.0,
+    }
+
+# -------------------------------------------------
+# Benchmarks
+# -------------------------------------------------
+
+def bench_unified(emails, concurrency: int) -> Dict[str, Any]:
+    """Serial unified path (one call per email) driven from a thread pool."""
+
+    def _one(email):
+        start = time.perf_counter()
+        analyze_email(*email, cascade=False)
+        return time.perf_counter() - start
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(_one, emails))
+    return summarize("unified", latencies, time.perf_counter() - t0, time.process_time() - cpu0)
+
+
+def _bench_async(name: str, emails, concurrency: int, batch_size: int = 1) -> Dict[str, Any]:
+    async def _run():
+        if batch_size > 1:
+            set_batcher(MicroBatcher(max_batch_size=batch_size))
+        sem = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def _one(email):
+            async with sem:
+                start = time.perf_counter()
+                await analyze_email_async(*email, cascade=False, per_agent=True, batched=batch_size > 1)
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(_one(e) for e in emails))
+        return latencies
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    latencies = asyncio.run(_run())
+    return summarize(name, latencies, time.perf_counter() - t0, time.process_time() - cpu0)
+
+
+def bench_per_agent(emails, concurrency: int) -> Dict[str, Any]:
+    """Async per-agent path (text/url/metadata in parallel) with bounded concurrency."""
+    return _bench_async("per_agent", emails, concurrency)
+
+
+def bench_batched(emails, concurrency: int, batch_size: int) -> Dict[str, Any]:
+    """Async path with concurrent emails micro-batched into shared unified calls."""
+    return _bench_async(f"batched[{batch_size}]", emails, concurrency, batch_size)
+
+
+def bench_combine(n: int) -> Dict[str, Any]:
+    """combine_agents() alone: pure orchestration overhead."""
+    agent = {
+        "verdict": "phishing",
+        "confidence": 0.8,
+        "phishing_indicators": ["credential_harvesting"],
+        "legitimacy_indicators": [],
+        "evidence": [{"indicator": "credential_harvesting", "text_quote": "x", "explanation": "y"}],
+    }
+    meta = dict(agent, verdict="unsure", confidence=0.0, phishing_indicators=[])
+
+    latencies = []
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    for _ in range(n):
+        start = time.perf_counter()
+        combine_agents(agent, agent, meta)
+        latencies.append(time.perf_counter() - start)
+    return summarize("combine_agents", latencies, time.perf_counter() - t0, time.process_time() - cpu0)
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="End-to-end throughput benchmark for the phishing pipeline.")
+    ap.add_argument("--bench", nargs="+", default=["unified", "per_agent", "combine"],
+                    choices=["unified", "per_agent", "batched", "combine"])
+    ap.add_argument("--emails", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--batch-size", type=int, default=8, help="emails per call for --bench batched")
+    ap.add_argument("--input", default=None, help="take emails from the normalized dataset (Parquet or CSV) instead of synthetic ones")
+    ap.add_argument("--base-url", default=None, help="benchmark real servers (comma separated) instead of the built-in mock")
+    ap.add_argument("--mock-backends", type=int, default=1, help="number of mock servers to balance over")
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    ap.add_argument("--jitter", type=float, default=0.5)
+    ap.add_argument("--failure-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--with-cache", action="store_true", help="keep the verdict cache enabled")
+    ap.add_argument("--json", default=None, help="append results as JSON lines (for regression tracking)")
+    ap.add_argument("--metrics-out", default=None, help="write per-stage metrics in Prometheus text format")
+    args = ap.parse_args(argv)
+
+    servers = []
+    base_url = args.base_url
+    if base_url is None:
+        urls = []
+        for i in range(max(args.mock_backends, 1)):
+            server, url = start_mock_server(0, MockConfig(
+                latency_ms=args.latency_ms,
+                distribution=args.distribution,
+                jitter=args.jitter,
+                failure_rate=args.failure_rate,
+                malformed_rate=args.malformed_rate,
+                seed=i,
+            ))
+            servers.append(server)
+            urls.append(url)
+        base_url = ",".join(urls)
+
+    set_client(OllamaClient(base_url=base_url, pool_size=max(args.concurrency, 1), backoff_seconds=0.0))
+    if not args.with_cache:
+        set_cache(None)
+
+    emails = make_emails(args.emails, args.input)
+
+    # Measure steady state: model loaded and system prompts cached.
+    prompts = []
+    for name in args.bench:
+        if name != "combine":
+            prompts += system_prompts(per_agent=name == "per_agent", batched=name == "batched")
+    if prompts:
+        get_client().warm_up(list(dict.fromkeys(prompts)))
+    get_client().stats.reset()
+    get_tracer().reset()
+
+    results = []
+    for name in args.bench:
+        if name == "unified":
+            results.append(bench_unified(emails, args.concurrency))
+        elif name == "per_agent":
+            results.append(bench_per_agent(emails, args.concurrency))
+        elif name == "batched":
+            results.append(bench_batched(emails, args.concurrency, args.batch_size))
+        else:
+            results.append(bench_combine(max(args.emails, 10_000)))
+
+    cols = ["bench", "emails", "p50_ms", "p95_ms", "p99_ms", "emails_per_s", "cpu_ms_per_email"]
+    print(f"backend={base_url} concurrency={args.concurrency}")
+    print("  ".join(f"{c:>16}" for c in cols))
+    for r in results:
+        print("  ".join(f"{r[c]!s:>16}" for c in cols))
+
+    print("\nLLM client:", get_client().stats.snapshot())
+    for backend in get_client().pool.stats():
+        print("  backend:", backend)
+
+    tracer = get_tracer()
+    print("Time breakdown:", tracer.breakdown())
+    print("Prompt reuse:", tracer.prompt_reuse())
+    for stage, agg in tracer.snapshot()["stages"].items():
+        print(f"  {stage:<24} n={agg['count']:<7} avg={agg['avg_ms']:>9.3f}ms  max={agg['max_ms']:>9.3f}ms")
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(tracer.export_prometheus())
+
+    if args.json:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(args.json, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({"time": stamp, "concurrency": args.concurrency, **r}) + "\n")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import pytest
+
+from agents.cache import set_cache
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache():
+    """Tests never read or write the on-disk verdict cache."""
+    set_cache(None)
+    yield
+    set_cache(None)
@@ -0,0 +1,108 @@
+import csv
+import hashlib
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# -------------------------------------------------
+# Locations
+# -------------------------------------------------
+
+# normalize_datasets.py writes one of these: a Parquet dataset partitioned
+# by source_dataset (default) or a single CSV (--format csv).
+PARQUET_DIR = "data/normalized"
+CSV_PATH = "data/normalized_emails.csv"
+
+COLUMNS = ["id", "source_dataset", "subject", "body", "label"]
+
+def default_path() -> str:
+    """The Parquet dataset when it exists, else the CSV."""
+    return PARQUET_DIR if Path(PARQUET_DIR).exists() else CSV_PATH
+
+def is_parquet(path: str) -> bool:
+    p = Path(path)
+    return p.is_dir() or p.suffix == ".parquet"
+
+def _parquet_dataset(path: str):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+# -------------------------------------------------
+# Ids
+# -------------------------------------------------
+
+def content_id(subject: str, body: str) -> str:
+    """
+    Stable id of an email: blake2b of its subject and body with whitespace
+    collapsed. The same email gets the same id in every dataset and run.
+    """
+    text = " ".join((subject or "").split()) + "\n" + " ".join((body or "").split())
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+# -------------------------------------------------
+# Loading
+# -------------------------------------------------
+
+def load_emails(path: Optional[str] = None, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+    """
+    Normalized emails as a DataFrame of strings ('' for missing values).
+    Only `columns` are read; requested columns the data lacks (e.g.
+    headers_text) come back empty.
+    """
+    import pandas as pd  # imported here so row-level users start fast
+
+    path = path or default_path()
+
+    if is_parquet(path):
+        dataset = _parquet_dataset(path)
+        names = dataset.schema.names
+        cols = [c for c in columns if c in names] if columns else None
+        df = dataset.to_table(columns=cols).to_pandas()
+        df = df.astype({c: str for c in df.columns if c == "source_dataset"})
+    else:
+        wanted = set(columns) if columns else None
+        df = pd.read_csv(
+            path,
+            usecols=(lambda c: c in wanted) if wanted else None,
+            dtype=str,
+            low_memory=False,
+            encoding_errors="ignore",
+        )
+
+    for c in columns or ():
+        if c not in df.columns:
+            df[c] = ""
+    return df[columns].fillna("") if columns else df.fillna("")
+
+def iter_rows(
+    path: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 10_000,
+) -> Iterator[Dict[str, str]]:
+    """Stream rows as dicts without loading the whole dataset into memory."""
+    path = path or default_path()
+    count = 0
+
+    if is_parquet(path):
+        dataset = _parquet_dataset(path)
+        cols = [c for c in columns if c in dataset.schema.names] if columns else None
+        for batch in dataset.to_batches(columns=cols, batch_size=batch_size):
+            for row in batch.to_pylist():
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield {k: "" if v is None else str(v) for k, v in row.items()}
+        return
+
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+        for row in csv.DictReader(f):
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield {k: v for k, v in row.items() if k in columns} if columns else row
@@ -0,0 +1,290 @@
+import argparse
+import bisect
+import os
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dataset_io import default_path, iter_rows
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+STORE_PATH = "data/emails.sqlite"
+
+FIELDS = ["id", "source_dataset", "label", "subject", "body", "headers_text"]
+
+# -------------------------------------------------
+# Store
+# -------------------------------------------------
+
+class EmailStore:
+    """
+    Indexed, on-disk copy of the normalized emails. Lookups by id and
+    samples touch only the rows asked for, so opening the store and
+    drawing a few emails costs the same for any corpus size.
+
+    Rows are numbered 0..n-1 within their (label, source_dataset)
+    stratum; a sample draws random positions and fetches those rows
+    through the (label, source_dataset, pos) index.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS emails (
+                id TEXT PRIMARY KEY,
+                source_dataset TEXT NOT NULL,
+                label TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                headers_text TEXT NOT NULL,
+                pos INTEGER NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_emails_stratum ON emails(label, source_dataset, pos);
+            CREATE TABLE IF NOT EXISTS strata (
+                label TEXT NOT NULL,
+                source_dataset TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (label, source_dataset)
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(self.strata().values())
+
+    def meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # --- building ---
+
+    def load(self, rows, source: str = "") -> int:
+        """Replace the store's contents with rows (dicts); returns the number stored."""
+        counts: Dict[Tuple[str, str], int] = {}
+        conn = self._conn
+        with conn:
+            conn.execute("DELETE FROM emails")
+            conn.execute("DELETE FROM strata")
+            for row in rows:
+                label = str(row.get("label", "") or "").strip().lower()
+                src = str(row.get("source_dataset", "") or "")
+                pos = counts.get((label, src), 0)
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO emails VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        str(row.get("id", "")), src, label,
+                        row.get("subject", "") or "", row.get("body", "") or "",
+                        row.get("headers_text", "") or "", pos,
+                    ),
+                )
+                if cur.rowcount:  # repeated ids keep their first row
+                    counts[(label, src)] = pos + 1
+            conn.executemany(
+                "INSERT INTO strata VALUES (?, ?, ?)",
+                [(label, src, n) for (label, src), n in counts.items()],
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (source,))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', ?)", (str(time.time()),))
+        return sum(counts.values())
+
+    # --- reading ---
+
+    def get(self, email_id: str) -> Optional[Dict[str, str]]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(FIELDS)} FROM emails WHERE id = ?", (email_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def strata(self, label: Optional[str] = None, source_dataset: Optional[str] = None) -> Dict[Tuple[str, str], int]:
+        """(label, source_dataset) -> row count, optionally filtered."""
+        return {
+            (r["label"], r["source_dataset"]): r["n"]
+            for r in self._conn.execute("SELECT label, source_dataset, n FROM strata ORDER BY label, source_dataset")
+            if (label is None or r["label"] == label)
+            and (source_dataset is None or r["source_dataset"] == source_dataset)
+        }
+
+    def label_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for (label, _), n in self.strata().items():
+            counts[label] = counts.get(label, 0) + n
+        return counts
+
+    def sample(
+        self,
+        n: int,
+        label: Optional[str] = None,
+        source_dataset: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Up to n rows drawn uniformly without replacement from the rows
+        matching label / source_dataset (each None = any).
+        """
+        strata = list(self.strata(label, source_dataset).items())
+        total = sum(count for _, count in strata)
+        if total == 0 or n <= 0:
+            return []
+
+        bounds = []
+        acc = 0
+        for _, count in strata:
+            acc += count
+            bounds.append(acc)
+
+        picks: Dict[int, List[int]] = {}
+        for k in random.Random(seed).sample(range(total), min(n, total)):
+            i = bisect.bisect_right(bounds, k)
+            picks.setdefault(i, []).append(k - (bounds[i - 1] if i else 0))
+
+        out = []
+        for i, positions in picks.items():
+            (lab, src), _ = strata[i]
+            marks = ", ".join("?" * len(positions))
+            out += [
+                dict(r) for r in self._conn.execute(
+                    f"SELECT {', '.join(FIELDS)} FROM emails "
+                    f"WHERE label = ? AND source_dataset = ? AND pos IN ({marks})",
+                    (lab, src, *positions),
+                )
+            ]
+        random.Random(seed).shuffle(out)
+        return out
+
+    def stratified_sample(
+        self,
+        per_label: Dict[str, int],
+        by_source: bool = False,
+        seed: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        per_label[label] rows of each label. With by_source, each label's
+        quota is split across source datasets in proportion to their size.
+        """
+        out = []
+        for label, n in per_label.items():
+            if not by_source:
+                out += self.sample(n, label=label, seed=seed)
+                continue
+            strata = self.strata(label)
+            total = sum(strata.values())
+            for (_, src), count in strata.items():
+                quota = round(n * count / total) if total else 0
+                out += self.sample(quota, label=label, source_dataset=src, seed=seed)
+        return out
+
+    def iter_rows(
+        self,
+        label: Optional[str] = None,
+        source_dataset: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, str]]:
+        """Stream rows (optionally of one label / source) in stratum order."""
+        where, params = [], []
+        if label is not None:
+            where.append("label = ?")
+            params.append(label)
+        if source_dataset is not None:
+            where.append("source_dataset = ?")
+            params.append(source_dataset)
+        sql = f"SELECT {', '.join(FIELDS)} FROM emails"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY label, source_dataset, pos"
+
+        cur = self._conn.execute(sql, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            for r in batch:
+                yield dict(r)
+
+# -------------------------------------------------
+# Opening / building
+# -------------------------------------------------
+
+def _mtime(path: str) -> float:
+    p = Path(path)
+    if not p.exists():
+        return 0.0
+    if p.is_dir():
+        return max([p.stat().st_mtime] + [f.stat().st_mtime for f in p.rglob("*")])
+    return p.stat().st_mtime
+
+def _signature(path: str) -> str:
+    """Total size and newest mtime of a dataset file or directory."""
+    p = Path(path)
+    files = [f for f in p.rglob("*") if f.is_file()] if p.is_dir() else [p] if p.exists() else []
+    return f"{sum(f.stat().st_size for f in files)}:{_mtime(path)}"
+
+def build_store(src: Optional[str] = None, path: str = STORE_PATH) -> int:
+    """(Re)build the store at path from the normalized dataset src."""
+    src = src or default_path()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Build next to the old store and swap, so readers never see it half-built.
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    with EmailStore(tmp) as store:
+        n = store.load(iter_rows(src), source=os.path.abspath(src))
+        with store._conn:
+            store._conn.execute("INSERT OR REPLACE INTO meta VALUES ('source_sig', ?)", (_signature(src),))
+    os.replace(tmp, path)
+    return n
+
+def open_store(src: Optional[str] = None, path: str = STORE_PATH) -> EmailStore:
+    """
+    Open the store, building it first when it is missing or was built
+    from a different dataset, or from an earlier version of this one
+    (size or mtime changed) - a one-off cost per normalization run.
+    """
+    src = src or default_path()
+    stale = True
+    if os.path.exists(path):
+        with EmailStore(path) as store:
+            stale = (store.meta("source") != os.path.abspath(src)
+                     or store.meta("source_sig") != _signature(src))
+    if stale:
+        start = time.perf_counter()
+        n = build_store(src, path)
+        print(f"[STORE] indexed {n} emails from {src} -> {path} "
+              f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+    return EmailStore(path)
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build or inspect the indexed email store.")
+    ap.add_argument("--src", default=None, help="normalized dataset (default: Parquet dir, else CSV)")
+    ap.add_argument("--path", default=STORE_PATH)
+    ap.add_argument("--rebuild", action="store_true")
+    args = ap.parse_args()
+
+    if args.rebuild:
+        build_store(args.src, args.path)
+    with open_store(args.src, args.path) as store:
+        print(f"{len(store)} emails in {args.path}")
+        for (label, src), n in store.strata().items():
+            print(f"  {label or '(none)':<12} {src:<16} {n}")
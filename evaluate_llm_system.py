@@ -1,84 +1,49 @@
+import argparse
+import time
+
 import pandas as pd
 
-from agents.unified_agent import run_unified_agent
-from agents.url_agent import extract_urls_from_text
-from orchestrator import combine_agents
+from agents.cache import get_cache
+from agents.llm_client import get_client
+from agents.tracing import get_tracer
+from dataset_io import default_path
+from email_store import open_store
+from pipeline import analyze_email
+from prefilter import get_prefilter
+from run_store import RunStore, make_record, rescore_record, run_config
 
 # -------------------------------------------------
 # Config
 # -------------------------------------------------
 
-DATA_PATH = "data/normalized_emails.csv"
+DATA_PATH = default_path()
 
 N_PHISH = 10
 N_LEGIT = 10
 
+# Route through the TF-IDF prefilter first. Off by default: this script
+# measures the LLM agents, and the prefilter was trained on this data.
+CASCADE = False
+
 # -------------------------------------------------
 # Single-row runner
 # -------------------------------------------------
 
 def run_one(row):
+    """Analyze one row; returns a run-store record (agent outputs, final, latency)."""
     subject = str(row.get("subject", ""))
     body = str(row.get("body", ""))
     headers_text = str(row.get("headers_text", ""))
 
-    urls = extract_urls_from_text(body)
-
-    unified = run_unified_agent(
-        subject=subject,
-        body=body,
-        urls=urls,
-        headers_text=headers_text,
-    )
-
-    final = combine_agents(
-        unified["text"],
-        unified["url"],
-        unified["metadata"],
-    )
-
-    return final["verdict"]
+    start = time.perf_counter()
+    result = analyze_email(subject, body, headers_text, cascade=CASCADE)
+    return make_record(row, result, time.perf_counter() - start)
 
 # -------------------------------------------------
-# Main evaluation
+# Metrics
 # -------------------------------------------------
 
-if __name__ == "__main__":
-    df = pd.read_csv(
-        DATA_PATH,
-        dtype=str,
-        low_memory=False,
-        encoding_errors="ignore",
-    ).fillna("")
-
-    df["label"] = df["label"].str.strip().str.lower()
-
-    print("LABEL COUNTS:")
-    print(df["label"].value_counts().head(10))
-
-    phish_pool = df[df["label"] == "phishing"]
-    legit_pool = df[df["label"] == "legitimate"]
-
-    if len(phish_pool) == 0 or len(legit_pool) == 0:
-        raise RuntimeError("Not enough labeled data to evaluate.")
-
-    df_phish = phish_pool.sample(min(N_PHISH, len(phish_pool)), random_state=42)
-    df_legit = legit_pool.sample(min(N_LEGIT, len(legit_pool)), random_state=42)
-
-    test_df = pd.concat([df_phish, df_legit], ignore_index=True)
-
-    y_true = []
-    y_pred = []
-
-    for i, row in test_df.iterrows():
-        true_label = row["label"]
-        pred = run_one(row)
-
-        y_true.append(true_label)
-        y_pred.append(pred)
-
-        print(f"[{i+1}/{len(test_df)}] true={true_label} pred={pred}")
-
+def print_metrics(y_true, y_pred):
     # -------------------------------------------------
     # Confusion matrix
     # -------------------------------------------------
@@ -118,3 +83,102 @@ if __name__ == "__main__":
     print("\n=== METRICS (phishing as positive) ===")
     print("Precision:", round(precision, 3))
     print("Recall   :", round(recall, 3))
+
+# -------------------------------------------------
+# Main evaluation
+# -------------------------------------------------
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Evaluate the LLM phishing pipeline on a labeled sample.")
+    ap.add_argument("--data", default=DATA_PATH)
+    ap.add_argument("--n-phish", type=int, default=N_PHISH)
+    ap.add_argument("--n-legit", type=int, default=N_LEGIT)
+    ap.add_argument("--run-dir", default=None,
+                    help="persist per-row results here; rerunning skips finished rows")
+    ap.add_argument("--rescore", action="store_true",
+                    help="recompute verdicts from stored agent outputs with current combine_agents settings (no LLM calls)")
+    args = ap.parse_args()
+
+    store = RunStore(args.run_dir, run_config(per_agent=False, cascade=CASCADE)) if args.run_dir else None
+
+    if args.rescore:
+        if store is None:
+            raise SystemExit("--rescore needs --run-dir")
+        records = list(store.iter_records())
+        print(f"[RESCORE] {len(records)} stored rows from {args.run_dir}")
+        print_metrics(
+            [r["label"] for r in records],
+            [rescore_record(r)["verdict"] for r in records],
+        )
+        raise SystemExit(0)
+
+    with open_store(args.data) as emails:
+        label_counts = emails.label_counts()
+        print("LABEL COUNTS:")
+        for label, n in sorted(label_counts.items(), key=lambda kv: -kv[1])[:10]:
+            print(f"{label or '(none)':<12} {n}")
+
+        if not label_counts.get("phishing") or not label_counts.get("legitimate"):
+            raise RuntimeError("Not enough labeled data to evaluate.")
+
+        test_rows = emails.stratified_sample({"phishing": args.n_phish, "legitimate": args.n_legit}, seed=42)
+
+    records = {}
+
+    for i, row in enumerate(test_rows):
+        true_label = row["label"]
+
+        if store is not None and store.is_done(row["id"]):
+            print(f"[{i+1}/{len(test_rows)}] id={row['id']} already done, skipping")
+            continue
+
+        rec = run_one(row)
+        records[rec["id"]] = rec
+        if store is not None:
+            store.append(rec)
+
+        status = "" if rec["ok"] else f" FAILED {rec['errors']}"
+        print(f"[{i+1}/{len(test_rows)}] true={true_label} pred={rec['final']['verdict']}{status}")
+
+    # Failed rows hold the fail-safe "unsure", not an answer: they are left
+    # out of the metrics (and a run directory retries them next time).
+    failed = [r["id"] for r in records.values() if not r["ok"]]
+    records = {k: r for k, r in records.items() if r["ok"]}
+    if failed:
+        print(f"\n[FAILED] {len(failed)} rows not scored: {failed}")
+
+    # Metrics come from disk when a run directory is used, so an
+    # interrupted-and-resumed run reports on every finished row.
+    if store is not None:
+        wanted = {row["id"] for row in test_rows}
+        records = {r["id"]: r for r in store.iter_records() if r["id"] in wanted}
+        store.close()
+
+    y_true = [r["label"] for r in records.values()]
+    y_pred = [r["final"]["verdict"] for r in records.values()]
+
+    print_metrics(y_true, y_pred)
+
+    latencies = sorted(r["latency_s"] for r in records.values())
+    if latencies:
+        print("Median latency (s):", latencies[len(latencies) // 2])
+
+    print("\n=== LLM CLIENT ===")
+    for k, v in get_client().stats.snapshot().items():
+        print(f"{k:<15}: {v}")
+
+    print("\n=== TIME BREAKDOWN (s) ===")
+    for k, v in get_tracer().breakdown().items():
+        print(f"{k:<22}: {v}")
+
+    prefilter = get_prefilter()
+    if CASCADE and prefilter:
+        print("\n=== CASCADE PREFILTER ===")
+        for k, v in prefilter.stats().items():
+            print(f"{k:<18}: {v}")
+
+    cache = get_cache()
+    if cache:
+        print("\n=== VERDICT CACHE ===")
+        for k, v in cache.stats().items():
+            print(f"{k:<15}: {v}")
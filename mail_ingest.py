@@ -0,0 +1,261 @@
+"""
+Read real mail: mbox files, .eml files, and directories of .eml.
+
+Messages are yielded one at a time as rows shaped like the normalized
+dataset (id, source_dataset, subject, body, headers_text, label) plus
+the URLs found in the message, including HTML hrefs that a text
+conversion would lose. A mailbox is read line by line, so its size
+does not matter; only the current message is held in memory.
+
+    python mail_ingest.py inbox.mbox --limit 5
+"""
+
+import argparse
+import codecs
+import hashlib
+import json
+import os
+import sys
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+# Messages larger than this (mostly attachments) are skipped, not parsed.
+MAX_MESSAGE_BYTES = int(os.environ.get("MAIL_MAX_MESSAGE_BYTES", str(25 * 1024 * 1024)))
+
+EML_SUFFIXES = (".eml",)
+
+_parser = BytesParser(policy=policy.default)
+
+# -------------------------------------------------
+# HTML
+# -------------------------------------------------
+
+class _HTMLText(HTMLParser):
+    """Visible text and link targets of an HTML part."""
+
+    _SKIP = {"script", "style", "head", "title"}
+    _BREAK = {"br", "p", "div", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table"}
+    _LINK_ATTRS = {("a", "href"), ("area", "href"), ("form", "action"), ("img", "src"), ("iframe", "src")}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text: List[str] = []
+        self.urls: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skip += 1
+        elif tag in self._BREAK:
+            self.text.append("\n")
+        for name, value in attrs:
+            if (tag, name) in self._LINK_ATTRS and value and value.strip().lower().startswith(("http://", "https://")):
+                self.urls.append(value.strip())
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self._SKIP:
+            self._skip -= 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self._BREAK:
+            self.text.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.text.append(data)
+
+def html_to_text(html: str) -> Tuple[str, List[str]]:
+    """(visible text, link URLs) of an HTML document."""
+    p = _HTMLText()
+    try:
+        p.feed(html)
+        p.close()
+    except Exception:  # malformed markup: keep whatever was parsed
+        pass
+    lines = (" ".join(line.split()) for line in "".join(p.text).split("\n"))
+    return "\n".join(line for line in lines if line), p.urls
+
+# -------------------------------------------------
+# Messages
+# -------------------------------------------------
+
+def _part_text(part: EmailMessage) -> str:
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeDecodeError, AssertionError):
+        payload = part.get_payload(decode=True) or b""
+        if not isinstance(payload, bytes):
+            return str(payload)
+        charset = part.get_content_charset() or "utf-8"
+        try:
+            codecs.lookup(charset)
+        except LookupError:  # e.g. "unknown-8bit": any byte decodes as latin-1
+            charset = "latin-1"
+        return payload.decode(charset, errors="replace")
+
+def _header(name: str, raw: str) -> str:
+    """Decoded header value, or the raw one when it does not parse (e.g. 'Message-ID: <<>')."""
+    try:
+        return str(policy.default.header_fetch_parse(name, raw))
+    except Exception:
+        return " ".join(raw.split())
+
+def _dedupe(urls: List[str]) -> List[str]:
+    seen = set()
+    return [u for u in urls if not (u in seen or seen.add(u))]
+
+def message_id(raw: bytes) -> str:
+    """
+    Id of one delivered message: blake2b of its raw bytes. Unlike
+    dataset_io.content_id it covers headers and HTML (link targets), so
+    a copy that only swaps the links, or a second delivery, gets its own id.
+    """
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def parse_message(raw: bytes, source: str = "") -> Dict[str, Union[str, List[str]]]:
+    """
+    Row for one raw RFC 822 message. The body is the text/plain part, or
+    the text of the HTML part when there is no plain one; urls come from
+    both the text and the HTML links.
+    """
+    from agents.url_agent import extract_urls_from_text
+
+    msg = _parser.parsebytes(raw)
+    headers = [(k, _header(k, v)) for k, v in msg.raw_items()]
+    headers_text = "".join(f"{k}: {v}\n" for k, v in headers)
+    subject = next((v for k, v in headers if k.lower() == "subject"), "")
+
+    plain = msg.get_body(preferencelist=("plain",))
+    html = msg.get_body(preferencelist=("html",))
+    body = _part_text(plain) if plain is not None else ""
+    urls = extract_urls_from_text(body)
+    if html is not None:
+        html_body, hrefs = html_to_text(_part_text(html))
+        body = body or html_body
+        urls += hrefs + extract_urls_from_text(html_body)
+
+    return {
+        "id": message_id(raw),
+        "source_dataset": source,
+        "subject": subject,
+        "body": body,
+        "headers_text": headers_text,
+        "label": "",
+        "urls": _dedupe(urls),
+    }
+
+# -------------------------------------------------
+# Sources
+# -------------------------------------------------
+
+def iter_mbox(path: str) -> Iterator[bytes]:
+    """
+    Raw messages of an mbox file, streamed. A message starts at a 'From '
+    line following a blank line (or the start of the file); '>From '
+    escapes (mboxrd/mboxo) are undone.
+    """
+    lines: List[bytes] = []
+    size = 0
+    prev_blank = True
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"From ") and prev_blank:
+                if lines and size <= MAX_MESSAGE_BYTES:
+                    yield b"".join(lines)
+                lines, size = [], 0
+                prev_blank = False
+                continue
+            prev_blank = line in (b"\n", b"\r\n")
+            size += len(line)
+            if size > MAX_MESSAGE_BYTES:
+                lines = []  # too big: drop it, keep counting to the next separator
+                continue
+            if line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+                line = line[1:]
+            lines.append(line)
+    if lines and size <= MAX_MESSAGE_BYTES:
+        yield b"".join(lines)
+
+def iter_eml_files(path: str) -> Iterator[Tuple[str, bytes]]:
+    """(file path, raw message) for each message file under a directory, in name order."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(EML_SUFFIXES):
+                continue
+            fp = os.path.join(root, name)
+            if os.path.getsize(fp) > MAX_MESSAGE_BYTES:
+                continue
+            with open(fp, "rb") as f:
+                yield fp, f.read()
+
+def _is_mbox(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(5) == b"From "
+
+def is_mail_path(path: str) -> bool:
+    """True for an mbox file, an .eml file, or a directory holding .eml files."""
+    p = Path(path)
+    if p.is_dir():
+        return any(f.name.lower().endswith(EML_SUFFIXES) for f in p.rglob("*") if f.is_file())
+    return p.is_file() and (p.suffix.lower() in EML_SUFFIXES + (".mbox",) or _is_mbox(path))
+
+def iter_messages(
+    path: str,
+    limit: Optional[int] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Dict[str, Union[str, List[str]]]]:
+    """
+    Rows for every message in an mbox file, a single message file, or a
+    directory of them. A message that fails to parse is reported on
+    stderr and skipped, so one bad message does not end the mailbox;
+    stats["skipped"] counts them.
+    """
+    p = Path(path)
+    if p.is_dir():
+        raws = ((str(Path(fp).relative_to(p).parent), raw) for fp, raw in iter_eml_files(path))
+    elif _is_mbox(path):
+        raws = ((p.stem, raw) for raw in iter_mbox(path))
+    else:
+        raws = iter([(p.parent.name, p.read_bytes())])
+
+    if stats is not None:
+        stats.setdefault("skipped", 0)
+    count = 0
+    for source, raw in raws:
+        if limit is not None and count >= limit:
+            return
+        source = source if source != "." else p.name
+        try:
+            row = parse_message(raw, source=source)
+        except Exception as e:
+            print(f"[MAIL] skipped message {message_id(raw)} in {source}: {e!r}", file=sys.stderr)
+            if stats is not None:
+                stats["skipped"] += 1
+            continue
+        count += 1
+        yield row
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Print mbox / .eml messages as JSON lines.")
+    ap.add_argument("path", help="mbox file, .eml file, or directory of .eml files")
+    ap.add_argument("--limit", type=int, default=None)
+    args = ap.parse_args()
+
+    for row in iter_messages(args.path, limit=args.limit):
+        sys.stdout.write(json.dumps(row) + "\n")
@@ -0,0 +1,272 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+DEFAULT_PORT = 11435
+
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "lognormal", "exponential"]
+
+
+class MockConfig:
+    """Behaviour of the stand-in /api/generate endpoint."""
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        distribution: str = "lognormal",
+        jitter: float = 0.5,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = None,
+        prompt_cache: bool = True,
+    ):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.prompt_cache = prompt_cache
+        self.seen_systems = set()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample_latency_s(self) -> float:
+        """
+        fixed: latency_ms; uniform: latency_ms * [1-jitter, 1+jitter];
+        lognormal: median latency_ms, sigma=jitter; exponential: mean latency_ms.
+        """
+        with self.lock:
+            if self.distribution == "fixed":
+                ms = self.latency_ms
+            elif self.distribution == "uniform":
+                ms = self.latency_ms * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+            elif self.distribution == "lognormal":
+                ms = self.latency_ms * self.rng.lognormvariate(0.0, self.jitter)
+            else:
+                ms = self.rng.expovariate(1.0 / self.latency_ms) if self.latency_ms > 0 else 0.0
+        return max(ms, 0.0) / 1000.0
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+# -------------------------------------------------
+# Canned responses
+# -------------------------------------------------
+
+def _agent_obj(agent: str, rng: random.Random) -> Dict[str, Any]:
+    verdict = rng.choice(["phishing", "legitimate", "unsure"])
+    p_inds = {
+        "text": ["urgent_threat_or_deadline", "credential_harvesting"],
+        "url": ["credential_path_or_login_lure"],
+        "metadata": ["from_domain_mismatch"],
+    }.get(agent, [])
+    return {
+        "agent": agent,
+        "version": "1.0",
+        "view": f"{agent}_only",
+        "task": "email_phishing_detection",
+        "verdict": verdict,
+        "confidence": round(rng.uniform(0.5, 0.95), 2),
+        "phishing_indicators": p_inds if verdict == "phishing" else [],
+        "legitimacy_indicators": ["professional_tone_and_language"] if verdict == "legitimate" else [],
+        "evidence": [],
+        "overall_rationale": "mock response",
+        "safety_notes": "",
+    }
+
+
+def _response_text(req: Dict[str, Any], cfg: MockConfig) -> str:
+    """Pick a plausible answer from the prompt the agents actually send."""
+    text = (req.get("system") or "") + (req.get("prompt") or "")
+
+    with cfg.lock:
+        rng = random.Random(cfg.rng.random())
+
+    if "EXPLANATION AGENT" in text:
+        return "- This is a mock explanation.\n- The verdict was decided by the agents."
+    batch_ids = re.findall(r"=== EMAIL (\S+) ===", req.get("prompt") or "")
+    if batch_ids:
+        return json.dumps({"results": [
+            {"id": i, **{name: _agent_obj(name, rng) for name in ("text", "url", "metadata")}}
+            for i in batch_ids
+        ]})
+    if "UNIFIED ANALYSIS AGENT" in text:
+        return json.dumps({name: _agent_obj(name, rng) for name in ("text", "url", "metadata")})
+    for marker, agent in (("URL AGENT", "url"), ("METADATA AGENT", "metadata")):
+        if marker in text:
+            return json.dumps(_agent_obj(agent, rng))
+    return json.dumps(_agent_obj("text", rng))
+
+
+def _timings(req: Dict[str, Any], response: str, latency_s: float, cfg: MockConfig) -> Dict[str, Any]:
+    """
+    Fake Ollama accounting fields (4 chars ~ 1 token). With prompt_cache,
+    a system prompt seen before is not counted again, like a prefix hit.
+    """
+    system = req.get("system") or ""
+    with cfg.lock:
+        cached = cfg.prompt_cache and system in cfg.seen_systems
+        cfg.seen_systems.add(system)
+    prompt_tokens = max(1, len((req.get("prompt") or "") if cached else system + (req.get("prompt") or "")) // 4)
+    eval_tokens = max(1, len(response) // 4)
+    total_ns = int(latency_s * 1e9)
+    return {
+        "total_duration": total_ns,
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": total_ns // 3,
+        "eval_count": eval_tokens,
+        "eval_duration": total_ns - total_ns // 3,
+    }
+
+# -------------------------------------------------
+# HTTP handler
+# -------------------------------------------------
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cfg: MockConfig = MockConfig()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send(200, json.dumps({"models": [{"name": "llama3:latest"}]}).encode())
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send(400, b'{"error": "bad json"}')
+            return
+
+        if self.path != "/api/generate":
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        cfg = self.cfg
+        latency = cfg.sample_latency_s()
+        # Like Ollama, streaming is the default when the client does not say.
+        streaming = req.get("stream", True)
+        if not streaming:
+            time.sleep(latency)
+
+        if cfg.roll(cfg.failure_rate):
+            self._send(500, b'{"error": "mock failure"}')
+            return
+
+        response = _response_text(req, cfg)
+        if cfg.roll(cfg.malformed_rate):
+            response = "Sure! Here is the analysis: {verdict: phishing,"
+
+        if streaming:
+            try:
+                self._stream(req, response, latency)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client cancelled mid-stream
+            return
+
+        body = {
+            "model": req.get("model", ""),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": response,
+            "done": True,
+            **_timings(req, response, latency, self.cfg),
+        }
+        self._send(200, json.dumps(body).encode())
+
+    def _chunk(self, obj: Dict[str, Any]):
+        data = (json.dumps(obj) + "\n").encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, req: Dict[str, Any], response: str, latency: float):
+        """NDJSON chunks, one word each: a third of the latency before the first token."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        pieces = re.findall(r"\S+\s*", response) or [response]
+        time.sleep(latency / 3)
+        gap = (latency - latency / 3) / len(pieces)
+        created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(gap)
+            self._chunk({"model": req.get("model", ""), "created_at": created, "response": piece, "done": False})
+        self._chunk({
+            "model": req.get("model", ""),
+            "created_at": created,
+            "response": "",
+            "done": True,
+            **_timings(req, response, latency, self.cfg),
+        })
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+# -------------------------------------------------
+# In-process server
+# -------------------------------------------------
+
+def start_mock_server(
+    port: int = 0,
+    cfg: Optional[MockConfig] = None,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the mock in a daemon thread; returns (server, base_url). port=0 picks a free port."""
+    handler = type("Handler", (MockOllamaHandler,), {"cfg": cfg or MockConfig()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local stand-in for Ollama /api/generate.")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--latency-ms", type=float, default=200.0)
+    ap.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    ap.add_argument("--jitter", type=float, default=0.5)
+    ap.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    ap.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of responses with broken JSON")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    cfg = MockConfig(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    server, url = start_mock_server(args.port, cfg)
+    print(f"[MOCK] Ollama stand-in listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,176 @@
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.header_rules import sender_fingerprint
+from agents.url_agent import extract_urls_from_text
+from agents.url_cache import registered_domain, url_host
+
+# -------------------------------------------------
+# Config
+# -------------------------------------------------
+
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates
+SHINGLE_WORDS = 3
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# -------------------------------------------------
+# Normalization / shingling
+# -------------------------------------------------
+
+_URL = re.compile(r"https?://\S+")
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_NUMBER = re.compile(r"\d+")
+_WORD = re.compile(r"\w+")
+
+def normalize(subject: str, body: str) -> List[str]:
+    """
+    Words of subject + body with the parts campaigns personalize (links,
+    addresses, numbers, tracking tokens) replaced by placeholders.
+    """
+    text = f"{subject or ''} {body or ''}".lower()
+    text = _URL.sub(" urltoken ", text)
+    text = _EMAIL.sub(" emailtoken ", text)
+    text = _NUMBER.sub("0", text)
+    return _WORD.findall(text)
+
+def shingle_hashes(words: List[str], k: int = SHINGLE_WORDS) -> np.ndarray:
+    """Unique 32-bit hashes of word k-grams (crc32: stable across processes)."""
+    if len(words) < k:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams),
+    ))
+
+def link_domains(body: str, urls: Optional[List[str]] = None) -> Tuple[str, ...]:
+    """
+    Registered domains the email links to (the body's links plus urls,
+    e.g. HTML hrefs from mail_ingest). Emails only cluster with others
+    linking to the same domains, so a phishing copy of a legitimate
+    template never inherits the original's verdict.
+    """
+    links = extract_urls_from_text(body or "") + list(urls or ())
+    return tuple(sorted({registered_domain(url_host(u)) for u in links}))
+
+# -------------------------------------------------
+# MinHash + LSH index
+# -------------------------------------------------
+
+class NearDupIndex:
+    """
+    Groups emails whose estimated Jaccard similarity (MinHash over word
+    shingles) is at least `threshold` into clusters. The first email of a
+    cluster is its representative; later members are matched against the
+    representatives through LSH buckets and a full signature check.
+    Only emails with the same link domains and sender fingerprint (see
+    header_rules.sender_fingerprint) share buckets: a member inherits the
+    representative's URL and metadata verdicts, including a header-based
+    hard override.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[tuple, List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self.cluster_sizes: Dict[str, int] = {}
+
+    def signature(self, subject: str, body: str) -> np.ndarray:
+        hashes = shingle_hashes(normalize(subject, body))
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a*x + b) mod p for every permutation x shingle, then min per permutation.
+        perm = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE
+        return (perm & _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, sig: np.ndarray, group: tuple):
+        for band in range(self.bands):
+            rows = sig[band * self.rows:(band + 1) * self.rows]
+            yield (group, band, rows.tobytes())
+
+    def assign(
+        self,
+        email_id: str,
+        subject: str,
+        body: str,
+        urls: Optional[List[str]] = None,
+        headers_text: str = "",
+    ) -> Tuple[str, float]:
+        """
+        Cluster one email. Returns (representative_id, similarity): the
+        email's own id and 1.0 when it starts a new cluster.
+        """
+        sig = self.signature(subject, body)
+        group = (link_domains(body, urls), sender_fingerprint(headers_text))
+        keys = list(self._band_keys(sig, group))
+
+        with self._lock:
+            best_id, best_sim = None, 0.0
+            seen = set()
+            for key in keys:
+                for rep_id in self._buckets.get(key, ()):
+                    if rep_id in seen:
+                        continue
+                    seen.add(rep_id)
+                    sim = float(np.mean(self._signatures[rep_id] == sig))
+                    if sim > best_sim:
+                        best_id, best_sim = rep_id, sim
+
+            if best_id is not None and best_sim >= self.threshold:
+                self.cluster_sizes[best_id] += 1
+                return best_id, best_sim
+
+            self._signatures[email_id] = sig
+            self.cluster_sizes[email_id] = 1
+            for key in keys:
+                self._buckets.setdefault(key, []).append(email_id)
+            return email_id, 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = list(self.cluster_sizes.values())
+        emails = sum(sizes)
+        return {
+            "emails": emails,
+            "clusters": len(sizes),
+            "largest_cluster": max(sizes) if sizes else 0,
+            "llm_fraction": round(len(sizes) / emails, 4) if emails else 0.0,
+        }
+
+# -------------------------------------------------
+# Verdict propagation
+# -------------------------------------------------
+
+def propagate(result: Dict[str, Any], representative_id: str, similarity: float) -> Dict[str, Any]:
+    """A member's result: the representative's agents and verdict, marked as propagated."""
+    final = dict(result["final"])
+    if final.get("decided_by"):
+        final["representative_decided_by"] = final["decided_by"]
+    final["decided_by"] = "near_duplicate"
+    final["representative_id"] = representative_id
+    final["similarity"] = round(similarity, 3)
+    return {"agents": result["agents"], "final": final}
@@ -1,7 +1,17 @@
-import pandas as pd
-import uuid
+import argparse
+import os
 import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import CSV_PATH, PARQUET_DIR, content_id
 
 # -----------------------------------
 # Dataset configuration
@@ -40,6 +50,11 @@ LABEL_MAP = {
     "0": "legitimate",
 }
 
+CHUNKSIZE = 50_000  # rows per chunk / output part file
+
+# Content ids seen by earlier runs, and where each was first found.
+DEDUP_INDEX_PATH = "data/dedup_index.sqlite"
+
 # -----------------------------------
 # Helpers
 # -----------------------------------
@@ -56,6 +71,17 @@ def clean_text(x: str) -> str:
     x = re.sub(r"[ \t]+", " ", x).strip()
     return x
 
+def clean_series(s: pd.Series) -> pd.Series:
+    """clean_text() over a whole column with vectorized string ops."""
+    return (
+        s.fillna("").astype(str)
+        .str.replace("\r\n", "\n", regex=False)
+        .str.replace("\r", "\n", regex=False)
+        # Same result as [ \t]+ -> " ", but single spaces are left alone.
+        .str.replace(r"[ \t]{2,}|\t", " ", regex=True)
+        .str.strip()
+    )
+
 def normalize_chunk(df, dataset_name):
     cmap = COLUMN_MAPS[dataset_name]
 
@@ -63,60 +89,196 @@ def normalize_chunk(df, dataset_name):
     body_col = pick_col(df.columns, cmap["body"])
     lab_col = pick_col(df.columns, cmap["label"])
 
+    empty = np.full(len(df), "", dtype=object)
+    subject = clean_series(df[sub_col]).to_numpy() if sub_col else empty
+    body = clean_series(df[body_col]).to_numpy() if body_col else empty
+
     out = pd.DataFrame({
-        "id": [str(uuid.uuid4()) for _ in range(len(df))],
+        "id": [content_id(s, b) for s, b in zip(subject, body)],
         "source_dataset": dataset_name,
-        "subject": df[sub_col].map(clean_text) if sub_col else "",
-        "body": df[body_col].map(clean_text) if body_col else "",
+        "subject": subject,
+        "body": body,
     })
 
     if lab_col:
         raw = df[lab_col].fillna("").astype(str).str.strip().str.lower()
-        out["label"] = raw.map(lambda v: LABEL_MAP.get(v, ""))
+        out["label"] = raw.map(LABEL_MAP).fillna("").to_numpy()
     else:
         out["label"] = ""
 
     out = out[(out["subject"] != "") | (out["body"] != "")]
     return out
 
+# -----------------------------------
+# Workers
+# -----------------------------------
+
+def read_chunks(path: str, chunksize: int = CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    return pd.read_csv(
+        path,
+        dtype=str,
+        encoding_errors="ignore",
+        low_memory=False,
+        chunksize=chunksize,
+    )
+
+def write_part(norm: pd.DataFrame, name: str, part: int, out_dir: str, fmt: str) -> None:
+    """Write one normalized chunk as out_dir/source_dataset=<name>/part-NNNNN.<fmt>."""
+    part_dir = Path(out_dir) / f"source_dataset={name}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "parquet":
+        # source_dataset is carried by the partition directory name.
+        norm.drop(columns="source_dataset").to_parquet(part_dir / f"part-{part:05d}.parquet", index=False)
+    else:
+        norm.to_csv(part_dir / f"part-{part:05d}.csv", index=False)
+
+def concat_csv_parts(parts_dir: Path, out_path: Path) -> None:
+    """Join per-chunk CSV parts (dataset order, then chunk order) into one file."""
+    first = True
+    with open(out_path, "wb") as out:
+        for name, _ in DATASETS:
+            for part in sorted((parts_dir / f"source_dataset={name}").glob("part-*.csv")):
+                with open(part, "rb") as f:
+                    header = f.readline()
+                    if first:
+                        out.write(header)
+                        first = False
+                    shutil.copyfileobj(f, out)
+
+# -----------------------------------
+# Deduplication
+# -----------------------------------
+
+class DedupIndex:
+    """
+    Exact-duplicate filter over content ids. Within a run the first copy
+    of an email is kept (datasets in DATASETS order) and later copies are
+    dropped and counted per source. Ids are also recorded in a SQLite
+    index (16-byte keys) with the dataset and time they were first seen,
+    so later runs can tell new emails from ones normalized before.
+    """
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH):
+        self.path = path
+        self._seen: Dict[bytes, str] = {}  # id -> dataset that kept it, this run
+        self.counts: Dict[str, Dict[str, Any]] = {}
+
+        self._conn = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS emails ("
+                "id BLOB PRIMARY KEY, source TEXT NOT NULL, first_seen REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._known = {row[0] for row in self._conn.execute("SELECT id FROM emails")}
+        else:
+            self._known = set()
+
+    def filter(self, df: pd.DataFrame, source: str, drop: bool = True) -> pd.DataFrame:
+        """Rows of df whose id was not kept earlier in this run (all rows, counted, if not drop)."""
+        c = self.counts.setdefault(source, {"rows": 0, "kept": 0, "new": 0, "duplicates": {}})
+        keep = np.zeros(len(df), dtype=bool)
+        new = []
+        now = time.time()
+
+        for i, hex_id in enumerate(df["id"]):
+            key = bytes.fromhex(hex_id)
+            owner = self._seen.get(key)
+            if owner is not None:
+                c["duplicates"][owner] = c["duplicates"].get(owner, 0) + 1
+                keep[i] = not drop
+                continue
+            keep[i] = True
+            self._seen[key] = source
+            if key not in self._known:
+                new.append((key, source, now))
+
+        if self._conn is not None and new:
+            self._conn.executemany("INSERT OR IGNORE INTO emails VALUES (?, ?, ?)", new)
+            self._conn.commit()
+
+        c["rows"] += len(df)
+        c["kept"] += int(keep.sum())
+        c["new"] += len(new)
+        return df[keep] if drop else df
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
 # -----------------------------------
 # Main
 # -----------------------------------
 
-def main():
-    out_path = Path("data/normalized_emails.csv")
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Normalize the source datasets into one schema.")
+    ap.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    ap.add_argument("--out", default=None, help=f"output (default: {PARQUET_DIR} or {CSV_PATH})")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--dedup-index", default=DEDUP_INDEX_PATH, help="persistent id index ('' to keep none)")
+    ap.add_argument("--keep-duplicates", action="store_true", help="write exact duplicates too")
+    args = ap.parse_args(argv)
+
+    out_path = Path(args.out or (PARQUET_DIR if args.format == "parquet" else CSV_PATH))
+    parts_dir = out_path if args.format == "parquet" else out_path.with_name(out_path.name + ".parts")
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if out_path.exists():
+    if parts_dir.exists():
+        shutil.rmtree(parts_dir)
+    if out_path.is_file():
         out_path.unlink()
 
-    first_write = True
-    chunksize = 50_000  # safe for large files
-
+    jobs = []
     for name, path in DATASETS:
         if not Path(path).exists():
             print(f"[SKIP] Missing: {path}")
             continue
-
         print(f"[READ] {name}: {path}")
+        jobs.append((name, path))
 
-        for chunk in pd.read_csv(
-            path,
-            dtype=str,
-            encoding_errors="ignore",
-            low_memory=False,
-            chunksize=chunksize,
-        ):
-            norm = normalize_chunk(chunk, name)
-            norm.to_csv(
-                out_path,
-                mode="a",
-                index=False,
-                header=first_write,
-            )
-            first_write = False
+    # Parsing stays in this process (a CSV chunk can only be found by
+    # parsing the ones before it) and so does deduplication, which needs
+    # every id; cleaning and hashing, the bulk of the work, run on the
+    # pool, across datasets and chunks alike.
+    start = time.perf_counter()
+    dedup = DedupIndex(args.dedup_index)
+
+    def _write(name, part, norm):
+        norm = dedup.filter(norm, name, drop=not args.keep_duplicates)
+        write_part(norm, name, part, str(parts_dir), args.format)
+
+    parts = ((name, i, chunk) for name, path in jobs for i, chunk in enumerate(read_chunks(path, args.chunksize)))
+    if args.workers <= 1:
+        for name, i, chunk in parts:
+            _write(name, i, normalize_chunk(chunk, name))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as ex:
+            # Results are consumed in submission order, so which copy of a
+            # duplicate is kept does not depend on worker timing.
+            pending = []
+            for name, i, chunk in parts:
+                pending.append((name, i, ex.submit(normalize_chunk, chunk, name)))
+                # Bound the chunks held in memory while workers catch up.
+                while len(pending) >= 2 * args.workers:
+                    name_, i_, future = pending.pop(0)
+                    _write(name_, i_, future.result())
+            for name, i, future in pending:
+                _write(name, i, future.result())
+    dedup.close()
+
+    for name, c in dedup.counts.items():
+        dups = ", ".join(f"{n} of {src}" for src, n in c["duplicates"].items()) or "none"
+        print(f"[NORM] {name}: {c['rows']} non-empty rows -> {c['kept']} written ({c['new']} new), duplicates: {dups}")
+
+    if args.format == "csv":
+        concat_csv_parts(parts_dir, out_path)
+        shutil.rmtree(parts_dir)
 
-    print(f"[DONE] Saved normalized dataset → {out_path}")
+    print(f"[DONE] Saved normalized dataset → {out_path} ({time.perf_counter() - start:.1f}s)")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,7 @@
 from typing import Dict, Any, Iterable
 
+from agents.tracing import traced
+
 # -----------------------------
 # Scoring configuration
 # -----------------------------
@@ -23,6 +25,9 @@ HARD_METADATA_INDICATORS = {
     "reply_to_mismatch",
 }
 
+# Minimum metadata confidence for the hard override to fire.
+HARD_OVERRIDE_CONFIDENCE = 0.7
+
 PHISHING_THRESHOLD = 0.3
 LEGITIMATE_THRESHOLD = -0.3
 
@@ -45,10 +50,25 @@ def _collect_unique(agent_results: Iterable[Dict[str, Any]], key: str):
     return list(out)
 
 
+def would_hard_override(metadata_result: Dict[str, Any]) -> bool:
+    """True if this metadata result alone decides the verdict in combine_agents()."""
+    meta_verdict = metadata_result.get("verdict", "unsure")
+    meta_conf = _safe_float(metadata_result.get("confidence", 0.0))
+    meta_inds = set(metadata_result.get("phishing_indicators", []))
+
+    return bool(
+        AGENT_WEIGHTS.get("metadata", 0.0) > 0
+        and meta_verdict == "phishing"
+        and meta_conf >= HARD_OVERRIDE_CONFIDENCE
+        and meta_inds & HARD_METADATA_INDICATORS
+    )
+
+
 # -----------------------------
 # Main orchestration logic
 # -----------------------------
 
+@traced("orchestrate")
 def combine_agents(
     text_result: Dict[str, Any],
     url_result: Dict[str, Any],
@@ -71,16 +91,8 @@ def combine_agents(
     # -------------------------
     # HARD OVERRIDE (metadata)
     # -------------------------
-    meta_verdict = metadata_result.get("verdict", "unsure")
-    meta_conf = _safe_float(metadata_result.get("confidence", 0.0))
-    meta_inds = set(metadata_result.get("phishing_indicators", []))
-
-    if (
-        AGENT_WEIGHTS.get("metadata", 0.0) > 0
-        and meta_verdict == "phishing"
-        and meta_conf >= 0.7
-        and meta_inds & HARD_METADATA_INDICATORS
-    ):
+    if would_hard_override(metadata_result):
+        meta_inds = set(metadata_result.get("phishing_indicators", []))
         return {
             "verdict": "phishing",
             "score": 1.0,
@@ -0,0 +1,187 @@
+from typing import Any, Dict, List, Optional
+
+from agents.header_rules import analyze_headers
+from agents.metadata_agent import METADATA_AGENT_SYSTEM_PROMPT, run_metadata_agent_async
+from agents.tracing import traced
+from agents.text_agent import TEXT_AGENT_SYSTEM_PROMPT, run_text_agent_async
+from agents.unified_agent import UNIFIED_SYSTEM_PROMPT, run_unified_agent, run_unified_agent_async
+from agents.url_agent import URL_AGENT_SYSTEM_PROMPT, extract_urls_from_text, run_url_agent_async
+from agents.validators import validate_agent_output
+from orchestrator import combine_agents, would_hard_override
+from prefilter import get_prefilter
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def system_prompts(per_agent: bool = False, batched: bool = False):
+    """System prompts a run in this mode will send, e.g. for OllamaClient.warm_up()."""
+    if batched:
+        from agents.batching import BATCH_SYSTEM_PROMPT
+
+        return [BATCH_SYSTEM_PROMPT.strip()]
+    if per_agent:
+        return [
+            TEXT_AGENT_SYSTEM_PROMPT.strip(),
+            URL_AGENT_SYSTEM_PROMPT.strip(),
+            METADATA_AGENT_SYSTEM_PROMPT.strip(),
+        ]
+    return [UNIFIED_SYSTEM_PROMPT.strip()]
+
+def _skipped(name: str, reason: str) -> Dict[str, Any]:
+    out = validate_agent_output({}, agent_name=name)
+    out["overall_rationale"] = f"Skipped: {reason}"
+    return out
+
+def _header_override(headers_text: str):
+    """
+    If header rules alone trigger combine_agents()'s hard override, return
+    the finished result so no LLM call is made at all; otherwise None.
+    """
+    meta_result, conclusive = analyze_headers(headers_text)
+    if not (conclusive and would_hard_override(meta_result)):
+        return None
+
+    reason = "header checks already decided the verdict."
+    agents = {
+        "text": _skipped("text", reason),
+        "url": _skipped("url", reason),
+        "metadata": meta_result,
+    }
+    final = combine_agents(agents["text"], agents["url"], agents["metadata"])
+    return {"agents": agents, "final": final}
+
+@traced("prefilter")
+def _prefilter_decision(subject: str, body: str):
+    """Cascade stage 1: the TF-IDF model decides confident emails outright."""
+    prefilter = get_prefilter()
+    if prefilter is None:
+        return None
+
+    final = prefilter.decide(subject, body)
+    if final is None:
+        return None
+
+    reason = "prefilter model was confident."
+    agents = {name: _skipped(name, reason) for name in ("text", "url", "metadata")}
+    return {"agents": agents, "final": final}
+
+def _shortcut(subject: str, body: str, headers_text: str, cascade: bool):
+    """Cheap local decisions tried before any LLM call, in cost order."""
+    decided = _header_override(headers_text)
+    if decided is None and cascade:
+        decided = _prefilter_decision(subject, body)
+    return decided
+
+# -------------------------------------------------
+# Single-email analysis entry points
+# -------------------------------------------------
+
+@traced("pipeline")
+def analyze_email(
+    subject: str,
+    body: str,
+    headers_text: str = "",
+    cascade: bool = True,
+    urls: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Serial path: one unified Ollama call, then combine_agents().
+    With cascade=True a trained prefilter (see baseline_lr.py) decides
+    confident emails first and only the uncertain band reaches the LLM.
+    urls defaults to the links found in the body; pass the message's
+    own list (mail_ingest.py) to include HTML hrefs.
+    Returns {"agents": {text, url, metadata}, "final": {...}}.
+    """
+    decided = _shortcut(subject, body, headers_text, cascade)
+    if decided is not None:
+        return decided
+
+    if urls is None:
+        urls = extract_urls_from_text(body)
+
+    unified = run_unified_agent(
+        subject=subject,
+        body=body,
+        urls=urls,
+        headers_text=headers_text,
+    )
+
+    final = combine_agents(
+        unified["text"],
+        unified["url"],
+        unified["metadata"],
+    )
+
+    return {"agents": unified, "final": final}
+
+
+@traced("pipeline")
+async def analyze_email_async(
+    subject: str,
+    body: str,
+    headers_text: str = "",
+    cascade: bool = True,
+    per_agent: bool = True,
+    batched: bool = False,
+    urls: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Per-agent path: text, URL and metadata agents run concurrently, so
+    wall-clock time is the slowest agent rather than the sum of all three.
+    per_agent=False awaits the single unified call instead; batched=True
+    hands the email to the micro-batcher (agents/batching.py), which
+    analyzes several concurrent emails in one call.
+    Returns the same shape as analyze_email().
+    """
+    import asyncio
+
+    from agents.batching import get_batcher
+
+    decided = _shortcut(subject, body, headers_text, cascade)
+    if decided is not None:
+        return decided
+
+    if urls is None:
+        urls = extract_urls_from_text(body)
+
+    if batched:
+        unified = await get_batcher().submit(subject, body, urls, headers_text)
+        final = combine_agents(unified["text"], unified["url"], unified["metadata"])
+        return {"agents": unified, "final": final}
+
+    if not per_agent:
+        unified = await run_unified_agent_async(subject, body, urls, headers_text)
+        final = combine_agents(unified["text"], unified["url"], unified["metadata"])
+        return {"agents": unified, "final": final}
+
+    text_result, url_result, meta_result = await asyncio.gather(
+        run_text_agent_async(subject, body),
+        run_url_agent_async(urls),
+        run_metadata_agent_async(headers_text),
+    )
+
+    agents = {
+        "text": text_result,
+        "url": url_result,
+        "metadata": meta_result,
+    }
+    final = combine_agents(text_result, url_result, meta_result)
+
+    return {"agents": agents, "final": final}
+
+
+if __name__ == "__main__":
+    import asyncio
+    import json
+
+    sample_subject = "Important: Verify your account immediately"
+    sample_body = (
+        "Dear user,\n\n"
+        "We detected unusual activity in your account. "
+        "Please verify your password within 24 hours.\n\n"
+        "Visit https://secure-paypaI.com/login to continue."
+    )
+
+    out = asyncio.run(analyze_email_async(sample_subject, sample_body))
+    print(json.dumps(out["final"], indent=2))
@@ -0,0 +1,120 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# -------------------------------------------------
+# Config (environment overridable)
+# -------------------------------------------------
+
+MODEL_PATH = os.environ.get("PREFILTER_MODEL_PATH", "models/baseline_lr.joblib")
+
+# P(phishing) at or above PHISH_THRESHOLD / at or below LEGIT_THRESHOLD is
+# decided by the model alone; everything in between goes to the LLM.
+PHISH_THRESHOLD = float(os.environ.get("PREFILTER_PHISH_THRESHOLD", "0.97"))
+LEGIT_THRESHOLD = float(os.environ.get("PREFILTER_LEGIT_THRESHOLD", "0.03"))
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def email_text(subject: str, body: str) -> str:
+    """Model input; training in baseline_lr.py uses the same concatenation."""
+    return f"{subject or ''}\n\n{body or ''}"
+
+# -------------------------------------------------
+# Prefilter
+# -------------------------------------------------
+
+class Prefilter:
+    """
+    TF-IDF + LogisticRegression model trained by baseline_lr.py, used as
+    the first stage of the cascade.
+    """
+
+    def __init__(
+        self,
+        path: str = MODEL_PATH,
+        phish_threshold: float = PHISH_THRESHOLD,
+        legit_threshold: float = LEGIT_THRESHOLD,
+    ):
+        import joblib
+
+        self.path = path
+        self.model = joblib.load(path)
+        self.phish_threshold = phish_threshold
+        self.legit_threshold = legit_threshold
+        self._phish_idx = list(self.model.classes_).index("phishing")
+
+        self._lock = threading.Lock()
+        self.total = 0
+        self.decided_phishing = 0
+        self.decided_legitimate = 0
+
+    def phishing_probability(self, subject: str, body: str) -> float:
+        proba = self.model.predict_proba([email_text(subject, body)])[0]
+        return float(proba[self._phish_idx])
+
+    def decide(self, subject: str, body: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a final result in combine_agents() format when the model is
+        confident, or None when the email should go to the LLM.
+        """
+        p = self.phishing_probability(subject, body)
+
+        if p >= self.phish_threshold:
+            verdict = "phishing"
+        elif p <= self.legit_threshold:
+            verdict = "legitimate"
+        else:
+            verdict = None
+
+        with self._lock:
+            self.total += 1
+            if verdict == "phishing":
+                self.decided_phishing += 1
+            elif verdict == "legitimate":
+                self.decided_legitimate += 1
+
+        if verdict is None:
+            return None
+
+        return {
+            "verdict": verdict,
+            "score": round(2 * p - 1, 3),
+            "phishing_indicators": [],
+            "legitimacy_indicators": [],
+            "evidence": [],
+            "decided_by": "prefilter",
+            "prefilter_probability": round(p, 4),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = self.total - self.decided_phishing - self.decided_legitimate
+            return {
+                "emails": self.total,
+                "decided_phishing": self.decided_phishing,
+                "decided_legitimate": self.decided_legitimate,
+                "routed_to_llm": routed,
+                "llm_fraction": round(routed / self.total, 4) if self.total else 0.0,
+            }
+
+# -------------------------------------------------
+# Shared instance
+# -------------------------------------------------
+
+_prefilter: Optional[Prefilter] = None
+_prefilter_lock = threading.Lock()
+
+
+def get_prefilter() -> Optional[Prefilter]:
+    """Load the persisted model once; None if it has not been trained yet."""
+    global _prefilter
+    if _prefilter is None:
+        if not MODEL_PATH or not Path(MODEL_PATH).exists():
+            return None
+        with _prefilter_lock:
+            if _prefilter is None:
+                _prefilter = Prefilter()
+    return _prefilter
@@ -0,0 +1,248 @@
+import argparse
+import itertools
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from orchestrator import (
+    AGENT_WEIGHTS,
+    HARD_METADATA_INDICATORS,
+    HARD_OVERRIDE_CONFIDENCE,
+    LEGITIMATE_THRESHOLD,
+    PHISHING_SCORE,
+    PHISHING_THRESHOLD,
+)
+
+AGENTS = ["text", "url", "metadata"]
+
+# Default search space for --grid.
+GRID_WEIGHTS = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+GRID_PHISHING_THRESHOLDS = [0.1, 0.2, 0.3, 0.4, 0.5]
+GRID_LEGITIMATE_THRESHOLDS = [-0.1, -0.2, -0.3, -0.4, -0.5]
+
+# -------------------------------------------------
+# Stored verdicts -> table
+# -------------------------------------------------
+
+def agents_frame(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    One row per stored run record (see run_store.py) with the per-agent
+    verdict/confidence columns combine_agents() needs.
+    """
+    rows = []
+    for r in records:
+        agents = r.get("agents") or {}
+        final = r.get("final") or {}
+        meta = agents.get("metadata", {})
+
+        row = {
+            "id": r.get("id", ""),
+            "label": r.get("label", ""),
+            # Same test as run_store.rescore_record(): near-duplicate members
+            # of a prefilter-decided email keep its verdict too.
+            "fixed": "prefilter" in (final.get("decided_by"), final.get("representative_decided_by")),
+            "fixed_score": final.get("score", 0.0),
+            "fixed_verdict": final.get("verdict", "unsure"),
+            "meta_hard": bool(set(meta.get("phishing_indicators", [])) & HARD_METADATA_INDICATORS),
+        }
+        for name in AGENTS:
+            a = agents.get(name, {})
+            row[f"{name}_verdict"] = a.get("verdict", "unsure")
+            row[f"{name}_confidence"] = a.get("confidence", 0.0)
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def _signed(df: pd.DataFrame, name: str) -> np.ndarray:
+    """PHISHING_SCORE[verdict] * confidence for one agent, as a float array."""
+    verdict_score = df[f"{name}_verdict"].map(PHISHING_SCORE).fillna(0.0).to_numpy(dtype=float)
+    conf = pd.to_numeric(df[f"{name}_confidence"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    return verdict_score * conf
+
+# -------------------------------------------------
+# Vectorized combine_agents
+# -------------------------------------------------
+
+def _verdicts(score: np.ndarray, phishing_threshold: float, legitimate_threshold: float) -> np.ndarray:
+    return np.where(
+        score > phishing_threshold, "phishing",
+        np.where(score < legitimate_threshold, "legitimate", "unsure"),
+    )
+
+
+def combine_agents_vectorized(
+    df: pd.DataFrame,
+    weights: Optional[Dict[str, float]] = None,
+    phishing_threshold: float = PHISHING_THRESHOLD,
+    legitimate_threshold: float = LEGITIMATE_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    combine_agents() over a whole agents_frame() at once.
+    Returns a frame with "score" and "verdict" columns aligned to df.
+    """
+    weights = AGENT_WEIGHTS if weights is None else weights
+
+    weighted_sum = np.zeros(len(df))
+    total_weight = 0.0
+    for name in AGENTS:
+        w = weights.get(name, 0.0)
+        if w <= 0:
+            continue
+        weighted_sum += _signed(df, name) * w
+        total_weight += w
+
+    score = weighted_sum / total_weight if total_weight > 0 else np.zeros(len(df))
+    verdict = _verdicts(score, phishing_threshold, legitimate_threshold)
+
+    if weights.get("metadata", 0.0) > 0:
+        conf = pd.to_numeric(df["metadata_confidence"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        hard = (
+            (df["metadata_verdict"].to_numpy() == "phishing")
+            & (conf >= HARD_OVERRIDE_CONFIDENCE)
+            & df["meta_hard"].to_numpy(dtype=bool)
+        )
+        score = np.where(hard, 1.0, score)
+        verdict = np.where(hard, "phishing", verdict)
+
+    fixed = df["fixed"].to_numpy(dtype=bool)
+    score = np.where(fixed, df["fixed_score"].to_numpy(dtype=float), score)
+    verdict = np.where(fixed, df["fixed_verdict"].to_numpy(), verdict)
+
+    return pd.DataFrame({"score": np.round(score, 3), "verdict": verdict}, index=df.index)
+
+# -------------------------------------------------
+# Metrics
+# -------------------------------------------------
+
+def precision_recall(labels: np.ndarray, verdicts: np.ndarray) -> Dict[str, float]:
+    """Phishing as positive, unsure counted as negative (same as evaluate_llm_system.py)."""
+    is_phish = labels == "phishing"
+    is_legit = labels == "legitimate"
+    pred = verdicts == "phishing"
+
+    tp = int((is_phish & pred).sum())
+    fn = int((is_phish & ~pred).sum())
+    fp = int((is_legit & pred).sum())
+
+    precision = tp / (tp + fp) if (tp + fp) else 0.0
+    recall = tp / (tp + fn) if (tp + fn) else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "unsure_rate": round(float((verdicts == "unsure").mean()) if len(verdicts) else 0.0, 4),
+    }
+
+# -------------------------------------------------
+# Grid search
+# -------------------------------------------------
+
+def grid_search(
+    df: pd.DataFrame,
+    weight_values: List[float] = GRID_WEIGHTS,
+    phishing_thresholds: List[float] = GRID_PHISHING_THRESHOLDS,
+    legitimate_thresholds: List[float] = GRID_LEGITIMATE_THRESHOLDS,
+) -> pd.DataFrame:
+    """
+    Precision/recall for every weight/threshold combination.
+
+    Per-agent signed scores are computed once. For each weight setting the
+    counts for all thresholds come from one broadcast comparison, so no
+    per-setting verdict arrays are materialized.
+    """
+    df = df[df["label"].isin(["phishing", "legitimate"])].reset_index(drop=True)
+    n = len(df)
+    is_phish = (df["label"] == "phishing").to_numpy()
+
+    signed = {name: _signed(df, name) for name in AGENTS}
+    fixed = df["fixed"].to_numpy(dtype=bool)
+    fixed_verdict = df["fixed_verdict"].to_numpy()
+
+    meta_conf = pd.to_numeric(df["metadata_confidence"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    hard = (
+        (df["metadata_verdict"].to_numpy() == "phishing")
+        & (meta_conf >= HARD_OVERRIDE_CONFIDENCE)
+        & df["meta_hard"].to_numpy(dtype=bool)
+        & ~fixed
+    )
+
+    p_thr = np.asarray(phishing_thresholds, dtype=float)
+    l_thr = np.asarray(legitimate_thresholds, dtype=float)
+
+    fixed_phish = fixed & (fixed_verdict == "phishing")
+    fixed_unsure = int((fixed & (fixed_verdict == "unsure")).sum())
+
+    results = []
+    for w_text, w_url, w_meta in itertools.product(weight_values, repeat=3):
+        total = w_text + w_url + w_meta
+        if total <= 0:
+            continue
+        score = (signed["text"] * w_text + signed["url"] * w_url + signed["metadata"] * w_meta) / total
+
+        forced = fixed_phish | hard if w_meta > 0 else fixed_phish
+        open_ = ~fixed & ~(hard if w_meta > 0 else np.zeros(n, dtype=bool))
+
+        # Counts of "score decides phishing" per phishing threshold.
+        above = open_[:, None] & (score[:, None] > p_thr[None, :])
+        tp = (above & is_phish[:, None]).sum(axis=0) + int((forced & is_phish).sum())
+        fp = (above & ~is_phish[:, None]).sum(axis=0) + int((forced & ~is_phish).sum())
+        fn = int(is_phish.sum()) - tp
+
+        # Unsure = open rows with legitimate_threshold <= score <= phishing_threshold.
+        not_below = (open_[:, None] & (score[:, None] >= l_thr[None, :])).sum(axis=0)
+        n_above = above.sum(axis=0)
+
+        for i, j in itertools.product(range(len(p_thr)), range(len(l_thr))):
+            precision = tp[i] / (tp[i] + fp[i]) if (tp[i] + fp[i]) else 0.0
+            recall = tp[i] / (tp[i] + fn[i]) if (tp[i] + fn[i]) else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+            unsure = max(int(not_below[j] - n_above[i]), 0) + fixed_unsure
+
+            results.append({
+                "w_text": w_text,
+                "w_url": w_url,
+                "w_metadata": w_meta,
+                "phishing_threshold": float(p_thr[i]),
+                "legitimate_threshold": float(l_thr[j]),
+                "precision": round(float(precision), 4),
+                "recall": round(float(recall), 4),
+                "f1": round(float(f1), 4),
+                "unsure_rate": round(unsure / n, 4) if n else 0.0,
+            })
+
+    return pd.DataFrame(results).sort_values(["f1", "precision"], ascending=False, ignore_index=True)
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+if __name__ == "__main__":
+    from run_store import iter_run_records
+
+    ap = argparse.ArgumentParser(description="Re-score stored agent outputs without calling the LLM.")
+    ap.add_argument("--run-dir", required=True, help="run directory written by evaluate_llm_system.py / batch_score.py")
+    ap.add_argument("--grid", action="store_true", help="grid-search weights and thresholds")
+    ap.add_argument("--top", type=int, default=15, help="settings to print with --grid")
+    ap.add_argument("--out", default=None, help="write the full grid as CSV")
+    args = ap.parse_args()
+
+    df = agents_frame(iter_run_records(args.run_dir))
+
+    print(f"[LOAD] {len(df)} stored rows from {args.run_dir}")
+
+    labeled = df["label"].isin(["phishing", "legitimate"]).to_numpy()
+    current = combine_agents_vectorized(df)
+    print("\n=== CURRENT SETTINGS ===")
+    print(f"weights={AGENT_WEIGHTS} phishing>{PHISHING_THRESHOLD} legitimate<{LEGITIMATE_THRESHOLD}")
+    print(precision_recall(df["label"].to_numpy()[labeled], current["verdict"].to_numpy()[labeled]))
+
+    if args.grid:
+        grid = grid_search(df)
+        print(f"\n=== GRID SEARCH ({len(grid)} settings, top {args.top} by F1) ===")
+        print(grid.head(args.top).to_string(index=False))
+        if args.out:
+            grid.to_csv(args.out, index=False)
+            print(f"\n[SAVED] {args.out}")
@@ -1,30 +1,31 @@
-import pandas as pd
-from agents.unified_agent import run_unified_agent
-from agents.url_agent import extract_urls_from_text
-from agents.explanation_agent import run_explanation_agent
-from orchestrator import combine_agents
+import argparse
 
-df = pd.read_csv(
-    "data/normalized_emails.csv",
-    dtype=str,
-    low_memory=False,
-    encoding_errors="ignore"
-).fillna("")
+from agents.explanation_agent import explain, stream_explanation
+from email_store import open_store
+from pipeline import analyze_email
 
-row = df.sample(2).iloc[0]
+ap = argparse.ArgumentParser(description="Analyze one random email from the normalized dataset.")
+ap.add_argument("--llm-explanation", action="store_true",
+                help="stream the explanation from the LLM instead of the instant template")
+args = ap.parse_args()
+
+with open_store() as store:
+    row = store.sample(1)[0]
 
 subject = row["subject"]
 body = row["body"]
 headers_text = row.get("headers_text", "")
 
-urls = extract_urls_from_text(body)
-
-unified = run_unified_agent(subject, body, urls, headers_text)
-final = combine_agents(
-    unified["text"], unified["url"], unified["metadata"]
-)
+final = analyze_email(subject, body, headers_text)["final"]
 
 print("SUBJECT:", subject)
 print("\nVERDICT:", final["verdict"], "score:", final["score"])
+if final.get("decided_by"):
+    print("DECIDED BY:", final["decided_by"])
 print("\nEXPLANATION:")
-print(run_explanation_agent(final))
+if args.llm_explanation:
+    for piece in stream_explanation(final):
+        print(piece, end="", flush=True)
+    print()
+else:
+    print(explain(final, llm=False))
@@ -0,0 +1,144 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Set
+
+from agents.batching import BATCH_SYSTEM_PROMPT
+from agents.cache import prompt_version
+from agents.llm_client import get_client
+from agents.metadata_agent import METADATA_AGENT_SYSTEM_PROMPT
+from agents.text_agent import TEXT_AGENT_SYSTEM_PROMPT
+from agents.unified_agent import UNIFIED_SYSTEM_PROMPT
+from agents.url_agent import URL_AGENT_SYSTEM_PROMPT
+from orchestrator import combine_agents
+
+# -------------------------------------------------
+# Run configuration
+# -------------------------------------------------
+
+def run_config(per_agent: bool, cascade: bool, batched: bool = False) -> Dict[str, Any]:
+    """
+    Everything that changes what the LLM would answer. combine_agents()
+    thresholds are deliberately not part of it: stored agent outputs can
+    be re-scored with new thresholds (see rescore_record).
+    """
+    config = {
+        "model": get_client().model,
+        "mode": "batched" if batched else "per_agent" if per_agent else "unified",
+        "cascade": cascade,
+        "prompts": {
+            "text": prompt_version(TEXT_AGENT_SYSTEM_PROMPT.strip()),
+            "url": prompt_version(URL_AGENT_SYSTEM_PROMPT.strip()),
+            "metadata": prompt_version(METADATA_AGENT_SYSTEM_PROMPT.strip()),
+            "unified": prompt_version(UNIFIED_SYSTEM_PROMPT.strip()),
+        },
+    }
+    if batched:
+        config["prompts"]["batch"] = prompt_version(BATCH_SYSTEM_PROMPT.strip())
+    return config
+
+# -------------------------------------------------
+# Store
+# -------------------------------------------------
+
+class RunStore:
+    """
+    A run directory holding config.json and an append-only results.jsonl
+    with one record per scored row, keyed by the normalized row id.
+    Failed records (an agent's LLM call or answer failed) are kept for
+    inspection but do not count as done, so a resumed run retries them.
+    """
+
+    def __init__(self, run_dir: str, config: Dict[str, Any]):
+        self.dir = Path(run_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.config_path = self.dir / "config.json"
+        self.results_path = self.dir / "results.jsonl"
+
+        if self.config_path.exists():
+            existing = json.loads(self.config_path.read_text(encoding="utf-8"))
+            if existing != config:
+                raise ValueError(
+                    f"{self.dir} was created with a different config; "
+                    f"use a new run directory.\n  stored:  {existing}\n  current: {config}"
+                )
+        else:
+            self.config_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+
+        self.config = config
+        self._done = {r["id"] for r in self.iter_records()}
+        self._out = open(self.results_path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        self._out.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def done_ids(self) -> Set[str]:
+        return set(self._done)
+
+    def is_done(self, row_id: str) -> bool:
+        return row_id in self._done
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._out.write(json.dumps(record) + "\n")
+        self._out.flush()
+        if record.get("ok", True):
+            self._done.add(record["id"])
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        return iter_run_records(self.dir)
+
+# -------------------------------------------------
+# Records
+# -------------------------------------------------
+
+def iter_run_records(run_dir, failed: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    All finished records of a run directory; a torn last line from a crash
+    is skipped. Failed records are left out unless failed=True: their
+    verdict is the fail-safe "unsure", not an answer to score.
+    """
+    path = Path(run_dir) / "results.jsonl"
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if failed or record.get("ok", True):
+                yield record
+
+def make_record(row: Dict[str, Any], result: Dict[str, Any], latency_s: float) -> Dict[str, Any]:
+    """
+    ok is False when any agent's LLM call or answer failed (the agent
+    output carries an "error"); errors maps those agents to the reason.
+    """
+    errors = {
+        name: out["error"] for name, out in result["agents"].items() if out.get("error")
+    }
+    record = {
+        "id": str(row.get("id", "")),
+        "source_dataset": row.get("source_dataset", ""),
+        "label": str(row.get("label", "")).strip().lower(),
+        "agents": result["agents"],
+        "final": result["final"],
+        "latency_s": round(latency_s, 4),
+        "ok": not errors,
+    }
+    if errors:
+        record["errors"] = errors
+    return record
+
+def rescore_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the final verdict from stored agent outputs with current thresholds."""
+    final = record["final"]
+    if "prefilter" in (final.get("decided_by"), final.get("representative_decided_by")):
+        return final
+    agents = record["agents"]
+    return combine_agents(agents["text"], agents["url"], agents["metadata"])
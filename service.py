@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.cache import get_cache
+from agents.explanation_agent import explain
+from agents.llm_client import get_client
+from agents.tracing import get_tracer
+from agents.validators import validate_agent_output
+from orchestrator import combine_agents
+from pipeline import analyze_email, system_prompts
+from prefilter import get_prefilter
+
+# -------------------------------------------------
+# Config (environment overridable)
+# -------------------------------------------------
+
+HOST = os.environ.get("SERVICE_HOST", "127.0.0.1")
+PORT = int(os.environ.get("SERVICE_PORT", "8080"))
+
+# Worker threads calling the LLM, and how many emails may wait for one.
+WORKERS = int(os.environ.get("SERVICE_WORKERS", "8"))
+QUEUE_SIZE = int(os.environ.get("SERVICE_QUEUE_SIZE", "64"))
+
+# An email that waited longer than this is answered "unsure" instead of
+# being analyzed: the caller has most likely given up on it already.
+MAX_QUEUE_WAIT_S = float(os.environ.get("SERVICE_MAX_QUEUE_WAIT", "30"))
+
+# A batch is admitted whole or not at all, so it can never be larger
+# than the queue; when it does not fit right now the caller gets a 503
+# and retries after RETRY_AFTER_S.
+MAX_BATCH = int(os.environ.get("SERVICE_MAX_BATCH", "100"))
+RETRY_AFTER_S = int(os.environ.get("SERVICE_RETRY_AFTER", "1"))
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+TEXT_FIELDS = ("subject", "body", "headers_text")
+FLAG_FIELDS = ("cascade", "explain")
+
+# -------------------------------------------------
+# Load shedding
+# -------------------------------------------------
+
+def shed_result(reason: str) -> Dict[str, Any]:
+    """Fail-safe answer when the service is saturated: every agent unsure."""
+    agents = {}
+    for name in ("text", "url", "metadata"):
+        agents[name] = validate_agent_output({}, agent_name=name)
+        agents[name]["overall_rationale"] = f"Not analyzed: {reason}"
+    final = combine_agents(agents["text"], agents["url"], agents["metadata"])
+    final["decided_by"] = "load_shed"
+    return {"agents": agents, "final": final}
+
+# -------------------------------------------------
+# Work queue
+# -------------------------------------------------
+
+class AnalysisQueue:
+    """
+    Bounded queue in front of a fixed pool of worker threads. submit()
+    never blocks: when the queue is full the email is shed immediately,
+    so latency stays bounded under overload instead of growing without
+    limit. submit_all() admits a batch only if all of it fits.
+    """
+
+    def __init__(self, workers: int = WORKERS, queue_size: int = QUEUE_SIZE, max_wait_s: float = MAX_QUEUE_WAIT_S):
+        self.workers = workers
+        self.max_wait_s = max_wait_s
+        self._queue: "queue.Queue[Tuple[float, Dict[str, Any], Future]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        # Serializes producers, so free space checked under it cannot
+        # shrink before the puts (workers only ever take items out).
+        self._admit = threading.Lock()
+        self.in_flight = 0
+        self.counters = {
+            "submitted": 0, "completed": 0, "failed": 0,
+            "shed_full": 0, "shed_stale": 0, "rejected_batches": 0,
+        }
+
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"analyze-{i}", daemon=True).start()
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += delta
+
+    @property
+    def capacity(self) -> int:
+        return self._queue.maxsize
+
+    def submit(self, email: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        try:
+            with self._admit:
+                self._queue.put_nowait((time.perf_counter(), email, future))
+            self._count("submitted")
+        except queue.Full:
+            self._count("shed_full")
+            future.set_result(shed_result("service saturated (queue full)."))
+        return future
+
+    def submit_all(self, emails: List[Dict[str, Any]]) -> Optional[List[Future]]:
+        """Queue every email, or none of them (returns None) when they do not all fit."""
+        with self._admit:
+            if self.capacity - self._queue.qsize() < len(emails):
+                self._count("rejected_batches")
+                return None
+            now = time.perf_counter()
+            futures: List[Future] = []
+            for email in emails:
+                future: Future = Future()
+                self._queue.put_nowait((now, email, future))
+                futures.append(future)
+        self._count("submitted", len(emails))
+        return futures
+
+    def _work(self) -> None:
+        while True:
+            enqueued, email, future = self._queue.get()
+            waited = time.perf_counter() - enqueued
+            if waited > self.max_wait_s:
+                self._count("shed_stale")
+                future.set_result(shed_result(f"waited {waited:.1f}s in queue."))
+                continue
+
+            with self._lock:
+                self.in_flight += 1
+            try:
+                result = analyze_email(
+                    email.get("subject", "") or "",
+                    email.get("body", "") or "",
+                    email.get("headers_text", "") or "",
+                    cascade=email.get("cascade", True),
+                )
+                result["queue_ms"] = round(waited * 1000, 1)
+                future.set_result(result)
+                self._count("completed")
+            except Exception as e:
+                self._count("failed")
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "in_flight": self.in_flight,
+                **self.counters,
+            }
+
+# -------------------------------------------------
+# Metrics
+# -------------------------------------------------
+
+def prometheus_metrics(work: AnalysisQueue) -> str:
+    lines = []
+    stats = work.stats()
+    for key in ("queue_depth", "queue_capacity", "in_flight", "workers"):
+        lines.append(f"# TYPE phish_service_{key} gauge")
+        lines.append(f"phish_service_{key} {stats[key]}")
+    lines.append("# TYPE phish_service_emails_total counter")
+    for key in ("submitted", "completed", "failed", "shed_full", "shed_stale"):
+        lines.append(f'phish_service_emails_total{{outcome="{key}"}} {stats[key]}')
+    lines.append("# TYPE phish_service_rejected_batches_total counter")
+    lines.append(f"phish_service_rejected_batches_total {stats['rejected_batches']}")
+
+    llm = get_client().stats.snapshot()
+    lines.append("# TYPE phish_llm_calls_total counter")
+    lines.append(f"phish_llm_calls_total {llm['calls']}")
+    lines.append("# TYPE phish_llm_errors_total counter")
+    lines.append(f"phish_llm_errors_total {llm['errors']}")
+
+    cache = get_cache()
+    if cache:
+        c = cache.stats()
+        lines.append("# TYPE phish_cache_lookups_total counter")
+        lines.append(f'phish_cache_lookups_total{{result="hit"}} {c["hits"]}')
+        lines.append(f'phish_cache_lookups_total{{result="miss"}} {c["misses"]}')
+
+    return "\n".join(lines) + "\n" + get_client().pool.export_prometheus() + get_tracer().export_prometheus()
+
+# -------------------------------------------------
+# HTTP handler
+# -------------------------------------------------
+
+def invalid_email(email: Any) -> Optional[str]:
+    """Why email is not a valid analysis request, or None."""
+    if not isinstance(email, dict):
+        return "each email must be an object with subject/body/headers_text"
+    for key in TEXT_FIELDS:
+        if email.get(key) is not None and not isinstance(email[key], str):
+            return f"{key} must be a string"
+    for key in FLAG_FIELDS:
+        if email.get(key) is not None and not isinstance(email[key], bool):
+            return f"{key} must be true or false"
+    return None
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    work: AnalysisQueue = None  # set by make_server()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, obj: Any, headers: Optional[Dict[str, str]] = None):
+        self._send(status, json.dumps(obj).encode("utf-8"), "application/json", headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Optional[Any]:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True  # the body's extent is unknown
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return None
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # the unread body must not be parsed as the next request
+            self._send_json(413, {"error": "request too large"})
+            return None
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "body must be JSON"})
+            return None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            client = get_client()
+            self._send_json(200, {
+                "status": "ok",
+                "model": client.model,
+                "backends": client.pool.stats(),
+                **self.work.stats(),
+            })
+        elif path == "/metrics":
+            self._send(200, prometheus_metrics(self.work).encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        if path not in ("/analyze", "/analyze/batch"):
+            self.close_connection = True  # the body is left unread
+            self._send_json(404, {"error": "not found"})
+            return
+
+        req = self._read_json()
+        if req is None:
+            return
+
+        start = time.perf_counter()
+        if path == "/analyze":
+            error = invalid_email(req)
+            if error:
+                self._send_json(400, {"error": error})
+                return
+            result = self._wait(self.work.submit(req), req)
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self._send_json(200, result)
+            return
+
+        emails = req.get("emails") if isinstance(req, dict) else None
+        if not isinstance(emails, list):
+            self._send_json(400, {"error": "expected {\"emails\": [{subject, body, headers_text}, ...]}"})
+            return
+        errors = [(i, invalid_email(e)) for i, e in enumerate(emails)]
+        errors = [f"emails[{i}]: {error}" for i, error in errors if error]
+        if errors:
+            self._send_json(400, {"error": errors[0], "errors": errors})
+            return
+        max_batch = min(MAX_BATCH, self.work.capacity)
+        if len(emails) > max_batch:
+            self._send_json(413, {"error": f"at most {max_batch} emails per batch"})
+            return
+
+        futures = self.work.submit_all(emails)
+        if futures is None:
+            self._send_json(
+                503,
+                {"error": "service saturated: batch does not fit in the queue, retry later"},
+                {"Retry-After": str(RETRY_AFTER_S)},
+            )
+            return
+        results: List[Dict[str, Any]] = []
+        for email, future in zip(emails, futures):
+            result = self._wait(future, email)
+            if "id" in email:
+                result["id"] = email["id"]
+            results.append(result)
+        self._send_json(200, {
+            "results": results,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    def _wait(self, future: Future, email: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = future.result()
+        except Exception as e:
+            result = shed_result(f"analysis failed ({type(e).__name__}).")
+        if email.get("explain"):
+            result["explanation"] = explain(result["final"], llm=False)
+        return result
+
+# -------------------------------------------------
+# Server
+# -------------------------------------------------
+
+def make_server(
+    host: str = HOST,
+    port: int = PORT,
+    workers: int = WORKERS,
+    queue_size: int = QUEUE_SIZE,
+) -> ThreadingHTTPServer:
+    """Build the server with its own work queue; call serve_forever() on it."""
+    handler = type("Handler", (ServiceHandler,), {"work": AnalysisQueue(workers, queue_size)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def warm_up() -> Dict[str, Any]:
+    """Load everything a first request would otherwise pay for."""
+    get_cache()
+    prefilter = get_prefilter()
+    return {"prefilter": prefilter is not None, **get_client().warm_up(system_prompts())}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Phishing analysis HTTP service.")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    args = ap.parse_args()
+
+    print(f"[WARM-UP] {warm_up()}")
+    server = make_server(args.host, args.port, args.workers, args.queue_size)
+    print(f"[SERVICE] listening on http://{args.host}:{server.server_address[1]} "
+          f"({args.workers} workers, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
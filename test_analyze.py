@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+import analyze
+
+
+@pytest.mark.parametrize("raw", [
+    b"URGENT: your account is locked.\nVerify now.",
+    b"http://evil.example/login",
+    b"Note: x\nAlso: y\n\nbody",
+    b"From: a@b.example\nSubject: no body separator",
+])
+def test_plain_text_is_not_parsed_as_headers(raw):
+    assert not analyze._looks_like_message(raw)
+
+
+@pytest.mark.parametrize("raw", [
+    b"From: a@b.example\nSubject: hi\n\nbody",
+    b"Subject: hi\r\nX-Thing: a\r\n  folded\r\n\r\nbody",
+])
+def test_header_block_is_a_message(raw):
+    assert analyze._looks_like_message(raw)
+
+
+def _stdin(monkeypatch, data: bytes):
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(data)))
+
+
+def test_read_email_plain_text_keeps_url(monkeypatch):
+    _stdin(monkeypatch, b"http://evil.example/login")
+    subject, body, headers_text, urls = analyze.read_email(None, "Alert")
+    assert (subject, body, headers_text, urls) == ("Alert", "http://evil.example/login", "", None)
+
+
+def test_read_email_message(tmp_path):
+    path = tmp_path / "m.eml"
+    path.write_bytes(b"From: a@b.example\nSubject: Hello\n\nSee <http://x.example/a>\n")
+    subject, body, headers_text, urls = analyze.read_email(str(path), None)
+    assert subject == "Hello"
+    assert "Subject: Hello" in headers_text
+    assert urls == ["http://x.example/a"]
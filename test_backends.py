@@ -0,0 +1,38 @@
+from agents.backends import BackendPool, parse_urls
+
+
+def test_parse_urls():
+    assert parse_urls(" http://a:1/, http://b:2 ,,") == ["http://a:1", "http://b:2"]
+
+
+def test_least_outstanding_routing():
+    pool = BackendPool(["http://a", "http://b"], health_interval=0)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.url, second.url} == {"http://a", "http://b"}
+    pool.release(first, ok=True)
+    assert pool.acquire() is first
+
+
+def test_failing_backend_is_skipped_until_cooldown():
+    pool = BackendPool(["http://a", "http://b"], failure_threshold=2, cooldown_seconds=60, health_interval=0)
+    bad = next(b for b in pool.backends if b.url == "http://a")
+    for _ in range(2):
+        pool.release(_acquire(pool, bad), ok=False)
+    assert {s["url"]: s["state"] for s in pool.stats()}["http://a"] == "open"
+    assert all(pool.acquire().url == "http://b" for _ in range(5))
+
+
+def test_all_open_still_routes():
+    pool = BackendPool(["http://a"], failure_threshold=1, cooldown_seconds=60, health_interval=0)
+    pool.trip("http://a")
+    assert pool.acquire().url == "http://a"
+
+
+def _acquire(pool, backend):
+    """Acquire until the pool hands out backend (round robin breaks ties)."""
+    while True:
+        b = pool.acquire()
+        if b is backend:
+            return b
+        pool.release(b, ok=True)
@@ -0,0 +1,87 @@
+import asyncio
+import io
+import json
+from contextlib import contextmanager
+
+import batch_score
+from agents.llm_client import OllamaClient, get_client, set_client
+from mock_ollama import MockConfig, start_mock_server
+from near_dup import NearDupIndex
+from run_store import RunStore
+
+TEXT = "dear customer your parcel could not be delivered please confirm your address and pay the fee today"
+
+
+@contextmanager
+def mock_client(**config):
+    server, url = start_mock_server(0, MockConfig(latency_ms=1, distribution="fixed", seed=3, **config))
+    previous = get_client()
+    set_client(OllamaClient(base_url=url, max_retries=0))
+    try:
+        yield
+    finally:
+        set_client(previous)
+        server.shutdown()
+
+
+def _score(rows, **kwargs):
+    out = io.StringIO()
+    records = asyncio.run(batch_score.score_stream(iter(rows), out, cascade=False, **kwargs))
+    return records, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_resume_skips_done_rows(tmp_path):
+    rows = [{"id": str(i), "subject": "s", "body": f"body {i}"} for i in range(4)]
+    config = {"mode": "test"}
+    with mock_client(), RunStore(str(tmp_path), config) as store:
+        _score(rows[:2], store=store)
+    with mock_client(), RunStore(str(tmp_path), config) as store:
+        records, _ = _score(rows, store=store)
+    assert sorted(r["id"] for r in records) == ["2", "3"]
+
+
+def test_rows_failed_in_an_outage_are_retried(tmp_path):
+    rows = [{"id": str(i), "subject": "s", "body": f"body {i}"} for i in range(3)]
+    config = {"mode": "test"}
+    with mock_client(failure_rate=1.0), RunStore(str(tmp_path), config) as store:
+        records, _ = _score(rows, store=store)
+        assert [r["ok"] for r in records] == [False] * 3
+        assert store.done_ids() == set()
+    with mock_client(), RunStore(str(tmp_path), config) as store:
+        records, _ = _score(rows, store=store)
+        assert sorted(r["id"] for r in records if r["ok"]) == ["0", "1", "2"]
+        assert store.done_ids() == {"0", "1", "2"}
+
+
+def test_repeated_ids_with_near_dup():
+    rows = [{"id": "1", "subject": "Parcel", "body": TEXT}] * 3 + [{"id": "2", "subject": "Lunch", "body": "noon?"}]
+    with mock_client():
+        records, lines = _score(rows, near_dup=NearDupIndex(0.8))
+    assert len(records) == len(lines) == 4
+    assert sorted(r["decided_by"] for r in records if r["id"] == "1") == ["llm", "near_duplicate", "near_duplicate"]
+
+
+def test_members_after_representative_finished():
+    filler = [{"id": f"f{i}", "subject": f"n{i}", "body": f"unrelated note number {i} " * 5} for i in range(5)]
+    rows = [{"id": "r", "subject": "Parcel", "body": TEXT}] + filler + [{"id": "m", "subject": "Parcel", "body": TEXT + " now"}]
+    with mock_client():
+        records, _ = _score(rows, concurrency=1, near_dup=NearDupIndex(0.7))
+    member = next(r for r in records if r["id"] == "m")
+    assert member["decided_by"] == "near_duplicate"
+
+
+def test_members_of_a_failed_representative_are_analyzed(monkeypatch):
+    analyze = batch_score.analyze_email_async
+
+    async def flaky(subject, body, *args, **kwargs):
+        if body == TEXT:
+            raise RuntimeError("representative broke")
+        return await analyze(subject, body, *args, **kwargs)
+
+    monkeypatch.setattr(batch_score, "analyze_email_async", flaky)
+    rows = [{"id": "r", "subject": "Parcel", "body": TEXT}, {"id": "m", "subject": "Parcel", "body": TEXT + " now"}]
+    with mock_client():
+        records, _ = _score(rows, near_dup=NearDupIndex(0.7))
+    by_id = {r["id"]: r for r in records}
+    assert by_id["r"]["ok"] is False
+    assert by_id["m"]["ok"] is True and by_id["m"]["decided_by"] == "llm"
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import agents.batching as batching
+from agents.cache import VerdictCache, set_cache
+from agents.schema import REQUIRED_KEYS
+
+GOOD = {key: "" for key in REQUIRED_KEYS}
+GOOD.update({"verdict": "legitimate", "confidence": 0.9, "phishing_indicators": [],
+             "legitimacy_indicators": [], "evidence": []})
+
+
+class _BatchClient:
+    def __init__(self, results):
+        self.results = results
+        self.requests = []
+
+    async def generate(self, **kwargs):
+        self.requests.append(kwargs)
+        if isinstance(self.results, Exception):
+            raise self.results
+        return {"response": json.dumps({"results": self.results})}
+
+
+def _run(monkeypatch, results, n):
+    retried = []
+    client = _BatchClient(results)
+
+    async def individually(subject, body, urls, headers_text):
+        retried.append(subject)
+        return "retried"
+
+    monkeypatch.setattr(batching, "get_async_client", lambda: client)
+    monkeypatch.setattr(batching, "run_unified_agent_async", individually)
+
+    async def main():
+        batcher = batching.MicroBatcher(max_batch_size=n, max_wait_ms=10)
+        answers = await asyncio.gather(*(batcher.submit(f"s{i}", "body", []) for i in range(n)))
+        return answers, batcher.stats()
+
+    answers, stats = asyncio.run(main())
+    return answers, retried, client, stats
+
+
+def test_missing_and_garbled_answers_are_retried_and_not_cached(monkeypatch):
+    cache = VerdictCache(":memory:")
+    set_cache(cache)
+    results = [
+        {"id": "e1", "text": dict(GOOD), "url": dict(GOOD), "metadata": dict(GOOD)},
+        {"id": "e2", "text": {"verdict": "phishing"}, "url": dict(GOOD), "metadata": dict(GOOD)},
+    ]
+    answers, retried, client, _ = _run(monkeypatch, results, 3)
+    assert answers[0]["text"]["verdict"] == "legitimate"
+    assert answers[1:] == ["retried", "retried"]
+    assert retried == ["s1", "s2"]
+    assert cache.stats()["entries"] == 1
+    assert "timeout" not in client.requests[0]  # the client's read timeout applies
+
+
+def test_transport_failure_fails_the_batch_without_fan_out(monkeypatch):
+    cache = VerdictCache(":memory:")
+    set_cache(cache)
+    answers, retried, client, stats = _run(monkeypatch, ConnectionError("refused"), 4)
+    assert retried == [] and len(client.requests) == 1
+    assert stats["failed_batches"] == 1
+    for answer in answers:
+        assert {a["verdict"] for a in answer.values()} == {"unsure"}
+        assert answer["text"]["error"] == "ConnectionError('refused')"
+    assert answers[0]["text"] is not answers[1]["text"]
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,58 @@
+import os
+import time
+
+import agents.text_agent as text_agent
+import agents.unified_agent as unified_agent
+from agents.cache import VerdictCache, default_cache_path, set_cache
+
+
+def test_lru_eviction_drops_least_recently_read():
+    cache = VerdictCache(":memory:", max_entries=2, ttl_seconds=0)
+    cache.put("a", "text", 1)
+    time.sleep(0.01)
+    cache.put("b", "text", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1  # "a" is now more recent than "b"
+    cache.put("c", "text", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["entries"] == 2
+
+
+def test_ttl_expiry():
+    cache = VerdictCache(":memory:", ttl_seconds=0.05)
+    cache.put("k", "text", {"verdict": "phishing"})
+    assert cache.get("k") == {"verdict": "phishing"}
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+class _FakeClient:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def generate(self, **kwargs):
+        self.calls += 1
+        return {"response": self.response}
+
+
+def test_fail_safe_output_is_not_cached(monkeypatch):
+    cache = VerdictCache(":memory:")
+    set_cache(cache)
+    client = _FakeClient('{"verdict": "phishing"}')  # required keys missing
+    monkeypatch.setattr(text_agent, "get_client", lambda: client)
+    monkeypatch.setattr(unified_agent, "get_client", lambda: client)
+
+    assert text_agent.run_text_agent("s", "b")["verdict"] == "unsure"
+    assert unified_agent.run_unified_agent("s", "b", [])["text"]["verdict"] == "unsure"
+    assert cache.stats()["entries"] == 0
+
+
+def test_default_path_is_per_user_not_cwd(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_path() == str(tmp_path / "phishing-agents" / "verdict_cache.sqlite")
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    path = default_cache_path()
+    assert os.path.isabs(path) and path.startswith(os.path.expanduser("~"))
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from email_store import EmailStore, open_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    rows = [{"id": f"p{i}", "source_dataset": "a" if i % 2 else "b", "label": "phishing",
+             "subject": f"s{i}", "body": "b"} for i in range(30)]
+    rows += [{"id": f"l{i}", "source_dataset": "a", "label": "Legitimate", "subject": f"s{i}", "body": "b"}
+             for i in range(10)]
+    rows.append(dict(rows[0]))  # repeated id keeps its first row
+    with EmailStore(str(tmp_path / "emails.sqlite")) as s:
+        assert s.load(rows) == 40
+        yield s
+
+
+def test_counts_and_lookup(store):
+    assert len(store) == 40
+    assert store.label_counts() == {"legitimate": 10, "phishing": 30}
+    assert store.get("p3")["subject"] == "s3"
+    assert store.get("missing") is None
+
+
+def test_sample_is_deterministic_and_filtered(store):
+    a = store.sample(5, label="phishing", seed=7)
+    assert [r["id"] for r in a] == [r["id"] for r in store.sample(5, label="phishing", seed=7)]
+    assert len({r["id"] for r in a}) == 5
+    assert all(r["label"] == "phishing" for r in a)
+    assert len(store.sample(100, label="legitimate")) == 10
+
+
+def test_stratified_sample(store):
+    rows = store.stratified_sample({"phishing": 6, "legitimate": 4}, by_source=True, seed=1)
+    assert sum(r["label"] == "phishing" for r in rows) == 6
+    assert sum(r["source_dataset"] == "b" for r in rows) == 3
+
+
+def test_iter_rows(store):
+    assert len(list(store.iter_rows(label="phishing", source_dataset="a", batch_size=4))) == 15
+
+
+def _write_csv(path, ids):
+    path.write_text("id,source_dataset,label,subject,body,headers_text\n"
+                    + "".join(f"{i},a,phishing,s,b,\n" for i in ids))
+
+
+def test_open_store_rebuilds_for_other_or_changed_source(tmp_path):
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    _write_csv(first, ["a1", "a2"])
+    _write_csv(second, ["b1"])
+    path = str(tmp_path / "emails.sqlite")
+
+    with open_store(str(first), path) as s:
+        assert s.get("a1") is not None
+    with open_store(str(second), path) as s:  # older file, other dataset
+        assert s.get("a1") is None and len(s) == 1
+
+    _write_csv(second, ["b1", "b2", "b3"])
+    os.utime(second, (0, 0))  # rewritten with an old mtime: the size still differs
+    with open_store(str(second), path) as s:
+        assert len(s) == 3
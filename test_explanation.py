@@ -0,0 +1,47 @@
+import agents.explanation_agent as explanation_agent
+from agents.explanation_templates import ADVICE, PHISHING_TEMPLATES, VERDICT_LEADS, render_explanation
+
+PHISHING = {
+    "verdict": "phishing",
+    "score": 0.8,
+    "phishing_indicators": ["credential_harvesting", "not_in_schema", "ip_based_url"],
+    "legitimacy_indicators": ["professional_tone_and_language"],
+    "evidence": [{"indicator": "credential_harvesting", "text_quote": "Confirm   your\npassword " + "x" * 100}],
+}
+
+
+def test_phishing_explanation_lists_known_indicators_with_quotes():
+    lines = render_explanation(PHISHING).splitlines()
+    assert lines[0] == VERDICT_LEADS["phishing"]
+    assert lines[2] == "Why:"
+    reasons = [line for line in lines if line.startswith("- ")]
+    assert len(reasons) == 2  # the unknown indicator is skipped
+    assert reasons[0].startswith("- " + PHISHING_TEMPLATES["credential_harvesting"][:-1])
+    assert '(for example: "Confirm your password xxx' in reasons[0]
+    assert reasons[0].endswith('...").')
+    assert lines[-1] == ADVICE["phishing"]
+
+
+def test_legitimate_explanation_uses_legitimacy_indicators():
+    text = render_explanation({**PHISHING, "verdict": "legitimate"})
+    assert "professional" in text
+    assert "password" not in text
+
+
+def test_unknown_verdict_and_prefilter_decision():
+    text = render_explanation({"verdict": "bogus", "decided_by": "prefilter"})
+    assert text.startswith(VERDICT_LEADS["unsure"] + " Our screening model")
+    assert text.endswith(ADVICE["unsure"])
+
+
+def test_point_limit():
+    final = {"verdict": "unsure", "phishing_indicators": list(PHISHING_TEMPLATES)}
+    lines = render_explanation(final, max_points=2).splitlines()
+    assert lines[2] == "Some warning signs:"
+    assert lines[5] == f"- ...and {len(PHISHING_TEMPLATES) - 2} more reason(s)."
+
+
+def test_explain_falls_back_to_template(monkeypatch):
+    monkeypatch.setattr(explanation_agent, "run_explanation_agent", lambda final: explanation_agent.EXPLANATION_UNAVAILABLE)
+    assert explanation_agent.explain(PHISHING, llm=True) == render_explanation(PHISHING)
+    assert explanation_agent.explain(PHISHING, llm=False) == render_explanation(PHISHING)
@@ -0,0 +1,45 @@
+from agents.header_rules import analyze_headers
+
+
+def test_auth_failure_is_conclusive_phishing():
+    out, conclusive = analyze_headers(
+        "From: PayPal <service@paypal.com>\n"
+        "Authentication-Results: mx.example.com; spf=fail smtp.mailfrom=paypal.com; dkim=fail\n"
+    )
+    assert conclusive
+    assert out["verdict"] == "phishing"
+    assert {"spf_fail_or_softfail", "dkim_fail"} <= set(out["phishing_indicators"])
+
+
+def test_reply_to_mismatch_alone_goes_to_llm():
+    out, conclusive = analyze_headers("From: list@lists.example.org\nReply-To: team@example.com\n")
+    assert not conclusive and out["verdict"] == "unsure"
+    assert "reply_to_mismatch" in out["phishing_indicators"]
+
+
+def test_reply_to_mismatch_with_auth_failure():
+    out, conclusive = analyze_headers(
+        "From: a@bank.com\nReply-To: b@evil.ru\n"
+        "Authentication-Results: mx; dmarc=fail\n"
+    )
+    assert conclusive and out["verdict"] == "phishing"
+    assert out["confidence"] == 0.9
+    assert {"dmarc_fail", "reply_to_mismatch"} <= set(out["phishing_indicators"])
+
+
+def test_all_pass_is_legitimate():
+    out, conclusive = analyze_headers(
+        "From: a@bank.com\nAuthentication-Results: mx; spf=pass; dkim=pass; dmarc=pass\n"
+    )
+    assert conclusive and out["verdict"] == "legitimate"
+
+
+def test_inconclusive_headers_go_to_llm():
+    out, conclusive = analyze_headers("From: a@bank.com\nSubject: hi\n")
+    assert not conclusive
+    assert out["verdict"] == "unsure"
+
+
+def test_no_headers():
+    out, conclusive = analyze_headers("")
+    assert conclusive and out["verdict"] == "unsure"
@@ -0,0 +1,41 @@
+from agents.input_prep import fit_to_budget, prepare_body, strip_boilerplate, strip_html
+
+LURE = "If you are not the one who signed in, verify your password here: http://evil.example/x within 24 hours."
+
+
+def test_prepare_body_keeps_lure_lines():
+    body = f"Hello,\nWe noticed a new sign-in.\n{LURE}\nThanks,\nSecurity Team"
+    out = prepare_body(body)
+    assert "http://evil.example/x" in out
+    assert "within 24 hours" in out
+
+
+def test_footer_boilerplate_is_stripped():
+    body = "Your order has shipped.\nThanks for shopping.\nUnsubscribe | Privacy Policy\nAll rights reserved 2024."
+    out = strip_boilerplate(body)
+    assert "Your order has shipped." in out
+    assert "Privacy Policy" not in out
+    assert "All rights reserved" not in out
+
+
+def test_boilerplate_above_the_footer_is_kept():
+    body = "\n".join(["If you are not sure, call us."] + [f"line {i}" for i in range(20)])
+    assert "If you are not sure, call us." in strip_boilerplate(body)
+
+
+def test_repeated_lines_are_dropped():
+    assert strip_boilerplate("same line\nother\nsame line").split("\n") == ["same line", "other"]
+
+
+def test_fit_to_budget_prefers_cue_sentences():
+    filler = " ".join(f"This is ordinary sentence number {i}." for i in range(40))
+    text = filler + " Please verify your password immediately."
+    out = fit_to_budget(text, 300)
+    assert len(out) < len(text)
+    assert "verify your password immediately" in out
+
+
+def test_strip_html():
+    out = strip_html("<html><style>p{}</style><p>Dear user</p><br>Click&nbsp;<a href='x'>here</a></html>")
+    assert "Dear user" in out and "Click" in out
+    assert "<" not in out and "p{}" not in out
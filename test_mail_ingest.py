@@ -0,0 +1,107 @@
+import mailbox
+from email.message import EmailMessage
+
+import mail_ingest
+from mail_ingest import html_to_text, iter_mbox, iter_messages, parse_message
+
+
+def _multipart(link: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "Chase <no-reply@chase.com>"
+    msg["Subject"] = "Please review your account"
+    msg.set_content("Dear customer,\nFrom now on please review your account.\n")
+    msg.add_alternative(
+        f'<html><head><style>p {{}}</style></head><body><p>Please <a href="{link}">review</a>.</p>'
+        '<script>var u = "http://script.example/";</script></body></html>',
+        subtype="html",
+    )
+    return msg
+
+
+def test_multipart_prefers_plain_and_collects_hrefs():
+    row = parse_message(bytes(_multipart("https://chase-secure-login.ru/verify")))
+    assert row["subject"] == "Please review your account"
+    assert row["body"].startswith("Dear customer,")
+    assert row["urls"] == ["https://chase-secure-login.ru/verify"]
+    assert "From: Chase <no-reply@chase.com>" in row["headers_text"]
+
+
+def test_html_only_body_is_visible_text():
+    msg = EmailMessage()
+    msg["Subject"] = "Locked"
+    msg.set_content("<div>Dear user<br>your <b>account</b> is locked &amp; <a href='http://a.example/c'>unlock</a></div>",
+                    subtype="html")
+    row = parse_message(bytes(msg))
+    assert row["body"] == "Dear user\nyour account is locked & unlock"
+    assert row["urls"] == ["http://a.example/c"]
+
+
+def test_html_to_text_skips_script_and_style():
+    text, urls = html_to_text('<style>x{}</style><p>Hi</p><script>alert(1)</script><img src="https://t.example/p.gif">')
+    assert text == "Hi"
+    assert urls == ["https://t.example/p.gif"]
+
+
+def test_link_only_difference_gets_its_own_id():
+    a = parse_message(bytes(_multipart("https://www.chase.com/verify")))
+    b = parse_message(bytes(_multipart("https://chase-secure-login.ru/verify")))
+    assert a["body"] == b["body"]
+    assert a["id"] != b["id"]
+
+
+def test_mbox_is_split_and_unescaped(tmp_path):
+    path = tmp_path / "box.mbox"
+    box = mailbox.mbox(str(path))
+    box.add(_multipart("https://www.chase.com/a"))
+    box.add(_multipart("https://www.chase.com/b"))
+    box.flush()
+
+    raws = list(iter_mbox(str(path)))
+    assert len(raws) == 2
+    assert all(b"\n>From now on" not in raw for raw in raws)
+
+    rows = list(iter_messages(str(path)))
+    assert [r["source_dataset"] for r in rows] == ["box", "box"]
+    assert "From now on" in rows[0]["body"]
+    assert len(list(iter_messages(str(path), limit=1))) == 1
+
+
+def test_eml_directory(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.eml").write_bytes(bytes(_multipart("https://www.chase.com/a")))
+    (tmp_path / "sub" / "b.eml").write_bytes(bytes(_multipart("https://www.chase.com/b")))
+    (tmp_path / "notes.txt").write_text("not mail")
+
+    rows = list(iter_messages(str(tmp_path)))
+    assert [r["urls"] for r in rows] == [["https://www.chase.com/a"], ["https://www.chase.com/b"]]
+    assert rows[1]["source_dataset"] == "sub"
+
+
+def test_unknown_charset_falls_back_to_latin1():
+    raw = (b"Subject: x\nContent-Type: text/plain; charset=unknown-8bit\n"
+           b"Content-Transfer-Encoding: 8bit\n\ncaf\xe9\n")
+    assert parse_message(raw)["body"] == "caf\xe9\n"
+
+
+def test_malformed_header_is_kept_raw():
+    row = parse_message(b"Message-ID: <<>\nSubject: =?utf-8?q?caf=C3=A9?=\n\nbody\n")
+    assert row["headers_text"] == "Message-ID: <<>\nSubject: caf\xe9\n"
+    assert row["subject"] == "caf\xe9"
+
+
+def test_unparseable_message_is_skipped_and_counted(tmp_path, monkeypatch):
+    parse = mail_ingest.parse_message
+
+    def flaky(raw, source=""):
+        if b"boom" in raw:
+            raise ValueError("boom")
+        return parse(raw, source)
+
+    monkeypatch.setattr(mail_ingest, "parse_message", flaky)
+    mbox = tmp_path / "inbox.mbox"
+    mbox.write_bytes(b"".join(
+        b"From a@b Mon Jan 1 00:00:00 2024\nSubject: %s\n\nbody\n\n" % s for s in (b"one", b"boom", b"two")
+    ))
+    stats = {}
+    assert [r["subject"] for r in iter_messages(str(mbox), stats=stats)] == ["one", "two"]
+    assert stats == {"skipped": 1}
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from agents.llm_client import OllamaClient
+from mock_ollama import MockConfig, start_mock_server
+
+
+@pytest.fixture
+def mock_url():
+    server, url = start_mock_server(0, MockConfig(latency_ms=1, distribution="fixed", seed=1))
+    yield url
+    server.shutdown()
+
+
+@pytest.mark.parametrize("transport", ["requests", "stdlib"])
+def test_generate_returns_agent_json(mock_url, transport):
+    client = OllamaClient(base_url=mock_url, transport=transport)
+    data = client.generate("Subject: hi", system="UNIFIED ANALYSIS AGENT")
+    answer = json.loads(data["response"])
+    assert set(answer) == {"text", "url", "metadata"}
+    assert client.stats.snapshot()["calls"] == 1
+
+
+@pytest.mark.parametrize("transport", ["requests", "stdlib"])
+def test_stream_yields_chunks_until_done(mock_url, transport):
+    client = OllamaClient(base_url=mock_url, transport=transport)
+    chunks = list(client.stream("explain", system="EXPLANATION AGENT"))
+    assert chunks[-1]["done"] is True
+    assert "mock explanation" in "".join(c.get("response", "") for c in chunks)
+
+
+def test_batch_prompt_gets_one_answer_per_email(mock_url):
+    client = OllamaClient(base_url=mock_url)
+    data = client.generate("=== EMAIL e1 ===\nx\n=== EMAIL e2 ===\ny")
+    assert [r["id"] for r in json.loads(data["response"])["results"]] == ["e1", "e2"]
+
+
+@pytest.mark.parametrize("transport", ["requests", "stdlib"])
+def test_server_errors_are_retried_then_raised(transport):
+    server, url = start_mock_server(0, MockConfig(latency_ms=0, distribution="fixed", failure_rate=1.0))
+    try:
+        client = OllamaClient(base_url=url, transport=transport, max_retries=1, backoff_seconds=0)
+        with pytest.raises(Exception):
+            client.generate("x")
+        assert client.pool.stats()[0]["errors"] == 2
+    finally:
+        server.shutdown()
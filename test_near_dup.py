@@ -0,0 +1,51 @@
+from near_dup import NearDupIndex, link_domains, propagate
+
+BODY = ("Dear customer, your parcel could not be delivered. Please confirm your address "
+        "and pay the redelivery fee at the link below before {day}. {link}")
+
+
+def test_near_duplicates_share_a_representative():
+    index = NearDupIndex(threshold=0.7)
+    assert index.assign("a", "Parcel", BODY.format(day="Monday", link="https://post.example/1")) == ("a", 1.0)
+    rep, sim = index.assign("b", "Parcel", BODY.format(day="Monday", link="https://post.example/2"))
+    assert rep == "a" and sim >= 0.7
+    assert index.stats()["clusters"] == 1
+
+
+def test_different_link_domains_never_cluster():
+    index = NearDupIndex(threshold=0.7)
+    index.assign("a", "Parcel", BODY.format(day="Monday", link="https://post.example/1"))
+    assert index.assign("b", "Parcel", BODY.format(day="Monday", link="https://post-redelivery.ru/1"))[0] == "b"
+
+
+def test_html_links_count_as_link_domains():
+    body = BODY.format(day="Monday", link="")
+    index = NearDupIndex(threshold=0.7)
+    index.assign("a", "Parcel", body, urls=["https://www.chase.com/x"])
+    assert index.assign("b", "Parcel", body, urls=["https://chase-secure-login.ru/x"])[0] == "b"
+    assert link_domains("see https://a.example.com/x", ["https://b.example.org/y"]) == ("example.com", "example.org")
+
+
+def test_unrelated_emails_do_not_cluster():
+    index = NearDupIndex(threshold=0.7)
+    index.assign("a", "Lunch", "Are we still on for lunch at noon tomorrow near the office?")
+    assert index.assign("b", "Invoice", "Attached is the invoice for March, payable within thirty days.")[0] == "b"
+
+
+def test_propagate_marks_member():
+    result = {"agents": {}, "final": {"verdict": "phishing", "score": 0.9, "decided_by": "prefilter"}}
+    final = propagate(result, "a", 0.91234)["final"]
+    assert final["decided_by"] == "near_duplicate"
+    assert final["representative_decided_by"] == "prefilter"
+    assert (final["representative_id"], final["similarity"]) == ("a", 0.912)
+
+
+def test_different_senders_never_cluster():
+    body = BODY.format(day="Monday", link="https://post.example/1")
+    bank = "From: Bank <alerts@bank.example>\nAuthentication-Results: mx; spf=pass; dkim=pass; dmarc=pass\n"
+    spoofed = "From: Bank <alerts@bank.example>\nAuthentication-Results: mx; spf=fail; dkim=fail; dmarc=fail\n"
+    index = NearDupIndex(threshold=0.7)
+    index.assign("a", "Parcel", body, headers_text=bank)
+    assert index.assign("b", "Parcel", body, headers_text=spoofed)[0] == "b"
+    assert index.assign("c", "Parcel", body, headers_text="From: alerts@other.example\n")[0] == "c"
+    assert index.assign("d", "Parcel", body, headers_text=bank + "Subject: Parcel\n")[0] == "a"
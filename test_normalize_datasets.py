@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from dataset_io import content_id, iter_rows, load_emails
+from normalize_datasets import DedupIndex, clean_series, clean_text, normalize_chunk
+
+
+def test_clean_series_matches_clean_text():
+    values = ["  a\t\tb  ", "x\r\ny\rz", None, np.nan, "one  two \t three", ""]
+    assert clean_series(pd.Series(values, dtype=object)).tolist() == [clean_text(v) if isinstance(v, str) else "" for v in values]
+
+
+def test_normalize_chunk():
+    raw = pd.DataFrame({
+        "Subject": ["Hi", None, "  "],
+        "Body": ["see  you", "text", None],
+        "Label": ["Spam", "0", "other"],
+    })
+    out = normalize_chunk(raw, "emails")
+    assert out["subject"].tolist() == ["Hi", ""]
+    assert out["body"].tolist() == ["see you", "text"]
+    assert out["label"].tolist() == ["phishing", "legitimate"]
+    assert out["id"].tolist() == [content_id("Hi", "see you"), content_id("", "text")]
+
+
+def test_content_id_ignores_whitespace():
+    assert content_id("Hi  there", "a\n b") == content_id("Hi there", "a b")
+    assert content_id("Hi", "a") != content_id("Hi", "b")
+
+
+def test_dedup_index_keeps_first_copy_and_remembers_ids(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    df = pd.DataFrame({"id": [content_id("a", "1"), content_id("b", "2")]})
+
+    index = DedupIndex(path)
+    assert len(index.filter(df, "first")) == 2
+    assert len(index.filter(df.iloc[:1], "second")) == 0
+    assert index.counts["second"]["duplicates"] == {"first": 1}
+    index.close()
+
+    again = DedupIndex(path)
+    again.filter(df, "first")
+    assert again.counts["first"]["new"] == 0
+    again.close()
+
+
+def test_csv_loading(tmp_path):
+    path = tmp_path / "n.csv"
+    path.write_text("id,source_dataset,subject,body,label\n1,a,Hi,,phishing\n2,b,,text,legitimate\n")
+    df = load_emails(str(path), columns=["id", "body", "headers_text"])
+    assert df.to_dict("records") == [
+        {"id": "1", "body": "", "headers_text": ""},
+        {"id": "2", "body": "text", "headers_text": ""},
+    ]
+    assert [r["id"] for r in iter_rows(str(path), limit=1)] == ["1"]
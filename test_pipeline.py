@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.llm_client import OllamaClient, get_client, set_client
+from mock_ollama import MockConfig, start_mock_server
+from pipeline import analyze_email_async
+
+LATENCY_S = 0.3
+HEADERS = "From: a@b.example\nSubject: Verify\n"
+BODY = "Log in at http://x.example/a now"
+
+
+@pytest.fixture
+def client():
+    server, url = start_mock_server(0, MockConfig(latency_ms=LATENCY_S * 1000, distribution="fixed", seed=2))
+    previous = get_client()
+    client = OllamaClient(base_url=url)
+    set_client(client)
+    yield client
+    set_client(previous)
+    server.shutdown()
+
+
+def test_agents_run_concurrently(client):
+    start = time.perf_counter()
+    out = asyncio.run(analyze_email_async("Verify", BODY, headers_text=HEADERS, cascade=False))
+    elapsed = time.perf_counter() - start
+
+    assert set(out["agents"]) == {"text", "url", "metadata"}
+    assert out["final"]["verdict"] in {"phishing", "legitimate", "unsure"}
+    # The async client follows set_client(), so all three calls hit the mock.
+    assert client.stats.snapshot()["calls"] == 3
+    # Serially the three calls would take at least 3 * LATENCY_S.
+    assert elapsed < 2.5 * LATENCY_S
+
+
+def test_unified_path_makes_one_call(client):
+    out = asyncio.run(analyze_email_async("Verify", BODY, headers_text=HEADERS, cascade=False, per_agent=False))
+    assert set(out["agents"]) == {"text", "url", "metadata"}
+    assert client.stats.snapshot()["calls"] == 1
@@ -0,0 +1,47 @@
+import pytest
+
+from prefilter import Prefilter, email_text
+
+PROBABILITIES = {"phish": 0.99, "legit": 0.01, "unclear": 0.5, "edge": 0.97}
+
+
+class _Model:
+    classes_ = ["legitimate", "phishing"]
+
+    def predict_proba(self, texts):
+        p = PROBABILITIES[texts[0].split("\n\n", 1)[0]]
+        return [[1 - p, p]]
+
+
+@pytest.fixture
+def prefilter(monkeypatch):
+    monkeypatch.setattr("joblib.load", lambda path: _Model())
+    return Prefilter("unused.joblib", phish_threshold=0.97, legit_threshold=0.03)
+
+
+def test_email_text():
+    assert email_text("s", None) == "s\n\n"
+
+
+def test_confident_emails_are_decided(prefilter):
+    phish = prefilter.decide("phish", "b")
+    assert phish["verdict"] == "phishing" and phish["decided_by"] == "prefilter"
+    assert phish["score"] == 0.98 and phish["prefilter_probability"] == 0.99
+    assert prefilter.decide("legit", "b")["verdict"] == "legitimate"
+    assert prefilter.decide("edge", "b")["verdict"] == "phishing"  # threshold is inclusive
+
+
+def test_uncertain_band_goes_to_llm(prefilter):
+    assert prefilter.decide("unclear", "b") is None
+
+
+def test_stats(prefilter):
+    for subject in ("phish", "legit", "unclear", "unclear"):
+        prefilter.decide(subject, "")
+    assert prefilter.stats() == {
+        "emails": 4,
+        "decided_phishing": 1,
+        "decided_legitimate": 1,
+        "routed_to_llm": 2,
+        "llm_fraction": 0.5,
+    }
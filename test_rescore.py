@@ -0,0 +1,48 @@
+import random
+
+from near_dup import propagate
+from rescore import agents_frame, combine_agents_vectorized
+from run_store import rescore_record
+
+VERDICTS = ["phishing", "legitimate", "unsure", "bogus"]
+
+
+def _agent(rng, hard=False):
+    return {
+        "verdict": rng.choice(VERDICTS),
+        "confidence": rng.choice([0.0, 0.3, 0.7, 0.95, "0.8", None]),
+        "phishing_indicators": ["spf_fail_or_softfail"] if hard else [],
+    }
+
+
+def _records(n=300, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        agents = {"text": _agent(rng), "url": _agent(rng), "metadata": _agent(rng, hard=rng.random() < 0.3)}
+        final = {"verdict": "unsure", "score": 0.0}
+        if rng.random() < 0.2:
+            final = {"verdict": rng.choice(["phishing", "legitimate"]), "score": 0.97, "decided_by": "prefilter"}
+        record = {"id": str(i), "label": "phishing", "agents": agents, "final": final}
+        if rng.random() < 0.3:
+            record.update(propagate(record, "rep", 0.9))  # near-duplicate member
+        records.append(record)
+    return records
+
+
+def test_vectorized_matches_rescore_record():
+    records = _records()
+    vec = combine_agents_vectorized(agents_frame(records))
+    for record, (_, row) in zip(records, vec.iterrows()):
+        expected = rescore_record(record)
+        assert row["verdict"] == expected["verdict"], record
+        assert abs(row["score"] - expected["score"]) < 1e-3, record
+
+
+def test_member_of_prefilter_decision_keeps_its_verdict():
+    unsure = {"verdict": "unsure", "confidence": 0.0}
+    rep = {"agents": {"text": unsure, "url": unsure, "metadata": unsure},
+           "final": {"verdict": "phishing", "score": 0.97, "decided_by": "prefilter"}}
+    member = {"id": "m", "label": "phishing", **propagate(rep, "r", 0.9)}
+    row = combine_agents_vectorized(agents_frame([member])).iloc[0]
+    assert (row["verdict"], row["score"]) == ("phishing", 0.97)
@@ -0,0 +1,49 @@
+import pytest
+
+from agents.validators import validate_agent_output_checked
+from run_store import RunStore, iter_run_records, make_record
+
+CONFIG = {"model": "m", "mode": "unified", "cascade": True}
+
+
+def _record(row_id, agents=None):
+    result = {"agents": agents or {}, "final": {"verdict": "unsure", "score": 0.0}}
+    return make_record({"id": row_id, "source_dataset": "s", "label": " Phishing "}, result, 0.1)
+
+
+def test_resume_skips_finished_rows(tmp_path):
+    with RunStore(str(tmp_path), CONFIG) as store:
+        store.append(_record("a"))
+        store.append(_record("b"))
+
+    with RunStore(str(tmp_path), CONFIG) as store:
+        assert store.done_ids() == {"a", "b"}
+        assert store.is_done("a") and not store.is_done("c")
+        store.append(_record("c"))
+        records = list(store.iter_records())
+    assert [r["id"] for r in records] == ["a", "b", "c"]
+    assert records[0]["label"] == "phishing"
+
+
+def test_config_change_is_refused(tmp_path):
+    RunStore(str(tmp_path), CONFIG).close()
+    with pytest.raises(ValueError):
+        RunStore(str(tmp_path), {**CONFIG, "cascade": False})
+
+
+def test_failed_rows_are_retried_and_not_scored(tmp_path):
+    failed, ok = validate_agent_output_checked({}, "text", error="ConnectionError()")
+    assert not ok
+    record = _record("a", {"text": failed})
+    assert record["ok"] is False and record["errors"] == {"text": "ConnectionError()"}
+
+    with RunStore(str(tmp_path), CONFIG) as store:
+        store.append(record)
+        assert not store.is_done("a")
+    with RunStore(str(tmp_path), CONFIG) as store:
+        assert store.done_ids() == set()
+        store.append(_record("a"))
+        assert store.is_done("a")
+
+    assert [r["ok"] for r in iter_run_records(tmp_path)] == [True]
+    assert [r["ok"] for r in iter_run_records(tmp_path, failed=True)] == [False, True]
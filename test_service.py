@@ -0,0 +1,76 @@
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def server():
+    # No workers: queued emails stay queued, so admission can be checked
+    # without an LLM behind the service.
+    srv = service.make_server("127.0.0.1", 0, workers=0, queue_size=3)
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    yield srv
+    srv.shutdown()
+
+
+def _post(srv, path, body, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", srv.server_address[1], timeout=5)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    conn.request("POST", path, data, {"Content-Length": str(len(data)), **(headers or {})})
+    resp = conn.getresponse()
+    return resp.status, resp.getheader("Retry-After"), json.loads(resp.read())
+
+
+def test_submit_all_is_all_or_nothing():
+    work = service.AnalysisQueue(workers=0, queue_size=3)
+    assert len(work.submit_all([{}, {}])) == 2
+    assert work.submit_all([{}, {}]) is None
+    assert work.stats()["queue_depth"] == 2
+    assert work.stats()["rejected_batches"] == 1
+
+
+def test_batch_larger_than_queue_is_413(server):
+    status, _, body = _post(server, "/analyze/batch", {"emails": [{}] * 4})
+    assert status == 413 and "at most 3" in body["error"]
+
+
+def test_batch_that_does_not_fit_now_is_503(server):
+    server.RequestHandlerClass.work.submit_all([{}, {}])
+    status, retry_after, _ = _post(server, "/analyze/batch", {"emails": [{}, {}]})
+    assert status == 503 and retry_after == str(service.RETRY_AFTER_S)
+    assert server.RequestHandlerClass.work.stats()["queue_depth"] == 2
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/analyze", {"subject": 5}),
+    ("/analyze", {"body": "x", "cascade": "yes"}),
+    ("/analyze", [1, 2]),
+    ("/analyze/batch", {"emails": [{"body": "x"}, {"body": ["x"]}]}),
+    ("/analyze/batch", {"emails": "x"}),
+])
+def test_invalid_requests_are_400(server, path, body):
+    assert _post(server, path, body)[0] == 400
+
+
+def test_bad_content_length_is_400(server):
+    assert _post(server, "/analyze", b"{}", {"Content-Length": "abc"})[0] == 400
+
+
+def test_oversized_body_closes_the_connection(server, monkeypatch):
+    monkeypatch.setattr(service, "MAX_BODY_BYTES", 10)
+    smuggled = b"GET /healthz HTTP/1.1\r\nHost: x\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", server.server_address[1]), timeout=5) as sock:
+        sock.sendall(
+            b"POST /analyze HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(smuggled)}\r\n\r\n".encode() + smuggled
+        )
+        data = b""
+        while chunk := sock.recv(4096):
+            data += chunk
+    assert data.startswith(b"HTTP/1.0 413") or data.startswith(b"HTTP/1.1 413")
+    assert data.count(b"HTTP/1.") == 1  # the body was not served as a second request
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.tracing import Tracer, get_tracer, traced
+
+
+def test_breakdown_splits_model_transport_and_local_time():
+    tracer = Tracer(sink_path="")
+    tracer.record("llm.http", 2.0, "text")
+    tracer.record("validate", 0.25, "text")
+    tracer.record("orchestrate", 0.05)
+    tracer.record_ollama("text", {
+        "total_duration": 1.5e9,
+        "load_duration": 0.1e9,
+        "prompt_eval_duration": 0.4e9,
+        "eval_duration": 1.0e9,
+    })
+    assert tracer.breakdown() == {
+        "prompt_eval_s": 0.4,
+        "generation_s": 1.0,
+        "model_load_s": 0.1,
+        "transport_and_queue_s": 0.5,
+        "local_code_s": 0.3,
+    }
+
+
+def test_prompt_reuse():
+    tracer = Tracer(sink_path="")
+    # 4000 chars ~ 1000 tokens sent; the model evaluated 100 of them.
+    tracer.record_ollama("unified", {"prompt_eval_count": 100, "prompt_eval_duration": 0.2e9}, prompt_chars=4000)
+    tracer.record_ollama("url", {"prompt_eval_count": 10})  # no estimate: not reported
+    assert tracer.prompt_reuse() == {
+        "unified": {
+            "tokens_sent_est": 1000,
+            "tokens_evaluated": 100,
+            "reuse_fraction": 0.9,
+            "eval_seconds_saved_est": 1.8,
+        },
+    }
+
+
+def test_span_records_failures_to_sink(tmp_path):
+    sink = tmp_path / "trace.jsonl"
+    tracer = Tracer(sink_path=str(sink))
+    with pytest.raises(ValueError):
+        with tracer.span("validate", "text"):
+            raise ValueError
+    tracer.set_sink(None)
+    event = json.loads(sink.read_text())
+    assert (event["stage"], event["agent"], event["ok"]) == ("validate", "text", False)
+    assert tracer.snapshot()["stages"]["validate[text]"]["count"] == 1
+
+
+def test_traced_wraps_async_functions():
+    @traced("orchestrate_test")
+    async def work():
+        return 7
+
+    assert asyncio.run(work()) == 7
+    assert get_tracer().snapshot()["stages"]["orchestrate_test"]["count"] >= 1
@@ -0,0 +1,73 @@
+import pytest
+
+from agents.cache import VerdictCache, set_cache
+from agents.url_cache import lookup_urls, registered_domain, store_url_findings
+
+
+@pytest.fixture
+def cache():
+    cache = VerdictCache(":memory:")
+    set_cache(cache)
+    return cache
+
+
+def _result(verdict, phishing=(), legitimate=()):
+    return {
+        "verdict": verdict,
+        "confidence": 0.9,
+        "phishing_indicators": list(phishing),
+        "legitimacy_indicators": list(legitimate),
+        "evidence": [],
+    }
+
+
+LEGIT = _result("legitimate", legitimate=["consistent_sender_and_links"])
+LOOKALIKE = _result("phishing", phishing=["typosquatting_or_lookalike_domain"])
+
+
+@pytest.mark.parametrize("host, domain", [
+    ("www.example.com", "example.com"),
+    ("shop.example.co.uk", "example.co.uk"),
+    ("octocat.github.io", "octocat.github.io"),
+    ("a.b.paypal-support.web.app", "paypal-support.web.app"),
+    ("github.io", "github.io"),
+    ("10.0.0.1", "10.0.0.1"),
+])
+def test_registered_domain(host, domain):
+    assert registered_domain(host) == domain
+
+
+def test_full_url_hit(cache):
+    store_url_findings(["https://example.com/login?x=1"], LEGIT)
+    known, unknown = lookup_urls(["https://example.com/login?x=1"])
+    assert [k["verdict"] for k in known] == ["legitimate"] and unknown == []
+
+
+def test_legitimate_domain_only_covers_plain_urls(cache):
+    store_url_findings(["https://docs.example.com/guide"], LEGIT)
+    known, unknown = lookup_urls(["https://www.example.com/about", "https://www.example.com/login"])
+    assert [k["url"] for k in known] == ["https://docs.example.com/guide"]
+    assert unknown == ["https://www.example.com/login"]
+
+
+def test_phishing_domain_covers_any_url(cache):
+    store_url_findings(["http://paypa1.com/"], LOOKALIKE)
+    known, unknown = lookup_urls(["http://www.paypa1.com/signin?id=2"])
+    assert [k["verdict"] for k in known] == ["phishing"] and unknown == []
+
+
+def test_shared_host_tenants_do_not_share_findings(cache):
+    store_url_findings(["https://octocat.github.io/"], LEGIT)
+    store_url_findings(["https://evil.web.app/"], LOOKALIKE)
+    urls = [
+        "https://paypal-support-team.github.io/",
+        "https://m1crosoft-helpdesk.web.app/index.html",
+        "https://octocat.github.io/other",
+    ]
+    known, unknown = lookup_urls(urls)
+    assert known == [] and unknown == urls
+
+
+def test_unsure_result_is_not_stored(cache):
+    store_url_findings(["https://example.com/"], _result("unsure"))
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from agents.url_features import analyze_urls, classify_url, extract_url_features
+
+
+@pytest.mark.parametrize("url", [
+    "http://evil-payments-center.com/",
+    "https://www.chaseonline.com/",
+    "https://purchase.example.com/",
+])
+def test_clean_unknown_domain_goes_to_llm(url):
+    assert classify_url(url) is None
+
+
+def test_clean_official_domain_is_legitimate():
+    finding = classify_url("https://www.chase.com/")
+    assert finding["verdict"] == "legitimate"
+    assert finding["phishing_indicators"] == []
+
+
+@pytest.mark.parametrize("url, brand", [
+    ("https://ups.com.tracking-info.ru/", "ups"),
+    ("https://secure-paypa1.com/login", "paypal"),
+    ("https://paypal.account-check.com/", "paypal"),
+    ("https://paypai.com/", "paypal"),
+    ("https://rnicrosoft.com/", "microsoft"),
+    ("https://www.linkedln.com/", "linkedin"),
+])
+def test_brand_lookalikes_are_phishing(url, brand):
+    feats = extract_url_features(url)
+    assert brand in feats["indicators"]["typosquatting_or_lookalike_domain"]
+    assert classify_url(url)["verdict"] == "phishing"
+
+
+@pytest.mark.parametrize("url", [
+    "https://apply.workday.com/",
+    "https://phase.io/",
+    "https://linked.example.com/",
+    "https://chaser.example.com/",
+    "https://applied-science.org/",
+    "https://upside.example.com/",
+    "https://adobes.example.com/",
+    "https://fedexpress.example.com/",
+])
+def test_dictionary_words_are_not_lookalikes(url):
+    assert "typosquatting_or_lookalike_domain" not in extract_url_features(url)["indicators"]
+    finding = classify_url(url)
+    assert finding is None or finding["verdict"] != "phishing"
+
+
+def test_ip_url_is_phishing():
+    assert classify_url("http://192.168.0.5/update")["verdict"] == "phishing"
+
+
+def test_analyze_urls_splits_decided_and_ambiguous():
+    decided, ambiguous = analyze_urls(["https://www.ups.com/track", "http://unknown-shop.example/"])
+    assert [d["url"] for d in decided] == ["https://www.ups.com/track"]
+    assert ambiguous == ["http://unknown-shop.example/"]